@@ -19,18 +19,36 @@ import io
 import tempfile
 import csv
 import xml.etree.ElementTree as ET
+import zlib
+import gzip
 from datetime import datetime, timedelta
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs, quote, unquote
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, asdict
 import logging
+import logging.handlers
+import queue
 from collections import Counter, defaultdict
 import re
 import subprocess
 import requests
 import atexit
 import socket
+import ipaddress
+import signal
+from multiprocessing import shared_memory
+import hmac
+import http.client
+import itertools
+import platform
+import tracemalloc
+import cProfile
+import pstats
+import gc
+import heapq
+import math
+from collections import OrderedDict
 from pathlib import Path
 
 # Configure logging
@@ -44,6 +62,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Live activity feed shown on the console (bot detections, downloads)
+feed_logger = logging.getLogger('tarpit.feed')
+feed_logger.propagate = False
+
 # ============================================================================
 # NGrok Integration - IMPROVED VERSION
 # ============================================================================
@@ -415,22 +437,14 @@ class TargetedContentGenerator:
                           "on the other hand", "similarly", "therefore", "thus"]
         }
     
-    def generate_targeted_content(self, bot_type: str, seed_keyword: str = None) -> Dict:
-        """Generate content targeted to specific bot type"""
-        
+    def generate_targeted_content(self, bot_type: str, seed_keyword: str = None,
+                                  config: 'BotTargetingConfig' = None, slots: Tuple = None) -> Dict:
+        """Generate content targeted to specific bot type (slots: the config snapshot's template_slots)"""
         # Select appropriate keywords based on bot type
-        if bot_type in ["tiktok", "social"]:
-            keywords = [seed_keyword] if seed_keyword else ["viral", "trend", "challenge", "dance"]
-            theme = "viral"
-        elif bot_type in ["news", "academic"]:
-            keywords = [seed_keyword] if seed_keyword else ["analysis", "report", "study", "findings"]
-            theme = "news"
-        elif bot_type == "shopping":
-            keywords = [seed_keyword] if seed_keyword else ["deal", "price", "buy", "discount"]
-            theme = "product"
-        else:
-            keywords = self.config.keywords
-            theme = random.choice(self.config.content_themes)
+        keywords, themes, seedable = slots or template_slots(bot_type, config or self.config)
+        if seed_keyword and seedable:
+            keywords = (seed_keyword,)
+        theme = themes[0] if len(themes) == 1 else random.choice(themes)
         
         # Generate content with high keyword density
         title = self.generate_title(theme, keywords)
@@ -589,6 +603,9 @@ class BaitContentManager:
             "image": []
         }
         
+        # Bumped whenever the bait index changes (used for /bait/list ETags)
+        self.version = 0
+        
         self.scan_bait_files()
         
         # Generate default bait files if none exist
@@ -608,6 +625,7 @@ class BaitContentManager:
                         "size": os.path.getsize(filepath),
                         "upload_time": os.path.getmtime(filepath)
                     })
+        self.version += 1
     
     def generate_default_bait_files(self):
         """Generate default bait files for trapping"""
@@ -661,6 +679,7 @@ class BaitContentManager:
             "upload_time": time.time()
         })
         
+        self.version += 1
         logger.info(f"Generated {len(self.bait_files['pdf'] + self.bait_files['csv'] + self.bait_files['json'] + self.bait_files['xml'])} bait files")
     
     def generate_fake_pdf(self) -> bytes:
@@ -789,14 +808,7 @@ startxref
                 dst.write(src.read())
             
             # Add to tracking
-            ext = os.path.splitext(original_name)[1].lower().replace('.', '')
-            if ext in self.bait_files:
-                self.bait_files[ext].append({
-                    "name": original_name,
-                    "path": dest_path,
-                    "size": os.path.getsize(dest_path),
-                    "upload_time": time.time()
-                })
+            self.register_file(original_name, dest_path, os.path.getsize(dest_path))
             
             logger.info(f"Uploaded bait file: {original_name}")
             return True
@@ -805,6 +817,20 @@ startxref
             logger.error(f"Failed to upload file: {e}")
             return False
     
+    def register_file(self, name: str, path: str, size: int):
+        """Track a newly stored bait file (re-uploads replace the existing entry)"""
+        ext = os.path.splitext(name)[1].lower().replace('.', '')
+        if ext in self.bait_files:
+            files = [f for f in self.bait_files[ext] if f["path"] != path]
+            files.append({
+                "name": name,
+                "path": path,
+                "size": size,
+                "upload_time": time.time()
+            })
+            self.bait_files[ext] = files
+            self.version += 1
+    
     def get_random_bait_file(self, file_type: str = None) -> Optional[Dict]:
         """Get a random bait file, optionally filtered by type"""
         if file_type and file_type in self.bait_files:
@@ -1122,20 +1148,112 @@ class BotTargetingConfig:
     bait_files_enabled: bool = True
     download_traps: bool = True
     user_uploads_enabled: bool = False
+    soft_404_trap: bool = False
+    behavior_classifier: bool = True
+    behavior_threshold: float = 0.6
+
+@dataclass
+class ServerSettings:
+    """Runtime settings for the HTTP server (set from the command line)"""
+    keepalive_timeout: float = 15.0
+    max_keepalive_requests: int = 100
+    header_timeout: float = 10.0
+    body_timeout: float = 30.0
+    send_timeout: float = 60.0
+    max_header_bytes: int = 16384
+    max_body_kb: int = 1024
+    max_connections: int = 1000
+    max_connections_per_ip: int = 64
+    compression: bool = True
+    dynamic_compression_level: int = 1
+    log_queue_size: int = 10000
+    console_feed: bool = True
+    feed_rate: float = 20.0
+    request_log_path: Optional[str] = "logs/requests.jsonl"
+    request_log_max_mb: int = 64
+    request_log_rotate_seconds: float = 3600.0
+    request_log_gzip: bool = False
+    max_tracked_clients: int = 50000
+    track_clients_by_ua: bool = False
+    sketch_capacity: int = 100
+    ip_ranges_file: str = "bot_ranges.json"
+    ip_ranges_reload: float = 5.0
+    config_reload: float = 2.0
+    workers: int = 1
+    worker_state_dir: str = "logs/workers"
+    stats_snapshot_path: Optional[str] = "logs/stats_snapshot.json"
+    stats_snapshot_interval: float = 30.0
+    stats_snapshot_clients: int = 5000
+    cluster_push: Optional[str] = None
+    node_id: Optional[str] = None
+    cluster_interval: float = 5.0
+    cluster_key: Optional[str] = None
+    status_stream_rate: float = 2.0
+    status_stream_viewers: int = 50
+    status_tick: float = 1.0
+    admin_host: str = "127.0.0.1"
+    admin_port: Optional[int] = None
+    admin_threads: int = 16
+    public_nice: int = 5
+
+# Bot types with their own keyword pool and theme; every other type draws from the config
+THEMED_BOT_TYPES = {
+    "tiktok": (("viral", "trend", "challenge", "dance"), "viral"),
+    "social": (("viral", "trend", "challenge", "dance"), "viral"),
+    "news": (("analysis", "report", "study", "findings"), "news"),
+    "academic": (("analysis", "report", "study", "findings"), "news"),
+    "shopping": (("deal", "price", "buy", "discount"), "product")
+}
+
+def template_slots(bot_type: str, config: 'BotTargetingConfig') -> Tuple[Tuple[str, ...], Tuple[str, ...], bool]:
+    """Keyword pool, candidate themes, and whether a seed keyword replaces the pool, for one bot type"""
+    if bot_type in THEMED_BOT_TYPES:
+        keywords, theme = THEMED_BOT_TYPES[bot_type]
+        return keywords, (theme,), True
+    return tuple(config.keywords), tuple(config.content_themes), False
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """One loaded configuration plus the structures derived from it; replaced, never modified"""
+    version: int
+    config: BotTargetingConfig
+    keywords: Tuple[str, ...]
+    bot_types: frozenset
+    keywords_summary: str
+    signatures: Tuple[Tuple[str, Tuple[str, ...], Tuple[str, ...]], ...]
+    slots: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...], bool]]
+    loaded_at: str
+    
+    def template_slots(self, bot_type: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], bool]:
+        """Precomputed template_slots for bot_type"""
+        slots = self.slots.get(bot_type)
+        return slots if slots is not None else self.slots["generic"]
+    
+    def match_signature(self, ua_lower: str, path_lower: str) -> str:
+        """First bot type whose UA or crawl patterns match, in signature order"""
+        for bot_type, ua_patterns, crawl_patterns in self.signatures:
+            for pattern in ua_patterns:
+                if pattern in ua_lower:
+                    return bot_type
+            for pattern in crawl_patterns:
+                if pattern in path_lower:
+                    return bot_type
+        return "generic"
 
 class ConfigManager:
     """Manage bot targeting configurations"""
     
-    def __init__(self, config_file: str = "bot_config.json"):
+    def __init__(self, config_file: str = "bot_config.json", ranges_file: str = "bot_ranges.json"):
         self.config_file = config_file
-        self.active_config = BotTargetingConfig(
-            keywords=["viral", "trending", "challenge", "dance", "music"],
-            bot_types=["social"],
-            content_themes=["entertainment", "lifestyle"],
-            interactive_elements=True,
-            bait_files_enabled=True
-        )
-        self.load_config()
+        self.config_mtime = None
+        self.version = 0
+        self.snapshot = None
+        self.reload_interval = 2.0
+        self.stop_event = threading.Event()
+        self.thread = None
+        
+        # Published crawler address ranges; UA strings are easy to spoof, source addresses aren't
+        self.ip_ranges = IpRangeReputation(ranges_file)
         
         # Enhanced bot signature database
         self.bot_signatures = {
@@ -1180,19 +1298,86 @@ class ConfigManager:
                 "file_preferences": ["json", "csv", "txt", "zip", "pdf"]
             }
         }
+        
+        self.active_config = BotTargetingConfig(
+            keywords=["viral", "trending", "challenge", "dance", "music"],
+            bot_types=["social"],
+            content_themes=["entertainment", "lifestyle"],
+            interactive_elements=True,
+            bait_files_enabled=True
+        )
+        self.load_config()
+    
+    @property
+    def active_config(self) -> BotTargetingConfig:
+        """Configuration of the current snapshot"""
+        return self.snapshot.config
+    
+    @active_config.setter
+    def active_config(self, config: BotTargetingConfig):
+        # Single reference assignment: readers see the old snapshot or the new one, never a mix
+        self.snapshot = self.build_snapshot(config)
+    
+    def build_snapshot(self, config: BotTargetingConfig) -> ConfigSnapshot:
+        """Precompute everything handlers derive from the config, under the next version number"""
+        self.version += 1
+        return ConfigSnapshot(
+            version=self.version,
+            config=config,
+            keywords=tuple(config.keywords),
+            bot_types=frozenset(config.bot_types),
+            keywords_summary=', '.join(config.keywords[:5]),
+            signatures=tuple(
+                (bot_type,
+                 tuple(p.lower() for p in signatures["ua_patterns"]),
+                 tuple(p.lower() for p in signatures["crawl_patterns"]))
+                for bot_type, signatures in self.bot_signatures.items()
+            ),
+            slots={bot_type: template_slots(bot_type, config)
+                   for bot_type in itertools.chain(self.bot_signatures, THEMED_BOT_TYPES, ["generic"])},
+            loaded_at=datetime.now().isoformat(timespec='seconds')
+        )
     
     def load_config(self):
         """Load configuration from file"""
         try:
             if os.path.exists(self.config_file):
+                # Recorded first so a broken file is reported once, not on every poll
+                self.config_mtime = os.stat(self.config_file).st_mtime_ns
                 with open(self.config_file, 'r') as f:
                     data = json.load(f)
                     if isinstance(data, dict):
                         self.active_config = BotTargetingConfig(**data)
-                logger.info(f"Loaded configuration from {self.config_file}")
+                logger.info(f"Loaded configuration from {self.config_file} (version {self.version})")
         except Exception as e:
             logger.error(f"Failed to load config: {e}")
     
+    def watch(self):
+        """Reload the config file whenever its mtime changes, until stopped"""
+        while not self.stop_event.wait(self.reload_interval):
+            try:
+                mtime = os.stat(self.config_file).st_mtime_ns
+            except OSError:
+                continue
+            if mtime != self.config_mtime:
+                self.load_config()
+    
+    def start_watcher(self, reload_interval: float = None):
+        """Start the background reload thread"""
+        if reload_interval is not None:
+            self.reload_interval = reload_interval
+        if self.thread is None and self.reload_interval > 0:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.watch, name="config-watcher", daemon=True)
+            self.thread.start()
+    
+    def stop_watcher(self):
+        """Stop the background reload thread"""
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join(timeout=5)
+            self.thread = None
+    
     def save_config(self):
         """Save configuration to file"""
         try:
@@ -1202,23 +1387,141 @@ class ConfigManager:
         except Exception as e:
             logger.error(f"Failed to save config: {e}")
     
-    def detect_bot_type(self, user_agent: str, path: str) -> str:
+    def detect_bot_type(self, user_agent: str, path: str, client_ip: str = None) -> str:
         """Detect specific bot type from request"""
-        ua_lower = user_agent.lower()
-        path_lower = path.lower()
+        if client_ip:
+            bot_type = self.ip_ranges.lookup(client_ip)
+            if bot_type:
+                return bot_type
         
-        for bot_type, signatures in self.bot_signatures.items():
-            # Check user agent patterns
-            for pattern in signatures["ua_patterns"]:
-                if pattern in ua_lower:
-                    return bot_type
-            
-            # Check path patterns
-            for pattern in signatures["crawl_patterns"]:
-                if pattern in path_lower:
-                    return bot_type
+        return self.snapshot.match_signature(user_agent.lower(), path.lower())
+
+# ============================================================================
+# IP RANGE REPUTATION
+# ============================================================================
+
+class CidrIndex:
+    """Longest-prefix match over IPv4/IPv6 networks: one dict per prefix length, probed longest first"""
+    
+    def __init__(self, ranges: Dict[str, List[str]]):
+        tables = {4: defaultdict(dict), 6: defaultdict(dict)}
+        self.size = 0
+        self.invalid = 0
         
-        return "generic"
+        for bot_type, cidrs in ranges.items():
+            for cidr in cidrs:
+                try:
+                    network = ipaddress.ip_network(cidr.strip(), strict=False)
+                except ValueError:
+                    self.invalid += 1
+                    continue
+                tables[network.version][network.prefixlen][int(network.network_address)] = bot_type
+                self.size += 1
+        
+        # (host bits to mask off, table) per prefix length, longest prefix first
+        self.probes = {
+            version: [(bits - length, tables[version][length]) for length in sorted(tables[version], reverse=True)]
+            for version, bits in ((4, 32), (6, 128))
+        }
+    
+    def lookup(self, ip: str) -> Optional[str]:
+        """Bot type of the most specific range containing ip, at most one dict probe per prefix length"""
+        try:
+            if ':' in ip:
+                value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+                if value >> 32 == 0xffff:
+                    # IPv4-mapped address from a dual-stack socket
+                    value, probes = value & 0xffffffff, self.probes[4]
+                else:
+                    probes = self.probes[6]
+            else:
+                value, probes = int.from_bytes(socket.inet_aton(ip), 'big'), self.probes[4]
+        except OSError:
+            return None
+        
+        for shift, table in probes:
+            bot_type = table.get(value >> shift << shift)
+            if bot_type is not None:
+                return bot_type
+        return None
+
+class IpRangeReputation:
+    """Crawler ranges from a JSON file ({bot_type: [cidr, ...]}), rebuilt off the request path when it changes"""
+    
+    def __init__(self, path: str = "bot_ranges.json", reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.index = CidrIndex({})
+        self.mtime = None
+        self.reloads = 0
+        self.errors = 0
+        self.loaded_at = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.load()
+    
+    def lookup(self, ip: str) -> Optional[str]:
+        """Bot type for a client address, or None"""
+        return self.index.lookup(ip)
+    
+    def load(self) -> bool:
+        """Rebuild the index if the file changed; requests keep using the old one until the swap"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        
+        try:
+            with open(self.path, 'r') as f:
+                ranges = json.load(f)
+            index = CidrIndex(ranges)
+        except (OSError, ValueError, AttributeError) as e:
+            self.errors += 1
+            self.mtime = mtime
+            logger.error(f"Failed to load IP ranges from {self.path}: {e}")
+            return False
+        
+        # Single reference assignment, so a request sees either the old index or the new one
+        self.index = index
+        self.mtime = mtime
+        self.reloads += 1
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+        logger.info(f"Loaded {index.size} IP ranges from {self.path} ({index.invalid} invalid)")
+        return True
+    
+    def watch(self):
+        """Poll the file's mtime until stopped"""
+        while not self.stop_event.wait(self.reload_interval):
+            self.load()
+    
+    def start_watcher(self, reload_interval: float = None):
+        """Start the background reload thread"""
+        if reload_interval is not None:
+            self.reload_interval = reload_interval
+        if self.thread is None and self.reload_interval > 0:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.watch, name="ip-range-watcher", daemon=True)
+            self.thread.start()
+    
+    def stop_watcher(self):
+        """Stop the background reload thread"""
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join(timeout=5)
+            self.thread = None
+    
+    def get_metrics(self) -> Dict:
+        """Index size and reload counters for the status API"""
+        return {
+            "file": self.path,
+            "prefixes": self.index.size,
+            "invalid": self.index.invalid,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "loaded_at": self.loaded_at
+        }
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -1240,146 +1543,2069 @@ def find_available_port(start_port: int = 8080, max_attempts: int = 100) -> Opti
             return port
     return None
 
+def parse_host_port(value: str, default_host: str = '127.0.0.1') -> Tuple[str, int]:
+    """'host:port' or ':port' -> (host, port)"""
+    host, _, port = value.rpartition(':')
+    return (host.strip('[]') or default_host, int(port))
+
+def is_loopback(host: str) -> bool:
+    """Whether host only accepts connections from this machine"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+class PrometheusText:
+    """Builds a Prometheus text exposition"""
+    
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    
+    def __init__(self):
+        self.lines = []
+    
+    def metric(self, name: str, kind: str, help_text: str, samples: List[Tuple[str, Any]]):
+        """One metric family; samples are (label string, value)"""
+        self.lines.append(f"# HELP tarpit_{name} {help_text}")
+        self.lines.append(f"# TYPE tarpit_{name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"tarpit_{name}{labels} {value}")
+    
+    @staticmethod
+    def labels(**labels) -> str:
+        """Label string with escaped values"""
+        return '{%s}' % ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                                 for name, value in labels.items())
+    
+    @classmethod
+    def labelled(cls, label: str, counts: Dict) -> List[Tuple[str, Any]]:
+        """Samples for a dict of counts keyed by one label"""
+        return [(cls.labels(**{label: key}), value) for key, value in sorted(counts.items())]
+    
+    def request_counters(self, stats: Dict):
+        """The standard visitor counters from a control_panel.stats-shaped dict"""
+        self.metric("requests_total", "counter", "Visitor requests served", [("", stats.get("total_requests", 0))])
+        self.metric("bot_requests_total", "counter", "Requests from detected bots", [("", stats.get("bot_requests", 0))])
+        self.metric("targeted_bots_total", "counter", "Requests from targeted bot types",
+                    [("", stats.get("targeted_bots", 0))])
+        self.metric("downloads_total", "counter", "Bait downloads served", [("", stats.get("downloads", 0))])
+        self.metric("behavior_promotions_total", "counter", "Generic clients promoted by the behavior classifier",
+                    [("", stats.get("behavior_promotions", 0))])
+        self.metric("bot_type_requests_total", "counter", "Requests by detected bot type",
+                    self.labelled("bot_type", stats.get("bot_types_detected", {})))
+        self.metric("downloads_by_type_total", "counter", "Bait downloads by requesting bot type",
+                    self.labelled("bot_type", stats.get("downloads_by_type", {})))
+        self.metric("route_requests_total", "counter", "Visitor requests by route",
+                    self.labelled("route", stats.get("requests_by_route", {})))
+    
+    def cost_counters(self, stats: Dict):
+        """Handler CPU, bytes sent and connection hold time per route and bot type, with the efficiency ratios"""
+        costs = trap_costs(stats)
+        for dimension in COST_DIMENSIONS:
+            rows = costs[f"by_{dimension}"]
+            self.metric(f"{dimension}_cpu_seconds_total", "counter", f"Handler thread CPU time by {dimension}",
+                        self.labelled(dimension, {label: round(row["cpu_ms"] / 1000, 6) for label, row in rows.items()}))
+            self.metric(f"{dimension}_sent_bytes_total", "counter", f"Response bytes sent by {dimension}",
+                        self.labelled(dimension, {label: row["bytes"] for label, row in rows.items()}))
+            self.metric(f"{dimension}_held_seconds_total", "counter", f"Wall time connections spent in requests by {dimension}",
+                        self.labelled(dimension, {label: row["held_s"] for label, row in rows.items()}))
+            self.metric(f"{dimension}_cpu_us_per_byte", "gauge", f"CPU microseconds per response byte by {dimension}",
+                        self.labelled(dimension, {label: row["cpu_us_per_byte"] for label, row in rows.items()
+                                                  if row["cpu_us_per_byte"] is not None}))
+            self.metric(f"{dimension}_cpu_us_per_held_second", "gauge",
+                        f"CPU microseconds per second a connection was held, by {dimension}",
+                        self.labelled(dimension, {label: row["cpu_us_per_held_s"] for label, row in rows.items()
+                                                  if row["cpu_us_per_held_s"] is not None}))
+    
+    def render(self) -> bytes:
+        """The exposition body"""
+        return ("\n".join(self.lines) + "\n").encode('utf-8')
+
+# Request cost is accounted along both of these (control_panel.stats keys cpu_ns_by_route, bytes_by_bot_type, ...)
+COST_DIMENSIONS = ("route", "bot_type")
+
+def trap_costs(stats: Dict) -> Dict:
+    """Per route and per bot type: handler CPU, bytes sent, time held, CPU-us per byte and per held second"""
+    costs = {}
+    for dimension in COST_DIMENSIONS:
+        sent = stats.get(f"bytes_by_{dimension}", {})
+        held = stats.get(f"held_ns_by_{dimension}", {})
+        rows = {}
+        for label, cpu_ns in sorted(stats.get(f"cpu_ns_by_{dimension}", {}).items()):
+            if not cpu_ns:
+                continue
+            cpu_us = cpu_ns / 1000
+            held_s = held.get(label, 0) / 1e9
+            rows[label] = {
+                "cpu_ms": round(cpu_us / 1000, 3),
+                "bytes": sent.get(label, 0),
+                "held_s": round(held_s, 3),
+                "cpu_us_per_byte": round(cpu_us / sent[label], 4) if sent.get(label) else None,
+                "cpu_us_per_held_s": round(cpu_us / held_s, 1) if held_s else None
+            }
+        costs[f"by_{dimension}"] = rows
+    return costs
+
 # ============================================================================
-# ENHANCED REQUEST HANDLER WITH INTERACTIVE ELEMENTS - FIXED VERSION
+# RESPONSE COMPRESSION
 # ============================================================================
 
-class InteractiveTarPitHandler(BaseHTTPRequestHandler):
-    """Enhanced HTTP handler with interactive elements and bait files - FIXED"""
+class EncodedBody:
+    """A response body together with its precompressed variants"""
     
-    def __init__(self, *args, 
-                 content_gen=None, 
-                 config_manager=None, 
-                 control_panel=None,
-                 bait_manager=None,
-                 interactive_gen=None,
-                 ngrok_manager=None,
-                 **kwargs):
-        self.content_gen = content_gen
-        self.config_manager = config_manager
-        self.control_panel = control_panel
-        self.bait_manager = bait_manager
-        self.interactive_gen = interactive_gen
-        self.ngrok_manager = ngrok_manager
-        super().__init__(*args, **kwargs)
+    __slots__ = ('raw', 'variants', 'compress_ns', 'etag')
     
-    def log_message(self, format, *args):
-        """Override to suppress default logging"""
-        pass
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self.variants = {}
+        self.compress_ns = {}
+        self.etag = f'"{hashlib.sha1(raw).hexdigest()[:20]}"'
     
-    def do_GET(self):
-        """Handle GET requests"""
-        start_time = time.time()
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one representation; each content-coding gets its own"""
+        if encoding and encoding in self.variants:
+            return f'{self.etag[:-1]}-{encoding}"'
+        return self.etag
+
+class CompressionManager:
+    """Negotiate Content-Encoding and keep precompressed variants of cached bodies"""
+    
+    # Encodings we can produce, in server preference order
+    ENCODINGS = ("gzip", "deflate")
+    
+    # Bodies smaller than this are not worth the framing overhead
+    MIN_SIZE = 256
+    
+    # Uploaded files above this size are streamed from disk uncached
+    MAX_CACHED_FILE = 8 * 1024 * 1024
+    
+    # Already-compressed formats
+    INCOMPRESSIBLE_TYPES = ("application/zip", "image/png", "image/jpeg", "image/gif", "application/octet-stream")
+    
+    def __init__(self, enabled: bool = True, dynamic_level: int = 1, static_level: int = 9):
+        self.enabled = enabled
+        self.dynamic_level = dynamic_level
+        self.static_level = static_level
+        self.file_cache = {}
+        self.lock = threading.Lock()
+        self.stats = {
+            "raw_bytes": 0,
+            "sent_bytes": 0,
+            "compressed_responses": 0,
+            "cache_hits": 0,
+            "compress_cpu_ns": 0,
+            "cpu_saved_ns": 0
+        }
+    
+    def compress(self, raw: bytes, encoding: str, level: int) -> bytes:
+        """Compress with a stdlib codec; mtime is pinned so output is stable"""
+        if encoding == "gzip":
+            return gzip.compress(raw, compresslevel=level, mtime=0)
+        return zlib.compress(raw, level)
+    
+    def is_compressible(self, content_type: str, size: int) -> bool:
+        """Check whether a body of this type and size should be compressed"""
+        return self.enabled and size >= self.MIN_SIZE and not content_type.startswith(self.INCOMPRESSIBLE_TYPES)
+    
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Pick the best encoding the client accepts (honours q=0)"""
+        if not self.enabled or not accept_encoding:
+            return None
         
-        # Update statistics
-        if self.control_panel:
-            self.control_panel.stats["total_requests"] += 1
+        accepted = {}
+        for item in accept_encoding.lower().split(','):
+            name, _, params = item.strip().partition(';')
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name.strip()] = quality
+        
+        wildcard = accepted.get('*', 0.0)
+        for encoding in self.ENCODINGS:
+            if accepted.get(encoding, wildcard) > 0:
+                return encoding
+        return None
+    
+    def encode_static(self, raw: bytes, content_type: str = 'text/html') -> EncodedBody:
+        """Precompress a body once; the variants are reused for every later request"""
+        body = EncodedBody(raw)
+        if not self.is_compressible(content_type, len(raw)):
+            return body
+        
+        for encoding in self.ENCODINGS:
+            start = time.thread_time_ns()
+            compressed = self.compress(raw, encoding, self.static_level)
+            elapsed = time.thread_time_ns() - start
+            
+            # Keep the variant only if it actually saves bytes
+            if len(compressed) < len(raw):
+                body.variants[encoding] = compressed
+                body.compress_ns[encoding] = elapsed
+            
+            with self.lock:
+                self.stats["compress_cpu_ns"] += elapsed
         
-        # Detect bot type
-        user_agent = self.headers.get('User-Agent', '')
-        bot_type = self.config_manager.detect_bot_type(user_agent, self.path)
+        return body
+    
+    def load_file(self, path: str, content_type: str) -> Optional[EncodedBody]:
+        """Read a bait file once and keep it with its precompressed variants"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
         
-        # Check if it's a bot (anything not "generic" is a bot)
-        is_bot = bot_type != "generic"
+        if stat.st_size > self.MAX_CACHED_FILE:
+            return None
         
-        if is_bot and self.control_panel:
-            self.control_panel.stats["bot_requests"] += 1
-            self.control_panel.stats["bot_types_detected"][bot_type] += 1
-            self.control_panel.stats["last_request"] = f"{bot_type} at {datetime.now().strftime('%H:%M:%S')}"
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] {bot_type.upper()} detected - {self.path}")
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        body = self.file_cache.get(key)
+        if body is None:
+            with open(path, 'rb') as f:
+                body = self.encode_static(f.read(), content_type)
+            with self.lock:
+                # Drop stale entries for the same path
+                for stale in [k for k in self.file_cache if k[0] == path]:
+                    del self.file_cache[stale]
+                self.file_cache[key] = body
+        return body
+    
+    def select(self, body: Union[bytes, EncodedBody], content_type: str, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Return the bytes to send and the Content-Encoding used (None for identity)"""
+        if isinstance(body, EncodedBody):
+            raw = body.raw
+            payload = body.variants.get(encoding) if encoding else None
+            if payload is not None:
+                with self.lock:
+                    self.stats["cache_hits"] += 1
+                    self.stats["cpu_saved_ns"] += body.compress_ns[encoding]
+        else:
+            raw = body
+            payload = None
+            if encoding and self.is_compressible(content_type, len(raw)):
+                start = time.thread_time_ns()
+                payload = self.compress(raw, encoding, self.dynamic_level)
+                elapsed = time.thread_time_ns() - start
+                with self.lock:
+                    self.stats["compress_cpu_ns"] += elapsed
+                if len(payload) >= len(raw):
+                    payload = None
+        
+        sent = payload if payload is not None else raw
+        with self.lock:
+            self.stats["raw_bytes"] += len(raw)
+            self.stats["sent_bytes"] += len(sent)
+            if payload is not None:
+                self.stats["compressed_responses"] += 1
+        
+        return sent, (encoding if payload is not None else None)
+    
+    def get_metrics(self) -> Dict:
+        """Compression ratio and CPU figures for the status API"""
+        with self.lock:
+            stats = dict(self.stats)
         
-        # Handle special paths
-        if self.path.startswith('/download/'):
-            self.handle_download(bot_type, is_bot)
-            return
-        elif self.path.startswith('/api/'):
-            self.handle_api(bot_type, is_bot)
-            return
-        elif self.path.startswith('/upload/'):
-            self.handle_upload_page()
-            return
-        elif self.path.startswith('/bait/'):
-            self.handle_bait_files()
-            return
-        elif self.path == '/status':
-            self.handle_status_page()
-            return
-        elif self.path == '/ngrok':
-            self.handle_ngrok_info()
-            return
-        elif self.path == '/test':
-            self.handle_test_page()
-            return
-        elif self.path.startswith('/trap/'):
-            self.handle_trap_page(bot_type, is_bot)
-            return
-        elif self.path.startswith('/data/'):
-            self.handle_data_page(bot_type, is_bot)
-            return
+        raw_bytes = stats["raw_bytes"]
+        return {
+            "enabled": self.enabled,
+            "raw_bytes": raw_bytes,
+            "sent_bytes": stats["sent_bytes"],
+            "compression_ratio": round(stats["sent_bytes"] / raw_bytes, 4) if raw_bytes else 1.0,
+            "bytes_saved": raw_bytes - stats["sent_bytes"],
+            "compressed_responses": stats["compressed_responses"],
+            "precompressed_hits": stats["cache_hits"],
+            "compress_cpu_ms": round(stats["compress_cpu_ns"] / 1e6, 3),
+            "cpu_saved_ms": round(stats["cpu_saved_ns"] / 1e6, 3),
+            "cached_files": len(self.file_cache)
+        }
+
+# ============================================================================
+# ASYNC LOGGING
+# ============================================================================
+
+_clock_cache = [0, ""]
+
+def clock_hms() -> str:
+    """Current wall-clock time as HH:MM:SS, formatted at most once per second"""
+    now = int(time.time())
+    if now != _clock_cache[0]:
+        _clock_cache[1] = time.strftime('%H:%M:%S', time.localtime(now))
+        _clock_cache[0] = now
+    return _clock_cache[1]
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the request thread: samples under pressure, drops when full"""
+    
+    def __init__(self, log_queue: queue.Queue, sample_threshold: float = 0.75):
+        super().__init__(log_queue)
+        self.sample_threshold = sample_threshold
+        self.dropped = 0
+        self.sampled_out = 0
+    
+    def enqueue(self, record: logging.LogRecord):
+        """Queue a record without waiting"""
+        maxsize = self.queue.maxsize
+        if maxsize and record.levelno < logging.WARNING:
+            # Past the threshold keep INFO records with probability falling to zero as the queue fills
+            fill = self.queue.qsize() / maxsize
+            if fill >= self.sample_threshold and random.random() < fill:
+                self.sampled_out += 1
+                return
         
-        # ROOT PATH - Show different content based on visitor type
-        if self.path == '/' or self.path == '':
-            if is_bot:
-                # Bots get enticing trap content
-                self.handle_bot_landing_page(bot_type)
-            else:
-                # Humans get simple research portal
-                self.handle_human_landing_page()
-            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket limiting how many feed lines reach the console per second"""
+    
+    def __init__(self, rate: float = 20.0, burst: int = 50):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.suppressed = 0
+        self.suppressed_total = 0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Runs on the listener thread only, so no locking is needed"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        
+        if self.tokens < 1:
+            self.suppressed += 1
+            return False
         
-        # All other non-special paths - show 404
-        self.send_response(404)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(f"""
-        <!DOCTYPE html>
-        <html>
-        <head><title>404 - Page Not Found</title></head>
-        <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-            <h1>404 - Page Not Found</h1>
-            <p>The requested path <code>{self.path}</code> does not exist.</p>
-            <p><a href="/">Return to Home</a></p>
-        </body>
-        </html>
-        """.encode('utf-8'))
+        self.tokens -= 1
+        if self.suppressed:
+            record.msg = f"{record.getMessage()} (+{self.suppressed} lines suppressed)"
+            record.args = None
+            self.suppressed_total += self.suppressed
+            self.suppressed = 0
+        return True
+
+class FeedRoutingListener(logging.handlers.QueueListener):
+    """QueueListener handing live-feed records to the feed handler and everything else to the regular handlers"""
     
-    def handle_bot_landing_page(self, bot_type: str):
-        """Handle landing page for bots - rich, enticing content"""
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Serving BOT landing page to {bot_type}")
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler],
+                 feed_handler: Optional[logging.Handler] = None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.feed_handler = feed_handler
+    
+    def handle(self, record: logging.LogRecord):
+        # Feed records only go to the live feed, not to tarpit.log
+        if record.name != feed_logger.name:
+            super().handle(record)
+        elif self.feed_handler:
+            self.feed_handler.handle(self.prepare(record))
+
+class AsyncLogPipeline:
+    """Route all logging through a bounded queue drained by one background QueueListener"""
+    
+    def __init__(self, queue_size: int = 10000, console_feed: bool = True, feed_rate: float = 20.0):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self.console_feed = console_feed
+        self.feed_filter = RateLimitFilter(rate=feed_rate)
+        self.listener = None
+        self.previous_handlers = []
+    
+    def start(self):
+        """Move the configured root handlers behind the queue and start the listener"""
+        root = logging.getLogger()
+        self.previous_handlers = root.handlers[:]
+        
+        feed_handler = None
+        if self.console_feed:
+            feed_handler = logging.StreamHandler(sys.stdout)
+            feed_handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s', datefmt='%H:%M:%S'))
+            feed_handler.addFilter(self.feed_filter)
+            feed_logger.addHandler(self.queue_handler)
+        else:
+            # With the feed off, feed_logger calls return before a record is even built
+            feed_logger.disabled = True
         
-        # Generate rich content for this bot type
-        content = self.content_gen.generate_targeted_content(bot_type)
+        for handler in self.previous_handlers:
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
         
-        # Check if this is a targeted bot type
-        is_targeted = bot_type in self.config_manager.active_config.bot_types
+        self.listener = FeedRoutingListener(self.queue, self.previous_handlers, feed_handler)
+        self.listener.start()
+    
+    def stop(self):
+        """Flush queued records and restore direct logging"""
+        if not self.listener:
+            return
         
-        if is_targeted and self.control_panel:
-            self.control_panel.stats["targeted_bots"] += 1
+        self.listener.stop()
+        self.listener = None
         
-        # Generate HTML with traps
-        html = self.wrap_bot_content_with_traps(content, bot_type, is_targeted)
+        root = logging.getLogger()
+        root.removeHandler(self.queue_handler)
+        feed_logger.removeHandler(self.queue_handler)
+        feed_logger.disabled = False
+        for handler in self.previous_handlers:
+            root.addHandler(handler)
+    
+    def get_metrics(self) -> Dict:
+        """Queue depth and loss counters for the status API"""
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "dropped": self.queue_handler.dropped,
+            "sampled_out": self.queue_handler.sampled_out,
+            "feed_suppressed": self.feed_filter.suppressed_total + self.feed_filter.suppressed
+        }
+
+# ============================================================================
+# STRUCTURED REQUEST LOG (JSONL)
+# ============================================================================
+
+class CountingWriter(io.BufferedIOBase):
+    """wfile wrapper counting the bytes written to the client (and applying the write timeout)"""
+    
+    def __init__(self, raw, deadlines=None):
+        self.raw = raw
+        self.deadlines = deadlines
+        self.bytes_written = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        if self.deadlines:
+            self.deadlines.sending()
+            try:
+                self.raw.write(data)
+            except socket.timeout:
+                raise self.deadlines.expired("send") from None
+        else:
+            self.raw.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+    
+    def flush(self):
+        self.raw.flush()
+    
+    def close(self):
+        super().close()
+        self.raw.close()
+
+class RequestLogWriter:
+    """Background JSONL request log: batched buffered writes, size/age rotation, optional gzip"""
+    
+    FIELDS = ("ts", "ip", "ua", "method", "path", "bot_type", "status", "bytes", "duration_ms")
+    
+    def __init__(self, path: str = "logs/requests.jsonl", max_bytes: int = 64 * 1024 * 1024,
+                 max_age: float = 3600.0, compress_closed: bool = False, queue_size: int = 50000,
+                 batch_size: int = 2000, flush_interval: float = 1.0, sample_threshold: float = 0.5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress_closed = compress_closed
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_threshold = sample_threshold
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.file = None
+        self.file_bytes = 0
+        self.opened_at = 0.0
+        self.thread = None
+        self.sample_counter = 0
+        self.stats = {"written": 0, "dropped": 0, "sampled_out": 0, "bytes": 0, "segments": 0}
+    
+    def submit(self, record: tuple):
+        """Queue one record tuple (FIELDS order) from the request thread; never blocks or serializes"""
+        maxsize = self.queue.maxsize
+        weight = 1
+        
+        # Past the threshold keep every Nth record, N growing with queue fill, and store N as the weight
+        fill = self.queue.qsize() / maxsize
+        if fill >= self.sample_threshold:
+            keep_every = 1 + int((fill - self.sample_threshold) * 20)
+            self.sample_counter += 1
+            if self.sample_counter % keep_every:
+                self.stats["sampled_out"] += 1
+                return
+            weight = keep_every
         
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        try:
+            self.queue.put_nowait((record, weight))
+        except queue.Full:
+            self.stats["dropped"] += 1
     
-    def wrap_bot_content_with_traps(self, content: Dict, bot_type: str, is_targeted: bool) -> str:
-        """Wrap bot content with traps - SIMPLIFIED VERSION"""
+    def start(self):
+        """Open the current segment and start the writer thread"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.open_segment()
+        self.thread = threading.Thread(target=self.run, name="request-log-writer", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Drain the queue and close the current segment"""
+        if self.thread:
+            try:
+                self.queue.put((None, 0), timeout=5)
+            except queue.Full:
+                # The writer isn't draining (or has died); don't hang shutdown on it
+                logger.error("Request log writer is not draining; closing without a final flush")
+            self.thread.join(timeout=10)
+            self.thread = None
+    
+    def open_segment(self):
+        """Open (append to) the live log file"""
+        # Binary, so file_bytes counts bytes on disk rather than characters
+        self.file = open(self.path, "ab", buffering=1024 * 1024)
+        self.file_bytes = self.file.tell()
+        self.opened_at = time.time()
+    
+    def rotate(self):
+        """Close the live segment under a timestamped name and start a fresh one"""
+        self.file.close()
+        try:
+            base, ext = os.path.splitext(self.path)
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            closed = f"{base}.{stamp}{ext}"
+            # Size-based rotation can close several segments in one second; never replace an earlier one
+            sequence = 0
+            while os.path.exists(closed) or os.path.exists(closed + ".gz"):
+                sequence += 1
+                closed = f"{base}.{stamp}-{sequence}{ext}"
+            os.replace(self.path, closed)
+        finally:
+            # A failed rename keeps appending to the live file rather than leaving the writer without one
+            self.open_segment()
+        self.stats["segments"] += 1
+        
+        if self.compress_closed:
+            threading.Thread(target=self.compress_segment, args=(closed,), daemon=True).start()
+    
+    def compress_segment(self, closed_path: str):
+        """Gzip a closed segment and remove the original"""
+        try:
+            with open(closed_path, "rb") as src, gzip.open(closed_path + ".gz", "wb") as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            os.remove(closed_path)
+        except OSError as e:
+            logger.error(f"Failed to compress request log segment {closed_path}: {e}")
+    
+    def run(self):
+        """Writer thread: serialize batches and write them in one call"""
+        last_flush = time.monotonic()
+        running = True
         
-        # Create a rich, enticing page for bots
-        keywords = content['keywords']
+        while running:
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            lines = []
+            for record, weight in batch:
+                if record is None:
+                    running = False
+                    continue
+                entry = dict(zip(self.FIELDS, record))
+                if weight > 1:
+                    entry["sample_weight"] = weight
+                lines.append(json.dumps(entry, separators=(',', ':')))
+            
+            try:
+                if lines:
+                    chunk = ("\n".join(lines) + "\n").encode('utf-8')
+                    self.file.write(chunk)
+                    self.file_bytes += len(chunk)
+                    self.stats["written"] += len(lines)
+                    self.stats["bytes"] += len(chunk)
+                
+                now = time.monotonic()
+                if not running or now - last_flush >= self.flush_interval:
+                    self.file.flush()
+                    last_flush = now
+                
+                if running and (self.file_bytes >= self.max_bytes or
+                                (self.file_bytes and time.time() - self.opened_at >= self.max_age)):
+                    self.rotate()
+            except OSError as e:
+                logger.error(f"Request log write failed: {e}")
         
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>{content['title']}</title>
-            <meta name="description" content="Exclusive {', '.join(keywords[:3])} content available for download">
-            <meta name="keywords" content="{', '.join(keywords)}">
-            <meta name="robots" content="index, follow">
-            <style>
-                body {{ font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; }}
+        self.file.close()
+    
+    def get_metrics(self) -> Dict:
+        """Writer counters for the status API"""
+        metrics = dict(self.stats)
+        metrics["queued"] = self.queue.qsize()
+        metrics["path"] = self.path
+        return metrics
+
+# ============================================================================
+# CLIENT TRACKING
+# ============================================================================
+
+class ClientRecord:
+    """Per-client counters, kept compact for large tables"""
+    
+    __slots__ = ('ip', 'ua_hash', 'bot_type', 'requests', 'bytes', 'first_seen', 'last_seen', 'max_depth',
+                 'last_arrival', 'pages', 'gap_mean', 'gap_var', 'hidden_hits', 'beacons', 'score')
+    
+    def __init__(self, ip: str, ua_hash: int, now: float):
+        self.ip = ip
+        self.ua_hash = ua_hash
+        self.bot_type = None
+        self.requests = 0
+        self.bytes = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.max_depth = 0
+        
+        # Behavioral features (see BehaviorClassifier)
+        self.last_arrival = now
+        self.pages = 0
+        self.gap_mean = 0.0
+        self.gap_var = 0.0
+        self.hidden_hits = 0
+        self.beacons = 0
+        self.score = 0.0
+    
+    def to_dict(self) -> Dict:
+        """JSON-friendly view for the status API"""
+        return {
+            "ip": self.ip,
+            "ua_hash": f"{self.ua_hash:08x}",
+            "bot_type": self.bot_type,
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "first_seen": datetime.fromtimestamp(self.first_seen).isoformat(timespec='seconds'),
+            "last_seen": datetime.fromtimestamp(self.last_seen).isoformat(timespec='seconds'),
+            "max_depth": self.max_depth,
+            "score": round(self.score, 2)
+        }
+    
+    def to_state(self) -> List:
+        """Every field in __slots__ order, for stats snapshots"""
+        return [getattr(self, name) for name in self.__slots__]
+    
+    @classmethod
+    def from_state(cls, state: List) -> 'ClientRecord':
+        """Rebuild a record saved by to_state"""
+        client = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, state):
+            setattr(client, name, value)
+        return client
+
+class ClientTracker:
+    """LRU table of ClientRecords keyed by IP (optionally IP + UA hash) with a hard entry cap"""
+    
+    def __init__(self, max_entries: int = 50000, key_by_ua: bool = False):
+        self.max_entries = max_entries
+        self.key_by_ua = key_by_ua
+        self.clients = OrderedDict()
+        self.lock = threading.Lock()
+        self.evicted = 0
+    
+    def touch(self, ip: str, user_agent: str) -> ClientRecord:
+        """Get or create a client's record and mark it most recently seen; O(1)"""
+        ua_hash = zlib.crc32(user_agent.encode('utf-8', 'replace'))
+        key = (ip, ua_hash) if self.key_by_ua else ip
+        
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None:
+                client = ClientRecord(ip, ua_hash, time.time())
+                self.clients[key] = client
+                if len(self.clients) > self.max_entries:
+                    self.clients.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self.clients.move_to_end(key)
+        
+        return client
+    
+    def record(self, ip: str, user_agent: str, bot_type: Optional[str], sent_bytes: int, depth: int) -> ClientRecord:
+        """Account one request to its client, evicting the least recently seen client when full"""
+        client = self.touch(ip, user_agent)
+        now = time.time()
+        
+        with self.lock:
+            client.requests += 1
+            client.bytes += sent_bytes
+            client.last_seen = now
+            if bot_type:
+                client.bot_type = bot_type
+            if depth > client.max_depth:
+                client.max_depth = depth
+        
+        return client
+    
+    def observe(self, ip: str, user_agent: str, path: str, classifier: 'BehaviorClassifier') -> float:
+        """Fold one page request into the client's behavioral features and return its score"""
+        client = self.touch(ip, user_agent)
+        # Same lock as record(): parallel connections from one client share the record
+        with self.lock:
+            return classifier.observe(client, path)
+    
+    def observe_beacon(self, ip: str, user_agent: str, classifier: 'BehaviorClassifier'):
+        """Credit a JS beacon to the client"""
+        client = self.touch(ip, user_agent)
+        with self.lock:
+            classifier.observe_beacon(client)
+    
+    def get(self, ip: str, user_agent: str = '') -> Optional[ClientRecord]:
+        """Look up a client without touching its LRU position"""
+        key = (ip, zlib.crc32(user_agent.encode('utf-8', 'replace'))) if self.key_by_ua else ip
+        return self.clients.get(key)
+    
+    def top(self, n: int = 10) -> List[ClientRecord]:
+        """Most active clients by request count (scans the table; admin use only)"""
+        with self.lock:
+            records = list(self.clients.values())
+        return heapq.nlargest(n, records, key=lambda c: c.requests)
+    
+    def export(self, limit: int) -> List[List]:
+        """The limit most recently seen clients as snapshot state, oldest first"""
+        with self.lock:
+            clients = list(itertools.islice(reversed(self.clients.values()), limit))
+        return [client.to_state() for client in reversed(clients)]
+    
+    def restore(self, states: List[List]):
+        """Load clients saved by export, keeping their recency order"""
+        now = time.time()
+        with self.lock:
+            for state in states:
+                client = ClientRecord.from_state(state)
+                # The downtime is not an inter-arrival gap; the next request measures from the restore
+                client.last_arrival = now
+                key = (client.ip, client.ua_hash) if self.key_by_ua else client.ip
+                self.clients[key] = client
+                self.clients.move_to_end(key)
+            while len(self.clients) > self.max_entries:
+                self.clients.popitem(last=False)
+    
+    def get_metrics(self, top_n: int = 10) -> Dict:
+        """Table size, evictions and the busiest clients for the status API"""
+        return {
+            "tracked": len(self.clients),
+            "capacity": self.max_entries,
+            "evicted": self.evicted,
+            "top": [client.to_dict() for client in self.top(top_n)]
+        }
+
+# ============================================================================
+# BEHAVIORAL CLASSIFICATION
+# ============================================================================
+
+# Hidden links emitted by generate_bot_traps and the landing pages; no rendered page shows them
+HIDDEN_LINK_PATTERN = re.compile(r'^/(?:[\w-]+/content/[0-9a-f]{32}|hidden/)')
+
+# Endpoints the pages' JavaScript reports to; clients that never call them don't run JS
+BEACON_PATHS = frozenset(['/analytics/track', '/api/track', '/api/analytics/track'])
+
+class BehaviorClassifier:
+    """Second-stage bot scoring from per-client request features, for clients the UA check calls generic"""
+    
+    # Feature weights; the score is their weighted sum in [0, 1]
+    WEIGHTS = {"rate": 0.25, "regularity": 0.15, "hidden_links": 0.35, "no_beacon": 0.15, "depth": 0.10}
+    
+    def __init__(self, trap_type: str = "stealth", alpha: float = 0.2, fast_rate: float = 1.0, deep_path: int = 6):
+        self.trap_type = trap_type
+        self.alpha = alpha
+        self.fast_rate = fast_rate
+        self.deep_path = deep_path
+    
+    def observe(self, client: ClientRecord, path: str) -> float:
+        """Fold one page request into the client's features and return its updated score; O(1), under the tracker lock"""
+        now = time.time()
+        
+        # Exponentially weighted mean/variance of inter-arrival gaps (a decaying window)
+        if client.pages:
+            gap = now - client.last_arrival
+            delta = gap - client.gap_mean
+            client.gap_mean += self.alpha * delta
+            client.gap_var = (1 - self.alpha) * (client.gap_var + self.alpha * delta * delta)
+        client.last_arrival = now
+        client.pages += 1
+        
+        if HIDDEN_LINK_PATTERN.match(path):
+            client.hidden_hits += 1
+        
+        client.score = self.score(client)
+        return client.score
+    
+    def observe_beacon(self, client: ClientRecord):
+        """A JS beacon arrived, so the client executes scripts (under the tracker lock)"""
+        client.beacons += 1
+        client.score = self.score(client)
+    
+    def features(self, client: ClientRecord) -> Dict[str, float]:
+        """Per-feature values in [0, 1]"""
+        rate = 1.0 / client.gap_mean if client.gap_mean > 0 else 0.0
+        cv = math.sqrt(client.gap_var) / client.gap_mean if client.gap_mean > 0 else 1.0
+        return {
+            "rate": min(1.0, rate / self.fast_rate) if client.pages >= 3 else 0.0,
+            "regularity": max(0.0, 1.0 - cv) if client.pages >= 5 else 0.0,
+            "hidden_links": 1.0 if client.hidden_hits else 0.0,
+            "no_beacon": 1.0 if client.pages >= 3 and not client.beacons else 0.0,
+            "depth": min(1.0, client.max_depth / self.deep_path)
+        }
+    
+    def score(self, client: ClientRecord) -> float:
+        """Weighted bot score in [0, 1]"""
+        features = self.features(client)
+        return sum(self.WEIGHTS[name] * value for name, value in features.items())
+
+# ============================================================================
+# TRAFFIC SKETCHES
+# ============================================================================
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter summary: top-k counts with bounded error in fixed memory"""
+    
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # Stream-summary buckets: count -> items holding that count, so the minimum is found in O(1)
+        self.buckets = defaultdict(set)
+        self.min_count = 0
+    
+    def add(self, item: str):
+        """Count one occurrence of item in O(1)"""
+        count = self.counts.get(item)
+        if count is not None:
+            bucket = self.buckets[count]
+            bucket.discard(item)
+            if not bucket:
+                del self.buckets[count]
+                if count == self.min_count:
+                    self.min_count = count + 1
+        elif len(self.counts) < self.capacity:
+            count = 0
+            self.errors[item] = 0
+            self.min_count = 1
+        else:
+            # Replace an item holding the minimum; the newcomer inherits its count as error
+            bucket = self.buckets[self.min_count]
+            victim = bucket.pop()
+            count = self.counts.pop(victim)
+            del self.errors[victim]
+            self.errors[item] = count
+            if not bucket:
+                del self.buckets[count]
+                self.min_count = count + 1
+        
+        self.counts[item] = count + 1
+        self.buckets[count + 1].add(item)
+    
+    def top(self, n: int = 10) -> List[Tuple[str, int, int]]:
+        """The n heaviest items as (item, count, max overestimate)"""
+        items = heapq.nlargest(n, self.counts.items(), key=lambda kv: kv[1])
+        return [(item, count, self.errors[item]) for item, count in items]
+    
+    def to_dict(self) -> Dict:
+        """Serializable state for merging across processes"""
+        return {"capacity": self.capacity, "counts": dict(self.counts), "errors": dict(self.errors)}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpaceSaving':
+        """Rebuild a summary from to_dict output"""
+        summary = cls(data["capacity"])
+        for item, count in data["counts"].items():
+            summary.counts[item] = count
+            summary.errors[item] = data["errors"].get(item, 0)
+            summary.buckets[count].add(item)
+        summary.min_count = min(summary.counts.values()) if summary.counts else 0
+        return summary
+    
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Combine two summaries; items missing from a full summary are credited its minimum count"""
+        floor_a = self.min_count if len(self.counts) >= self.capacity else 0
+        floor_b = other.min_count if len(other.counts) >= other.capacity else 0
+        
+        combined = {}
+        for item in set(self.counts) | set(other.counts):
+            count = self.counts.get(item, floor_a) + other.counts.get(item, floor_b)
+            error = (self.errors.get(item, floor_a) + other.errors.get(item, floor_b))
+            combined[item] = (count, error)
+        
+        capacity = max(self.capacity, other.capacity)
+        kept = heapq.nlargest(capacity, combined.items(), key=lambda kv: kv[1][0])
+        return SpaceSaving.from_dict({
+            "capacity": capacity,
+            "counts": {item: ce[0] for item, ce in kept},
+            "errors": {item: ce[1] for item, ce in kept}
+        })
+
+class HyperLogLog:
+    """HyperLogLog distinct counter (2^precision one-byte registers, ~1.6% error at precision 12)"""
+    
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+    
+    def add(self, item: str):
+        """Fold one item into the registers in O(1)"""
+        # blake2b rather than hash() so registers agree across processes
+        h = int.from_bytes(hashlib.blake2b(item.encode('utf-8', 'replace'), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def count(self) -> int:
+        """Estimated number of distinct items"""
+        estimate = self.alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        if estimate <= 2.5 * self.m:
+            zeros = self.registers.count(0)
+            if zeros:
+                estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+    
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Union of two counters of the same precision"""
+        merged = HyperLogLog(self.precision)
+        merged.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return merged
+    
+    def to_dict(self) -> Dict:
+        """Serializable state for merging across processes"""
+        return {"precision": self.precision, "registers": self.registers.hex()}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HyperLogLog':
+        """Rebuild a counter from to_dict output"""
+        counter = cls(data["precision"])
+        counter.registers = bytearray.fromhex(data["registers"])
+        return counter
+
+class TrafficSketches:
+    """Fixed-footprint traffic summaries: top IPs, paths and user agents, and unique IPs per bot type"""
+    
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.top_ips = SpaceSaving(capacity)
+        self.top_paths = SpaceSaving(capacity)
+        self.top_user_agents = SpaceSaving(capacity)
+        self.unique_ips = defaultdict(HyperLogLog)
+        self.lock = threading.Lock()
+    
+    def update(self, ip: str, path: str, user_agent: str, bot_type: Optional[str]):
+        """Feed one request"""
+        with self.lock:
+            self.top_ips.add(ip)
+            self.top_paths.add(path)
+            self.top_user_agents.add(user_agent or '-')
+            self.unique_ips[bot_type or 'unknown'].add(ip)
+    
+    def to_dict(self) -> Dict:
+        """Serializable state for merging across processes"""
+        with self.lock:
+            return {
+                "top_ips": self.top_ips.to_dict(),
+                "top_paths": self.top_paths.to_dict(),
+                "top_user_agents": self.top_user_agents.to_dict(),
+                "unique_ips": {bot_type: hll.to_dict() for bot_type, hll in self.unique_ips.items()}
+            }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TrafficSketches':
+        """Rebuild sketches from to_dict output"""
+        sketches = cls(data["top_ips"]["capacity"])
+        sketches.load(data)
+        return sketches
+    
+    def load(self, data: Dict):
+        """Replace this object's state with to_dict output, in place so handlers holding it see the change"""
+        unique_ips = defaultdict(HyperLogLog)
+        for bot_type, hll in data["unique_ips"].items():
+            unique_ips[bot_type] = HyperLogLog.from_dict(hll)
+        with self.lock:
+            self.capacity = data["top_ips"]["capacity"]
+            self.top_ips = SpaceSaving.from_dict(data["top_ips"])
+            self.top_paths = SpaceSaving.from_dict(data["top_paths"])
+            self.top_user_agents = SpaceSaving.from_dict(data["top_user_agents"])
+            self.unique_ips = unique_ips
+    
+    def merge(self, other: 'TrafficSketches') -> 'TrafficSketches':
+        """Combine sketches from two processes"""
+        merged = TrafficSketches(max(self.capacity, other.capacity))
+        merged.top_ips = self.top_ips.merge(other.top_ips)
+        merged.top_paths = self.top_paths.merge(other.top_paths)
+        merged.top_user_agents = self.top_user_agents.merge(other.top_user_agents)
+        for bot_type in set(self.unique_ips) | set(other.unique_ips):
+            if bot_type in self.unique_ips and bot_type in other.unique_ips:
+                merged.unique_ips[bot_type] = self.unique_ips[bot_type].merge(other.unique_ips[bot_type])
+            else:
+                merged.unique_ips[bot_type] = self.unique_ips.get(bot_type) or other.unique_ips[bot_type]
+        return merged
+    
+    def get_metrics(self, top_n: int = 10) -> Dict:
+        """Heavy hitters and unique-visitor estimates for the status API"""
+        def rows(summary: SpaceSaving) -> List[Dict]:
+            return [{"key": item, "count": count, "error": error} for item, count, error in summary.top(top_n)]
+        
+        with self.lock:
+            return {
+                "top_ips": rows(self.top_ips),
+                "top_paths": rows(self.top_paths),
+                "top_user_agents": rows(self.top_user_agents),
+                "unique_ips": {bot_type: hll.count() for bot_type, hll in self.unique_ips.items()}
+            }
+
+# ============================================================================
+# STATS SNAPSHOTS
+# ============================================================================
+
+class StatsSnapshotStore:
+    """Periodic crash-safe snapshots of counters, sketches and clients, reloaded on startup"""
+    
+    FORMAT_VERSION = 1
+    
+    def __init__(self, path: str = "logs/stats_snapshot.json", interval: float = 30.0):
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.collect = None
+        self.stats = {"saved": 0, "errors": 0, "last_saved": None, "last_bytes": 0, "last_ms": 0.0,
+                      "restored_from": None}
+    
+    def load(self) -> Optional[Dict]:
+        """The last complete snapshot, or None (missing, unreadable or another format version)"""
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable stats snapshot {self.path}: {e}")
+            return None
+        
+        if state.get("version") != self.FORMAT_VERSION:
+            logger.warning(f"Ignoring stats snapshot {self.path} with format version {state.get('version')}")
+            return None
+        
+        self.stats["restored_from"] = datetime.fromtimestamp(state["saved_at"]).isoformat(timespec='seconds')
+        return state
+    
+    def save(self, state: Dict):
+        """Write a snapshot: temp file, fsync, rename, so a crash leaves the old or the new one"""
+        start = time.perf_counter()
+        state = dict(state, version=self.FORMAT_VERSION, saved_at=time.time())
+        data = json.dumps(state, separators=(',', ':')).encode('utf-8')
+        
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        
+        self.stats["saved"] += 1
+        self.stats["last_saved"] = clock_hms()
+        self.stats["last_bytes"] = len(data)
+        self.stats["last_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    
+    def save_now(self):
+        """Collect and save, logging instead of raising"""
+        try:
+            self.save(self.collect())
+        except (OSError, ValueError, RuntimeError) as e:
+            self.stats["errors"] += 1
+            logger.error(f"Stats snapshot failed: {e}")
+    
+    def run(self):
+        """Save every interval until stopped"""
+        while not self.stop_event.wait(self.interval):
+            self.save_now()
+    
+    def start(self, collect):
+        """Snapshot collect() from a background thread, off the request path"""
+        self.collect = collect
+        if self.interval > 0:
+            self.thread = threading.Thread(target=self.run, name="stats-snapshot", daemon=True)
+            self.thread.start()
+    
+    def stop(self):
+        """Stop the thread and write a final snapshot"""
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join(timeout=10)
+            self.thread = None
+        if self.collect:
+            self.save_now()
+            self.collect = None
+    
+    def get_metrics(self) -> Dict:
+        """Snapshot counters for the status API"""
+        return dict(self.stats, path=self.path, interval=self.interval)
+
+# ============================================================================
+# LIVE STATUS STREAM
+# ============================================================================
+
+class StreamViewer:
+    """One /status/stream connection's bounded frame queue"""
+    
+    def __init__(self, queue_size: int):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+class StatusBroadcaster:
+    """Single ticking producer for /status/stream: coalesced stat deltas and sampled requests for every viewer"""
+    
+    def __init__(self, collect, rate: float = 2.0, max_viewers: int = 50, sample_size: int = 20,
+                 queue_size: int = 16):
+        self.collect = collect
+        self.rate = rate
+        self.max_viewers = max_viewers
+        self.sample_size = sample_size
+        self.queue_size = queue_size
+        self.viewers = set()
+        self.pending = set()
+        self.lock = threading.Lock()
+        
+        # Reservoir sample of this tick's requests
+        self.events = []
+        self.events_seen = 0
+        
+        self.last = None
+        self.last_request = None
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {"ticks": 0, "frames": 0, "slow_viewers_dropped": 0}
+    
+    def subscribe(self) -> Optional[StreamViewer]:
+        """Register a viewer (None when full); its first frame is a full snapshot"""
+        with self.lock:
+            if len(self.viewers) >= self.max_viewers:
+                return None
+            viewer = StreamViewer(self.queue_size)
+            self.viewers.add(viewer)
+            self.pending.add(viewer)
+        self.wakeup.set()
+        return viewer
+    
+    def unsubscribe(self, viewer: StreamViewer):
+        """Forget a viewer"""
+        viewer.closed = True
+        with self.lock:
+            self.viewers.discard(viewer)
+            self.pending.discard(viewer)
+    
+    def publish(self, event: Dict):
+        """Offer one request to the event feed; keeps a uniform sample of sample_size per tick"""
+        with self.lock:
+            self.events_seen += 1
+            if len(self.events) < self.sample_size:
+                self.events.append(event)
+            else:
+                slot = random.randrange(self.events_seen)
+                if slot < self.sample_size:
+                    self.events[slot] = event
+    
+    @staticmethod
+    def frame(event: str, payload: Dict) -> bytes:
+        """One SSE message"""
+        return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'), default=str)}\n\n".encode('utf-8')
+    
+    def tick(self):
+        """Compute the stats once and fan the resulting frame out to every viewer"""
+        try:
+            stats = self.collect()
+        except RuntimeError:
+            # A counter grew a key mid-copy; the next tick picks it up
+            return
+        
+        flat = flatten_stats(stats)
+        last_request = stats.get("last_request")
+        with self.lock:
+            events, seen = sorted(self.events, key=lambda event: event["ts"]), self.events_seen
+            self.events, self.events_seen = [], 0
+            viewers, pending = list(self.viewers), self.pending
+            self.pending = set()
+        
+        delta_frame = snapshot_frame = None
+        changed = {key: value for key, value in flat.items() if self.last is None or self.last.get(key) != value}
+        if changed or events or last_request != self.last_request:
+            delta = unflatten_stats(changed)
+            if last_request != self.last_request:
+                delta["last_request"] = last_request
+            delta_frame = self.frame("delta", {"stats": delta, "events": events, "requests": seen})
+        if pending:
+            snapshot = unflatten_stats(flat)
+            snapshot["last_request"] = last_request
+            snapshot_frame = self.frame("snapshot", {"stats": snapshot, "events": events, "requests": seen,
+                                                     "rate": self.rate})
+        self.last, self.last_request = flat, last_request
+        
+        for viewer in viewers:
+            frame = snapshot_frame if viewer in pending else delta_frame
+            if frame is None:
+                continue
+            try:
+                viewer.queue.put_nowait(frame)
+                self.stats["frames"] += 1
+            except queue.Full:
+                # A viewer this far behind reconnects and starts again from a snapshot
+                self.stats["slow_viewers_dropped"] += 1
+                self.unsubscribe(viewer)
+        self.stats["ticks"] += 1
+    
+    def run(self):
+        """Tick at most rate times a second, and not at all without viewers"""
+        while not self.stop_event.is_set():
+            if not self.viewers:
+                self.wakeup.wait(1.0)
+                self.wakeup.clear()
+                continue
+            self.tick()
+            self.stop_event.wait(1.0 / self.rate)
+    
+    def start(self):
+        """Start the broadcaster thread"""
+        self.thread = threading.Thread(target=self.run, name="status-stream", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop ticking and end every open stream"""
+        if self.thread:
+            self.stop_event.set()
+            self.wakeup.set()
+            self.thread.join(timeout=5)
+            self.thread = None
+        with self.lock:
+            viewers = list(self.viewers)
+        for viewer in viewers:
+            self.unsubscribe(viewer)
+            try:
+                viewer.queue.put_nowait(None)
+            except queue.Full:
+                pass
+    
+    def get_metrics(self) -> Dict:
+        """Broadcaster counters for the status API"""
+        return dict(self.stats, viewers=len(self.viewers), rate=self.rate)
+
+# ============================================================================
+# PRE-ENCODED STATIC RESPONSES
+# ============================================================================
+
+NOT_FOUND_HTML = """<!DOCTYPE html>
+<html>
+<head><title>404 - Page Not Found</title></head>
+<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+    <h1>404 - Page Not Found</h1>
+    <p>The requested page does not exist.</p>
+    <p><a href="/">Return to Home</a></p>
+</body>
+</html>
+"""
+
+class StaticResponseCache:
+    """Pre-encoded bodies for scanner noise (404s, redirects, soft-404 link maze)"""
+    
+    # Directories a vulnerability scanner expects to find; none of them are real routes,
+    # so every maze link lands back in the soft-404 handler
+    MAZE_DIRECTORIES = ["archive", "backup", "old", "private", "files", "export", "db", "internal"]
+    
+    def __init__(self, compression: CompressionManager, maze_variants: int = 16, maze_links: int = 40):
+        self.compression = compression
+        self.not_found = compression.encode_static(NOT_FOUND_HTML.encode('utf-8'))
+        self.redirect = EncodedBody(b'')
+        self.maze_pages = [compression.encode_static(self.build_link_maze(i, maze_links))
+                           for i in range(maze_variants)]
+        self.pages = {}
+    
+    def get_page(self, key, builder, content_type: str = 'text/html') -> EncodedBody:
+        """Return a cached page, building and precompressing it on first use"""
+        page = self.pages.get(key)
+        if page is None:
+            page = self.compression.encode_static(builder().encode('utf-8'), content_type)
+            
+            # Keyed pages like ('bait_list', version) keep only their newest entry
+            if isinstance(key, tuple):
+                for stale in [k for k in self.pages if isinstance(k, tuple) and k[0] == key[0]]:
+                    self.pages.pop(stale, None)
+            self.pages[key] = page
+        return page
+    
+    def build_link_maze(self, variant: int, links: int) -> bytes:
+        """Build one link-maze page; links point at more unknown paths"""
+        rng = random.Random(variant)
+        html_parts = [
+            '<!DOCTYPE html>',
+            '<html>',
+            '<head><title>Index of /archive</title><meta name="robots" content="index, follow"></head>',
+            '<body style="font-family: monospace; padding: 20px;">',
+            '<h1>Index of /archive</h1>',
+            '<ul>'
+        ]
+        
+        for i in range(links):
+            directory = rng.choice(self.MAZE_DIRECTORIES)
+            node = hashlib.md5(f"{variant}-{i}".encode()).hexdigest()[:12]
+            html_parts.append(f'<li><a href="/{directory}/{node}/">{directory}/{node}/</a></li>')
+        
+        html_parts.extend(['</ul>', '</body>', '</html>'])
+        return '\n'.join(html_parts).encode('utf-8')
+    
+    def get_maze_page(self, path: str) -> EncodedBody:
+        """Pick a maze variant deterministically from the request path"""
+        return self.maze_pages[zlib.crc32(path.encode('utf-8', 'replace')) % len(self.maze_pages)]
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """One tick's dashboard data and the bodies rendered from it (never mutated after the build)"""
+    tick: int
+    taken_at: float
+    document: Dict
+    status_body: EncodedBody
+    status_etag: str
+    metrics_body: EncodedBody
+
+class StatusSnapshotCache:
+    """Dashboard data taken at most once per tick; every request in between is a cached-bytes write"""
+    
+    def __init__(self, tick: float = 1.0):
+        self.tick = tick
+        self.current = None
+        self.lock = threading.Lock()
+        self.stats = {"builds": 0, "served": 0, "last_build_ms": 0.0}
+    
+    def get(self, build) -> StatusSnapshot:
+        """The current tick's snapshot; build(tick) runs once per tick however many requests arrive"""
+        tick = int(time.monotonic() // self.tick)
+        current = self.current
+        if current is None or current.tick != tick:
+            with self.lock:
+                current = self.current
+                if current is None or current.tick != tick:
+                    start = time.perf_counter()
+                    current = build(tick)
+                    self.current = current
+                    self.stats["builds"] += 1
+                    self.stats["last_build_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        
+        self.stats["served"] += 1
+        return current
+    
+    def get_metrics(self) -> Dict:
+        """Cache counters for the status API"""
+        return dict(self.stats, tick=self.tick)
+
+# ============================================================================
+# CONNECTION LIMITS AND TIMEOUTS
+# ============================================================================
+
+class ConnectionGuard:
+    """Admission control for the public listener (global and per-IP open connections) plus timeout counts"""
+    
+    def __init__(self, max_connections: int = 0, max_per_ip: int = 0):
+        self.max_connections = max_connections
+        self.max_per_ip = max_per_ip
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.per_ip = {}
+        self.stats = Counter()
+    
+    def admit(self, ip: str) -> bool:
+        """Take a connection slot for ip, or refuse when a cap is reached (0 means no cap)"""
+        with self.lock:
+            if self.max_connections and self.active >= self.max_connections:
+                self.stats["rejected_global"] += 1
+                return False
+            count = self.per_ip.get(ip, 0)
+            if self.max_per_ip and count >= self.max_per_ip:
+                self.stats["rejected_per_ip"] += 1
+                return False
+            
+            self.per_ip[ip] = count + 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.stats["accepted"] += 1
+            return True
+    
+    def release(self, ip: str):
+        """Give back the slot taken by admit"""
+        with self.lock:
+            self.active -= 1
+            count = self.per_ip[ip] - 1
+            if count:
+                self.per_ip[ip] = count
+            else:
+                del self.per_ip[ip]
+    
+    def record(self, event: str):
+        """Count a connection-level event (timeouts, oversized headers)"""
+        with self.lock:
+            self.stats[event] += 1
+    
+    def get_metrics(self) -> Dict:
+        """Open connections, caps and rejection/timeout counts for the status API"""
+        with self.lock:
+            return dict(self.stats, active=self.active, peak=self.peak, ips=len(self.per_ip),
+                        max_connections=self.max_connections, max_per_ip=self.max_per_ip)
+
+class RequestHeadersTooLarge(http.client.HTTPException):
+    """Request line and headers went past max_header_bytes"""
+
+class SocketDeadlines:
+    """Per-connection read deadlines (idle, header, body) and the write timeout, applied to one socket"""
+    
+    # A plain socket timeout restarts on every recv, so a client dripping one byte at a time never
+    # trips it; reads are held to a total deadline per phase instead. Writes get their own timeout,
+    # so clients that send slowly and clients that read slowly are judged separately.
+    
+    __slots__ = ('sock', 'guard', 'send_timeout', 'timeout', 'phase', 'deadline', 'budget')
+    
+    def __init__(self, sock: socket.socket, send_timeout: float, guard: ConnectionGuard = None):
+        self.sock = sock
+        self.guard = guard
+        self.send_timeout = send_timeout
+        self.timeout = sock.gettimeout()
+        self.phase = None
+        self.deadline = None
+        self.budget = None
+    
+    def start(self, phase: str, seconds: float, budget: int = None):
+        """Begin a read phase: reads must finish within seconds, and within budget bytes if given"""
+        self.phase = phase
+        self.deadline = time.monotonic() + seconds if seconds > 0 else None
+        self.budget = budget
+    
+    def set_timeout(self, timeout: Optional[float]):
+        if timeout != self.timeout:
+            self.sock.settimeout(timeout)
+            self.timeout = timeout
+    
+    def expired(self, phase: str):
+        """Count a timeout and build the exception to raise"""
+        if self.guard:
+            self.guard.record(f"{phase}_timeouts")
+        return socket.timeout(f"{phase} timed out")
+    
+    def recv_into(self, buffer) -> int:
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise self.expired(self.phase)
+            self.set_timeout(remaining)
+        if self.budget is not None:
+            if self.budget <= 0:
+                if self.guard:
+                    self.guard.record("headers_too_large")
+                raise RequestHeadersTooLarge("request headers too large")
+            # Never read past the budget, so bytes of a following body don't count against it
+            buffer = memoryview(buffer)[:self.budget]
+        
+        try:
+            received = self.sock.recv_into(buffer)
+        except socket.timeout:
+            raise self.expired(self.phase) from None
+        if self.budget is not None:
+            self.budget -= received
+        return received
+    
+    def sending(self):
+        """Switch the socket to the write timeout before a response write"""
+        self.set_timeout(self.send_timeout if self.send_timeout > 0 else None)
+
+class DeadlineReader(io.RawIOBase):
+    """Raw rfile over a socket whose reads honour the connection's SocketDeadlines"""
+    
+    def __init__(self, deadlines: SocketDeadlines):
+        self.deadlines = deadlines
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        return self.deadlines.recv_into(buffer)
+
+class LimitedHTTPServer(ThreadingHTTPServer):
+    """Threaded server that turns away connections over the ConnectionGuard caps before starting a thread"""
+    
+    guard = None
+    
+    def process_request(self, request, client_address):
+        if self.guard and not self.guard.admit(client_address[0]):
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            if self.guard:
+                self.guard.release(client_address[0])
+
+# ============================================================================
+# REQUEST ROUTING
+# ============================================================================
+
+class Route:
+    """One entry of the route table"""
+    
+    __slots__ = ('name', 'handler', 'admin')
+    
+    def __init__(self, name: str, handler, admin: bool = False):
+        self.name = name
+        self.handler = handler
+        self.admin = admin
+
+class RouteTrieNode:
+    """Prefix trie node keyed by path segment"""
+    
+    __slots__ = ('children', 'route', 'stems')
+    
+    def __init__(self):
+        self.children = {}
+        self.route = None
+        self.stems = []
+
+class RouteTable:
+    """Routes compiled at startup: exact-match dict first, then a prefix trie on path segments"""
+    
+    def __init__(self):
+        self.exact = {}
+        self.root = RouteTrieNode()
+    
+    def add_exact(self, path: str, route: Route):
+        """Register a route matching one path exactly"""
+        self.exact[path] = route
+    
+    def add_prefix(self, prefix: str, route: Route):
+        """Register a route for every path starting with prefix, as str.startswith would match it"""
+        # '/trap/' covers the segments below /trap; '/api/data' covers any segment starting with 'data'
+        *parents, stem = prefix.lstrip('/').split('/')
+        node = self.root
+        for segment in parents:
+            node = node.children.setdefault(segment, RouteTrieNode())
+        if stem:
+            node.stems.append((stem, route))
+        else:
+            node.route = route
+    
+    def match(self, path: str) -> Tuple[Optional[Route], List[str]]:
+        """Return the matching route (longest prefix wins) and the path segments left after it"""
+        route = self.exact.get(path)
+        if route is not None:
+            return route, []
+        
+        segments = path.split('/')[1:]
+        node = self.root
+        best, consumed = None, 0
+        for depth, segment in enumerate(segments):
+            if node.route is not None:
+                best, consumed = node.route, depth
+            for stem, stem_route in node.stems:
+                if segment.startswith(stem):
+                    best, consumed = stem_route, depth + 1
+                    break
+            node = node.children.get(segment)
+            if node is None:
+                break
+        
+        return best, segments[consumed:]
+    
+    def names(self, admin: bool = False) -> List[str]:
+        """Names of every registered route (visitor routes only unless admin)"""
+        routes = list(self.exact.values())
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node.route is not None:
+                routes.append(node.route)
+            routes.extend(route for _, route in node.stems)
+            nodes.extend(node.children.values())
+        return sorted({route.name for route in routes if admin or not route.admin})
+
+def build_route_params(segments: List[str]) -> Dict[str, str]:
+    """Structured parameters from the segments under a route prefix, e.g. /download/<file>"""
+    if not segments:
+        return {}
+    
+    leaf = segments[-1]
+    return {
+        "file": leaf,
+        "file_ext": os.path.splitext(leaf)[1].lower().replace('.', '')
+    }
+
+def build_default_routes() -> RouteTable:
+    """Compile the GET route table for InteractiveTarPitHandler (the public listener)"""
+    routes = RouteTable()
+    
+    # Visitor-facing routes; handlers receive the detected bot type
+    routes.add_exact('/', Route('root', lambda h, bot_type, is_bot: h.handle_root(bot_type, is_bot)))
+    routes.add_prefix('/download/', Route('download', lambda h, bot_type, is_bot: h.handle_download(bot_type, is_bot)))
+    routes.add_prefix('/trap/', Route('trap', lambda h, bot_type, is_bot: h.handle_trap_page(bot_type, is_bot)))
+    routes.add_prefix('/data/', Route('data', lambda h, bot_type, is_bot: h.handle_data_page(bot_type, is_bot)))
+    routes.add_prefix('/api/', Route('api_index', lambda h, bot_type, is_bot: h.send_api_index_response()))
+    routes.add_prefix('/api/data', Route('api_data', lambda h, bot_type, is_bot: h.send_api_response(bot_type)))
+    routes.add_prefix('/api/analytics', Route('api_analytics', lambda h, bot_type, is_bot: h.send_analytics_response(bot_type)))
+    
+    return routes
+
+def build_admin_routes() -> RouteTable:
+    """Compile the GET route table for AdminHandler (dashboard, uploads, diagnostics)"""
+    routes = RouteTable()
+    
+    routes.add_exact('/', Route('status_page', lambda h, bot_type, is_bot: h.handle_status_page(), admin=True))
+    routes.add_exact('/status', Route('status_page', lambda h, bot_type, is_bot: h.handle_status_page(), admin=True))
+    routes.add_exact('/status/stream', Route('status_stream', lambda h, bot_type, is_bot: h.handle_status_stream(), admin=True))
+    routes.add_exact('/ngrok', Route('ngrok_page', lambda h, bot_type, is_bot: h.handle_ngrok_info(), admin=True))
+    routes.add_exact('/test', Route('test_page', lambda h, bot_type, is_bot: h.handle_test_page(), admin=True))
+    routes.add_exact('/test/probe', Route('test_probe', lambda h, bot_type, is_bot: h.handle_test_probe(), admin=True))
+    routes.add_exact('/api/status', Route('api_status', lambda h, bot_type, is_bot: h.send_status_response(), admin=True))
+    routes.add_exact('/metrics', Route('metrics', lambda h, bot_type, is_bot: h.send_metrics_response(), admin=True))
+    routes.add_exact('/api/ngrok', Route('api_ngrok', lambda h, bot_type, is_bot: h.send_ngrok_response(), admin=True))
+    routes.add_exact('/bait/list', Route('bait_list', lambda h, bot_type, is_bot: h.handle_bait_files(), admin=True))
+    routes.add_exact('/debug/profile', Route('debug_profile', lambda h, bot_type, is_bot: h.handle_debug_profile(), admin=True))
+    routes.add_prefix('/upload/', Route('upload_page', lambda h, bot_type, is_bot: h.handle_upload_page(), admin=True))
+    
+    return routes
+
+# ============================================================================
+# ENHANCED REQUEST HANDLER WITH INTERACTIVE ELEMENTS - FIXED VERSION
+# ============================================================================
+
+class InteractiveTarPitHandler(BaseHTTPRequestHandler):
+    """Enhanced HTTP handler with interactive elements and bait files - FIXED"""
+    
+    # Persistent connections; every response carries Content-Length
+    protocol_version = "HTTP/1.1"
+    
+    # Headers and body go out as separate writes; without TCP_NODELAY the body
+    # waits on the client's delayed ACK (~40ms per response on keep-alive)
+    disable_nagle_algorithm = True
+    
+    # GET dispatch table, compiled once at import
+    routes = build_default_routes()
+    
+    # Set on AdminHandler: every request on that listener is operator traffic
+    admin_listener = False
+    
+    # Idle keep-alive seconds; None uses settings.keepalive_timeout
+    keepalive_timeout = None
+    
+    def __init__(self, *args, 
+                 content_gen=None, 
+                 config_manager=None, 
+                 control_panel=None,
+                 bait_manager=None,
+                 interactive_gen=None,
+                 ngrok_manager=None,
+                 response_cache=None,
+                 compression=None,
+                 log_pipeline=None,
+                 request_log=None,
+                 client_tracker=None,
+                 sketches=None,
+                 classifier=None,
+                 worker_stats=None,
+                 shared_counters=None,
+                 broadcaster=None,
+                 status_cache=None,
+                 connection_guard=None,
+                 profiler=None,
+                 settings=None,
+                 **kwargs):
+        self.content_gen = content_gen
+        self.config_manager = config_manager
+        self.control_panel = control_panel
+        self.bait_manager = bait_manager
+        self.interactive_gen = interactive_gen
+        self.ngrok_manager = ngrok_manager
+        self.response_cache = response_cache
+        self.compression = compression
+        self.log_pipeline = log_pipeline
+        self.request_log = request_log
+        self.client_tracker = client_tracker
+        self.sketches = sketches
+        self.classifier = classifier
+        self.worker_stats = worker_stats
+        self.shared_counters = shared_counters
+        self.broadcaster = broadcaster
+        self.status_cache = status_cache or StatusSnapshotCache()
+        self.connection_guard = connection_guard
+        self.profiler = profiler
+        self.settings = settings or ServerSettings()
+        
+        # Idle keep-alive connections are dropped after this many seconds
+        self.timeout = self.keepalive_timeout or self.settings.keepalive_timeout
+        self.requests_on_connection = 0
+        self.response_status = None
+        self.bot_type = None
+        self.is_admin = False
+        super().__init__(*args, **kwargs)
+    
+    def log_message(self, format, *args):
+        """Override to suppress default logging"""
+        pass
+    
+    def setup(self):
+        """Count response bytes per connection; reads and writes go through the connection's deadlines"""
+        super().setup()
+        # Admin connections aren't admitted by the guard, so keep their timeouts out of its counts
+        self.deadlines = SocketDeadlines(self.connection, self.settings.send_timeout,
+                                         guard=None if self.admin_listener else self.connection_guard)
+        self.rfile.close()
+        self.rfile = io.BufferedReader(DeadlineReader(self.deadlines))
+        self.wfile = CountingWriter(self.wfile, self.deadlines)
+    
+    def log_request(self, code='-', size='-'):
+        """Remember the response status instead of printing an access log line"""
+        self.response_status = code
+    
+    def handle_one_request(self):
+        """Serve one request and hand its summary to the request log"""
+        self.command = None
+        self.headers = None
+        self.request_parsed = False
+        if not self.await_request():
+            return
+        
+        self.requests_on_connection += 1
+        self.response_status = None
+        self.bot_type = None
+        self.route_name = None
+        self.is_admin = False
+        # One config snapshot per request, even if the file is reloaded mid-request
+        self.snapshot = self.config_manager.snapshot
+        start = time.perf_counter_ns()
+        cpu_start = time.thread_time_ns()
+        bytes_before = self.wfile.bytes_written
+        
+        # Visitor requests only; the admin listener serves the profile itself
+        profile = self.profiler.begin() if self.profiler and self.profiler.every and not self.admin_listener else None
+        try:
+            super().handle_one_request()
+        except RequestHeadersTooLarge as e:
+            # Ran out of budget inside the request line (inside the headers, parse_request answers 431 itself)
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(431, "Request header fields too large", str(e))
+            return
+        finally:
+            if profile:
+                self.profiler.end(profile)
+        
+        # Nothing was served if the request line or headers never arrived whole
+        if not self.request_parsed or not hasattr(self, 'do_' + self.command):
+            return
+        
+        cpu_ns = time.thread_time_ns() - cpu_start
+        held_ns = time.perf_counter_ns() - start
+        sent_bytes = self.wfile.bytes_written - bytes_before
+        user_agent = self.headers.get('User-Agent', '')
+        
+        if not self.is_admin:
+            self.account_cost(cpu_ns, sent_bytes, held_ns)
+            path = urlparse(self.path).path
+            if self.client_tracker:
+                depth = path.rstrip('/').count('/')
+                self.client_tracker.record(self.client_address[0], user_agent, self.bot_type, sent_bytes, depth)
+            if self.sketches:
+                self.sketches.update(self.client_address[0], path, user_agent, self.bot_type)
+            if self.broadcaster and self.broadcaster.viewers:
+                self.broadcaster.publish({
+                    "ts": time.time(),
+                    "time": clock_hms(),
+                    "ip": self.client_address[0],
+                    "bot_type": self.bot_type,
+                    "method": self.command,
+                    "path": self.path[:200],
+                    "status": int(self.response_status) if self.response_status else None
+                })
+        
+        if self.request_log:
+            self.request_log.submit((
+                time.time(),
+                self.client_address[0],
+                user_agent,
+                self.command,
+                self.path,
+                self.bot_type,
+                int(self.response_status) if self.response_status else None,
+                sent_bytes,
+                round(held_ns / 1e6, 3)
+            ))
+    
+    def account_cost(self, cpu_ns: int, sent_bytes: int, held_ns: int):
+        """Charge one request's handler CPU, bytes sent and wall time to its route and bot type"""
+        labels = {"route": self.route_name or "other", "bot_type": self.bot_type or "other"}
+        for dimension in COST_DIMENSIONS:
+            self.count(f"cpu_ns_by_{dimension}", labels[dimension], cpu_ns)
+            self.count(f"bytes_by_{dimension}", labels[dimension], sent_bytes)
+            self.count(f"held_ns_by_{dimension}", labels[dimension], held_ns)
+    
+    def await_request(self) -> bool:
+        """Wait up to the idle timeout for the next request to start, then start the header deadline"""
+        # The first read already holds the start of the headers, so it is bounded by the same budget
+        self.deadlines.start("idle", self.timeout, budget=self.settings.max_header_bytes)
+        try:
+            if not self.rfile.peek(1):
+                self.close_connection = True
+                return False
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True
+            return False
+        
+        buffered = len(self.rfile.peek())
+        self.deadlines.start("header", self.settings.header_timeout,
+                             budget=self.settings.max_header_bytes - buffered)
+        return True
+    
+    def parse_request(self) -> bool:
+        """Parse the request line and headers, then switch the read deadline to the body"""
+        parsed = super().parse_request()
+        self.request_parsed = parsed
+        self.deadlines.start("body", self.settings.body_timeout)
+        return parsed
+    
+    def read_body(self, limit: Optional[int]) -> Optional[bytes]:
+        """Read the request body within the body deadline; None once a bad or oversized length was answered"""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, "Bad Content-Length")
+            return None
+        if limit is not None and length > limit:
+            self.send_error(413, "Request body too large")
+            return None
+        
+        return self.rfile.read(length) if length > 0 else b''
+    
+    def end_headers(self):
+        """Advertise keep-alive limits, closing once the per-connection cap is reached"""
+        if not self.close_connection:
+            remaining = self.settings.max_keepalive_requests - self.requests_on_connection
+            if remaining <= 0:
+                self.send_header('Connection', 'close')
+            else:
+                self.send_header('Keep-Alive', f"timeout={int(self.timeout)}, max={remaining}")
+        super().end_headers()
+    
+    def do_HEAD(self):
+        """Handle HEAD requests: same routing as GET, headers only"""
+        self.do_GET()
+    
+    def do_GET(self):
+        """Handle GET requests"""
+        start_time = time.time()
+        
+        # Parse once; handlers read route_params / query instead of re-splitting self.path
+        parsed = urlparse(self.path)
+        route, segments = self.routes.match(parsed.path)
+        self.route_name = route.name if route else "not_found"
+        self.route_params = build_route_params(segments)
+        self.query = parse_qs(parsed.query) if parsed.query else {}
+        
+        # Dashboard polling is operator traffic, not visitor traffic
+        is_admin = route.admin if route is not None else self.admin_listener
+        self.is_admin = is_admin
+        
+        # Update statistics
+        if not is_admin:
+            self.count("total_requests")
+            self.count("requests_by_route", route.name if route else "not_found")
+        
+        # Detect bot type
+        user_agent = self.headers.get('User-Agent', '')
+        bot_type = self.config_manager.detect_bot_type(user_agent, self.path, self.client_address[0])
+        
+        # Second stage: behavior can expose scrapers hiding behind browser user agents
+        if self.classifier and self.client_tracker and not is_admin:
+            score = self.client_tracker.observe(self.client_address[0], user_agent, parsed.path, self.classifier)
+            if (bot_type == "generic" and self.snapshot.config.behavior_classifier
+                    and score >= self.snapshot.config.behavior_threshold):
+                bot_type = self.classifier.trap_type
+                self.count("behavior_promotions")
+        
+        # Check if it's a bot (anything not "generic" is a bot)
+        is_bot = bot_type != "generic"
+        self.bot_type = bot_type
+        
+        if is_bot and not is_admin:
+            self.count("bot_requests")
+            self.count("bot_types_detected", bot_type)
+            if self.control_panel:
+                self.control_panel.stats["last_request"] = f"{bot_type} at {clock_hms()}"
+            feed_logger.info("%s detected - %s", bot_type.upper(), self.path)
+        
+        if route is None:
+            # All other non-special paths - show 404 (or the soft-404 maze)
+            self.send_not_found()
+            return
+        
+        route.handler(self, bot_type, is_bot)
+    
+    def count(self, name: str, label: str = None, amount: int = 1):
+        """Bump a visitor counter in control_panel.stats and, under --workers, the shared block"""
+        if self.control_panel:
+            if label is None:
+                self.control_panel.stats[name] += amount
+            else:
+                self.control_panel.stats[name][label] += amount
+        if self.shared_counters:
+            self.shared_counters.add(name, label, amount)
+    
+    def handle_root(self, bot_type: str, is_bot: bool):
+        """ROOT PATH - Show different content based on visitor type"""
+        if is_bot:
+            # Bots get enticing trap content
+            self.handle_bot_landing_page(bot_type)
+        else:
+            # Humans get simple research portal
+            self.handle_human_landing_page()
+    
+    def send_body(self, status: int, body: Union[bytes, EncodedBody], content_type: str = 'text/html; charset=utf-8',
+                  headers: Dict[str, str] = None, etag: str = None):
+        """Send a body with Content-Length framing, negotiating Content-Encoding and revalidation"""
+        raw_size = len(body.raw) if isinstance(body, EncodedBody) else len(body)
+        compressible = self.compression is not None and self.compression.is_compressible(content_type, raw_size)
+        encoding = None
+        if compressible:
+            encoding = self.compression.negotiate(self.headers.get('Accept-Encoding', ''))
+        
+        # Cached bodies carry a strong ETag per representation
+        if etag is None and status == 200 and isinstance(body, EncodedBody):
+            etag = body.etag_for(encoding)
+        
+        if etag and self.etag_matches(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        
+        if compressible:
+            body, encoding = self.compression.select(body, content_type, encoding)
+        elif isinstance(body, EncodedBody):
+            body = body.raw
+        
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if etag:
+            self.send_header('ETag', etag)
+        if headers:
+            for name, value in headers.items():
+                self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def send_head(self, content_type: str = 'text/html'):
+        """Answer HEAD for a generated route without rendering its body"""
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.end_headers()
+    
+    def etag_matches(self, etag: str) -> bool:
+        """Weak If-None-Match comparison against the current representation"""
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        
+        opaque = etag[2:] if etag.startswith('W/') else etag
+        for candidate in header.split(','):
+            candidate = candidate.strip()
+            if candidate.startswith('W/'):
+                candidate = candidate[2:]
+            if candidate == opaque:
+                return True
+        return False
+    
+    def send_cached_page(self, key, builder):
+        """Send a page rendered once per key and kept precompressed"""
+        # Keyed on the config version too, so a reload replaces every cached page
+        self.send_body(200, self.response_cache.get_page((key, self.snapshot.version), builder), 'text/html')
+    
+    def send_html(self, html: str, status: int = 200):
+        """Encode and send an HTML page with Content-Length framing"""
+        self.send_body(status, html.encode('utf-8'), 'text/html')
+    
+    def send_not_found(self):
+        """Send the static 404 page, or the cached link maze in soft-404 trap mode"""
+        if self.snapshot.config.soft_404_trap:
+            self.send_body(200, self.response_cache.get_maze_page(self.path))
+        else:
+            self.send_body(404, self.response_cache.not_found)
+    
+    def send_redirect_home(self):
+        """Redirect to the landing page without building a body"""
+        self.send_body(302, self.response_cache.redirect, headers={'Location': '/'})
+    
+    def handle_bot_landing_page(self, bot_type: str):
+        """Handle landing page for bots - rich, enticing content"""
+        feed_logger.info("Serving BOT landing page to %s", bot_type)
+        
+        if self.command == 'HEAD':
+            self.send_head()
+            return
+        
+        # Generate rich content for this bot type
+        content = self.content_gen.generate_targeted_content(bot_type, slots=self.snapshot.template_slots(bot_type))
+        
+        # Check if this is a targeted bot type
+        is_targeted = bot_type in self.snapshot.bot_types
+        
+        if is_targeted:
+            self.count("targeted_bots")
+        
+        # Generate HTML with traps
+        html = self.wrap_bot_content_with_traps(content, bot_type, is_targeted)
+        
+        self.send_html(html)
+    
+    def wrap_bot_content_with_traps(self, content: Dict, bot_type: str, is_targeted: bool) -> str:
+        """Wrap bot content with traps - SIMPLIFIED VERSION"""
+        
+        # Create a rich, enticing page for bots
+        keywords = content['keywords']
+        
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>{content['title']}</title>
+            <meta name="description" content="Exclusive {', '.join(keywords[:3])} content available for download">
+            <meta name="keywords" content="{', '.join(keywords)}">
+            <meta name="robots" content="index, follow">
+            <style>
+                body {{ font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; }}
                 .content-section {{ margin: 30px 0; padding: 20px; background: #f8f9fa; border-radius: 10px; }}
                 .download-grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(250px, 1fr)); gap: 20px; margin: 20px 0; }}
                 .download-card {{ padding: 20px; background: white; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }}
@@ -1469,1489 +3695,3914 @@ class InteractiveTarPitHandler(BaseHTTPRequestHandler):
                 document.body.appendChild(extraDiv);
             }}, 3000);
             </script>
-            
-            <div style="margin-top: 40px; padding: 15px; background: #f0f0f0; border-radius: 5px; text-align: center; font-size: 12px; color: #666;">
-                <p>Page generated for {bot_type} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-                <p>Total bot visits: {self.control_panel.stats['bot_requests'] if self.control_panel else 0}</p>
-            </div>
+            
+            <div style="margin-top: 40px; padding: 15px; background: #f0f0f0; border-radius: 5px; text-align: center; font-size: 12px; color: #666;">
+                <p>Page generated for {bot_type} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p>Total bot visits: {self.control_panel.stats['bot_requests'] if self.control_panel else 0}</p>
+            </div>
+        </body>
+        </html>
+        """
+        
+        return html
+    
+    def handle_human_landing_page(self):
+        """Handle landing page for humans - simple research portal"""
+        feed_logger.info("Serving HUMAN landing page")
+        
+        public_url = self.ngrok_manager.public_url if self.ngrok_manager else None
+        self.send_cached_page(('human_landing', public_url), lambda: self.render_human_landing_page(public_url))
+    
+    def render_human_landing_page(self, public_url: Optional[str]) -> str:
+        """Render the human landing page for the current tunnel URL"""
+        tunnel_info = ""
+        if public_url:
+            tunnel_info = f"""
+            <div style="padding: 15px; background: #e8f4fd; border-radius: 10px; margin: 20px 0;">
+                <h3>Public Access Available</h3>
+                <p><strong>Public URL:</strong> <code style="background: white; padding: 5px; border-radius: 3px;">{public_url}</code></p>
+                <p>Share this URL to access from any device or network.</p>
+                <p><a href="{public_url}" target="_blank">Open public URL</a></p>
+            </div>
+            """
+        
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Research Portal</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}
+                .warning {{ background: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 5px; margin: 20px 0; }}
+            </style>
+        </head>
+        <body>
+            <h1>Academic Research Portal</h1>
+            <p>This site is used for academic research on web traffic patterns and bot behavior analysis.</p>
+            
+            <div class="warning">
+                <strong>⚠️ Warning:</strong> This site contains algorithmically generated content designed to study web scraping behavior. 
+                All content is synthetic and for research purposes only.
+            </div>
+            
+            {tunnel_info}
+            
+            <hr>
+            
+            <h3>Research Areas:</h3>
+            <ul>
+                <li>Web scraping bot detection and analysis</li>
+                <li>Bot behavior patterns and classification</li>
+                <li>Algorithmic content generation for research</li>
+                <li>Traffic pattern analysis</li>
+            </ul>
+            
+            <hr>
+            <p><small>Educational use only. All access is logged for research purposes. Contact research team for more information.</small></p>
+            
+            <!-- Invisible to visitors; only link-harvesting crawlers follow it -->
+            <a href="/archive/content/{hashlib.md5(b'research-archive').hexdigest()}" style="display:none;" tabindex="-1" aria-hidden="true">Archive</a>
+            
+            <script>
+            // Browsers report in; scrapers that don't run JS never do
+            navigator.sendBeacon('/analytics/track', JSON.stringify({{page: 'landing'}}));
+            </script>
+        </body>
+        </html>
+        """
+        
+        return html
+    
+    def handle_trap_page(self, bot_type: str, is_bot: bool):
+        """Handle trap pages with recursive content"""
+        if not is_bot:
+            # Humans get redirected to home
+            self.send_redirect_home()
+            return
+        
+        if self.command == 'HEAD':
+            self.send_head()
+            return
+        
+        # Generate deep trap content
+        content = self.content_gen.generate_targeted_content(bot_type, slots=self.snapshot.template_slots(bot_type))
+        content['title'] = f"Deep Data Archive: {random.choice(content['keywords']).title()}"
+        
+        # Add more traps for deep pages
+        content['traps']['hidden_divs'].extend([
+            f'<div style="display:none;" data-deep-trap="1">Archive depth: {random.randint(1, 100)}</div>',
+            f'<div style="display:none;" data-deep-trap="2">Data repository index {random.randint(1000, 9999)}</div>',
+            '<div style="display:none;">' + ' '.join([f'data-{i}="{random.randint(1000, 9999)}"' for i in range(10)]) + '</div>'
+        ])
+        
+        # Add more download links
+        for i in range(5):
+            file_type = random.choice(['pdf', 'csv', 'json', 'xml', 'zip'])
+            keyword = random.choice(content['keywords'])
+            content['traps']['infinite_links'].append(
+                f'<a href="/download/{bot_type}/archive_{random.randint(1000, 9999)}.{file_type}" style="display:none;">Archive {i}</a>'
+            )
+        
+        html = self.wrap_content_with_traps(content, bot_type, True)
+        
+        self.send_html(html)
+    
+    def handle_data_page(self, bot_type: str, is_bot: bool):
+        """Handle data pages with fake datasets"""
+        if not is_bot:
+            self.send_redirect_home()
+            return
+        
+        if self.command == 'HEAD':
+            self.send_head()
+            return
+        
+        # Create a data listing page
+        keywords = self.snapshot.keywords
+        page_html = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Research Data Repository</title>
+            <style>
+                body { font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; }
+                .dataset { padding: 20px; margin: 15px 0; background: #f8f9fa; border-radius: 10px; border-left: 4px solid #007bff; }
+                .download-btn { padding: 8px 16px; background: #28a745; color: white; text-decoration: none; border-radius: 5px; display: inline-block; }
+            </style>
+        </head>
+        <body>
+            <h1>Research Data Repository</h1>
+            <p>This repository contains datasets for machine learning training and research purposes.</p>
+            
+            <div style="background: #e8f4fd; padding: 20px; border-radius: 10px; margin: 20px 0;">
+                <h3>⚠️ Important Notice</h3>
+                <p>All datasets in this repository are algorithmically generated for research purposes only.</p>
+                <p>They do not contain real user data or sensitive information.</p>
+            </div>
+            
+            <h2>Available Datasets</h2>
+        """
+        
+        # Add dataset listings
+        for i in range(15):
+            keyword = random.choice(keywords)
+            file_type = random.choice(['CSV', 'JSON', 'XML', 'TXT', 'ZIP'])
+            size = random.choice(['1.2 MB', '4.7 MB', '15.3 MB', '28.9 MB', '102.4 MB'])
+            records = random.choice(['10,000', '50,000', '100,000', '500,000', '1,000,000'])
+            
+            page_html += f"""
+            <div class="dataset">
+                <h3>{keyword.title()} Dataset v{random.randint(1, 5)}.{random.randint(0, 9)}</h3>
+                <p>Contains {records} records of {keyword} related data for training and analysis.</p>
+                <p><strong>Format:</strong> {file_type} | <strong>Size:</strong> {size} | <strong>Updated:</strong> {random.randint(1, 30)} days ago</p>
+                <p><strong>Description:</strong> This dataset contains synthetic {keyword} data generated for machine learning research and bot behavior analysis.</p>
+                <a href="/download/{bot_type}/{keyword}_dataset_{i}.{file_type.lower()}" class="download-btn">Download Dataset</a>
+                <a href="/trap/{bot_type}/metadata_{i}" style="margin-left: 10px; color: #0066cc;">View Metadata</a>
+            </div>
+            """
+        
+        # Add hidden traps
+        page_html += """
+            <div style="display:none;">
+                <h3>Additional Resources</h3>
+        """
+        
+        for i in range(10):
+            page_html += f'<a href="/data/{bot_type}/resource_{i}">Hidden Resource {i}</a><br>'
+        
+        page_html += """
+            </div>
+            
+            <script>
+            // Auto-load more content for bots
+            setTimeout(function() {
+                var moreContent = document.createElement('div');
+                moreContent.innerHTML = '<h3>Additional Datasets Loaded</h3><p>Loading more research data...</p>';
+                document.body.appendChild(moreContent);
+                
+                // Simulate loading more datasets
+                setTimeout(function() {
+                    moreContent.innerHTML = '<h3>Additional Datasets</h3><p>25 more datasets loaded from archive. <a href="/data/' + bot_type + '/page2">View Next Page</a></p>';
+                }, 2000);
+            }, 3000);
+            
+            // Track bot interaction
+            document.addEventListener('click', function() {
+                fetch('/api/analytics/track', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({
+                        event: 'dataset_browse',
+                        bot_type: '""" + bot_type + """',
+                        timestamp: new Date().toISOString()
+                    })
+                });
+            });
+            </script>
         </body>
         </html>
         """
         
-        return html
+        self.send_html(page_html)
     
-    def handle_human_landing_page(self):
-        """Handle landing page for humans - simple research portal"""
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Serving HUMAN landing page")
-        
-        public_url = self.ngrok_manager.public_url if self.ngrok_manager else None
+    def do_POST(self):
+        """Handle POST requests (for forms, uploads, etc.)"""
+        self.route_name = "post"
+        self.bot_type = self.config_manager.detect_bot_type(self.headers.get('User-Agent', ''), self.path,
+                                                            self.client_address[0])
+        post_data = self.read_body(self.settings.max_body_kb * 1024)
+        if post_data is None:
+            return
         
-        tunnel_info = ""
-        if public_url:
-            tunnel_info = f"""
-            <div style="padding: 15px; background: #e8f4fd; border-radius: 10px; margin: 20px 0;">
-                <h3>Public Access Available</h3>
-                <p><strong>Public URL:</strong> <code style="background: white; padding: 5px; border-radius: 3px;">{public_url}</code></p>
-                <p>Share this URL to access from any device or network.</p>
-                <p><a href="{public_url}" target="_blank">Open public URL</a></p>
-            </div>
+        path = urlparse(self.path).path
+        if path in BEACON_PATHS:
+            if self.classifier and self.client_tracker:
+                self.client_tracker.observe_beacon(self.client_address[0], self.headers.get('User-Agent', ''),
+                                                   self.classifier)
+            self.send_response(204)
+            self.end_headers()
+        else:
+            # For form submissions, show success page
+            success_html = """
+            <!DOCTYPE html>
+            <html>
+            <head><title>Submission Received</title></head>
+            <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px;">
+                <h1>Thank You!</h1>
+                <p>Your submission has been received and is being processed.</p>
+                <p><a href="/">Return to homepage</a></p>
+                <div style="display:none;">
+                    <!-- Hidden tracking for bots -->
+                    <p>Additional data is being generated for your request...</p>
+                    <script>
+                        setTimeout(function() {
+                            window.location.href = '/download/trap_dataset.zip';
+                        }, 3000);
+                    </script>
+                </div>
+            </body>
+            </html>
             """
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Research Portal</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}
-                .warning {{ background: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-            </style>
-        </head>
-        <body>
-            <h1>Academic Research Portal</h1>
-            <p>This site is used for academic research on web traffic patterns and bot behavior analysis.</p>
-            
-            <div class="warning">
-                <strong>⚠️ Warning:</strong> This site contains algorithmically generated content designed to study web scraping behavior. 
-                All content is synthetic and for research purposes only.
-            </div>
             
-            {tunnel_info}
+            self.send_html(success_html)
+    
+    def handle_download(self, bot_type: str, is_bot: bool):
+        """Handle download requests for bait files"""
+        if not is_bot and not self.snapshot.config.download_traps:
+            self.send_error(403, "Downloads disabled for humans")
+            return
+        
+        # Parse requested file
+        if not self.route_params:
+            self.send_not_found()
+            return
+        
+        requested_file = self.route_params["file"]
+        file_ext = self.route_params["file_ext"]
+        
+        # Get appropriate bait file
+        bait_file = self.bait_manager.get_random_bait_file(file_ext if file_ext in self.bait_manager.bait_files else None)
+        
+        if not bait_file:
+            if self.command == 'HEAD':
+                self.send_head(self.get_mime_type(requested_file))
+                return
             
-            <hr>
+            # Generate on-the-fly content
+            if file_ext == 'pdf':
+                content = self.bait_manager.generate_fake_pdf()
+                content_type = 'application/pdf'
+                filename = f"generated_{bot_type}_data.pdf"
+            elif file_ext == 'csv':
+                content = self.bait_manager.generate_fake_csv(rows=500)
+                content_type = 'text/csv'
+                filename = f"generated_{bot_type}_data.csv"
+            elif file_ext == 'json':
+                content = json.dumps(self.bait_manager.generate_fake_json(), indent=2)
+                content_type = 'application/json'
+                filename = f"generated_{bot_type}_data.json"
+            elif file_ext == 'xml':
+                content = self.bait_manager.generate_fake_xml()
+                content_type = 'application/xml'
+                filename = f"generated_{bot_type}_data.xml"
+            elif file_ext == 'zip':
+                # Create a zip with multiple fake files
+                content = self.generate_fake_zip(bot_type)
+                content_type = 'application/zip'
+                filename = f"{bot_type}_dataset_collection.zip"
+            else:
+                content = f"Fake data for {bot_type} bots\nGenerated: {datetime.now().isoformat()}\nKeywords: {self.snapshot.keywords_summary}"
+                content_type = 'text/plain'
+                filename = f"generated_{bot_type}_data.txt"
+        else:
+            # Serve existing bait file (cached with its precompressed variants)
+            try:
+                content_type = self.get_mime_type(bait_file['name'])
+                content = self.compression.load_file(bait_file['path'], content_type) if self.compression else None
+                if content is None:
+                    with open(bait_file['path'], 'rb') as f:
+                        content = f.read()
+                filename = bait_file['name']
+            except Exception as e:
+                logger.error(f"Failed to serve bait file: {e}")
+                self.send_error(500)
+                return
+        
+        # Update download stats
+        self.count("downloads")
+        self.count("downloads_by_type", bot_type)
+        
+        # Send file
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        self.send_body(200, content, content_type,
+                       headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+        
+        logger.info("Download served: %s to %s bot", filename, bot_type)
+        feed_logger.info("%s downloaded %s", bot_type.upper(), filename)
+    
+    def generate_fake_zip(self, bot_type: str) -> bytes:
+        """Generate a fake ZIP file with multiple bait files"""
+        zip_buffer = io.BytesIO()
+        
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            # Add CSV
+            csv_content = self.bait_manager.generate_fake_csv(rows=100)
+            zip_file.writestr(f"{bot_type}_users.csv", csv_content)
             
-            <h3>Research Areas:</h3>
-            <ul>
-                <li>Web scraping bot detection and analysis</li>
-                <li>Bot behavior patterns and classification</li>
-                <li>Algorithmic content generation for research</li>
-                <li>Traffic pattern analysis</li>
-            </ul>
+            # Add JSON
+            json_content = json.dumps(self.bait_manager.generate_fake_json(), indent=2)
+            zip_file.writestr(f"{bot_type}_data.json", json_content)
             
-            <h3>Administration:</h3>
-            <p>
-                <a href="/status">View Research Dashboard</a> | 
-                <a href="/upload/">Upload Research Files</a> | 
-                <a href="/test">Test Interface</a> |
-                <a href="/ngrok">Network Configuration</a>
-            </p>
+            # Add README
+            readme = f"""# {bot_type.upper()} Dataset Collection
+Generated: {datetime.now().isoformat()}
+Purpose: Research and analysis
+Files: {bot_type}_users.csv, {bot_type}_data.json, {bot_type}_metadata.txt
+
+This dataset contains algorithmically generated data for research purposes.
+All content is synthetic and does not represent real information.
+"""
+            zip_file.writestr("README.txt", readme)
             
-            <hr>
-            <p><small>Educational use only. All access is logged for research purposes. Contact research team for more information.</small></p>
-        </body>
-        </html>
-        """
+            # Add metadata
+            metadata = {
+                "generated_at": datetime.now().isoformat(),
+                "bot_type": bot_type,
+                "file_count": 3,
+                "data_type": "synthetic",
+                "keywords": list(self.snapshot.keywords[:10])
+            }
+            zip_file.writestr(f"{bot_type}_metadata.json", json.dumps(metadata, indent=2))
         
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        return zip_buffer.getvalue()
     
-    def handle_trap_page(self, bot_type: str, is_bot: bool):
-        """Handle trap pages with recursive content"""
-        if not is_bot:
-            # Humans get redirected to home
-            self.send_response(302)
-            self.send_header('Location', '/')
-            self.end_headers()
-            return
-        
-        # Generate deep trap content
-        content = self.content_gen.generate_targeted_content(bot_type)
-        content['title'] = f"Deep Data Archive: {random.choice(content['keywords']).title()}"
-        
-        # Add more traps for deep pages
-        content['traps']['hidden_divs'].extend([
-            f'<div style="display:none;" data-deep-trap="1">Archive depth: {random.randint(1, 100)}</div>',
-            f'<div style="display:none;" data-deep-trap="2">Data repository index {random.randint(1000, 9999)}</div>',
-            '<div style="display:none;">' + ' '.join([f'data-{i}="{random.randint(1000, 9999)}"' for i in range(10)]) + '</div>'
-        ])
+    def send_api_index_response(self):
+        """Answer unknown API endpoints with the endpoint list"""
+        self.send_json_response({
+            "error": "Invalid API endpoint",
+            "available_endpoints": ["/api/data", "/api/analytics"],
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    def stats_view(self) -> Dict:
+        """Counters, sketches and client summary: merged across workers in --workers mode, else this process"""
+        if self.worker_stats:
+            view = self.worker_stats.merged()
+            if self.shared_counters:
+                # Live counters from shared memory; the published files lag by up to a second
+                stats = self.shared_counters.merged()
+                stats["last_request"] = view["stats"].get("last_request")
+                view = dict(view, stats=stats)
+            return view
+        return {
+            "stats": self.control_panel.stats if self.control_panel else {},
+            "sketches": self.sketches,
+            "clients": self.client_tracker.get_metrics() if self.client_tracker else None,
+            "workers": []
+        }
+    
+    def build_status_snapshot(self, tick: int) -> StatusSnapshot:
+        """Take the dashboard data once and render /api/status and /metrics from it"""
+        view = self.stats_view()
+        stats = view["stats"]
+        document = {
+            "status": "running",
+            "timestamp": datetime.now().isoformat(),
+            "stats": {
+                "total_requests": stats.get("total_requests", 0),
+                "bot_requests": stats.get("bot_requests", 0),
+                "targeted_bots": stats.get("targeted_bots", 0),
+                "downloads": stats.get("downloads", 0),
+                "bot_types_detected": dict(stats.get("bot_types_detected", {})),
+                "behavior_promotions": stats.get("behavior_promotions", 0),
+                "requests_by_route": dict(stats.get("requests_by_route", {})),
+                "last_request": stats.get("last_request", "None")
+            }
+        }
         
-        # Add more download links
-        for i in range(5):
-            file_type = random.choice(['pdf', 'csv', 'json', 'xml', 'zip'])
-            keyword = random.choice(content['keywords'])
-            content['traps']['infinite_links'].append(
-                f'<a href="/download/{bot_type}/archive_{random.randint(1000, 9999)}.{file_type}" style="display:none;">Archive {i}</a>'
-            )
+        if self.compression:
+            document["compression"] = self.compression.get_metrics()
+        if self.log_pipeline:
+            document["logging"] = self.log_pipeline.get_metrics()
+        if self.request_log:
+            document["request_log"] = self.request_log.get_metrics()
+        if view["clients"]:
+            document["clients"] = view["clients"]
+        if view["sketches"]:
+            document["sketches"] = view["sketches"].get_metrics()
+        if view["workers"]:
+            document["workers"] = view["workers"]
+        if self.broadcaster:
+            document["status_stream"] = self.broadcaster.get_metrics()
+        document["status_cache"] = self.status_cache.get_metrics()
+        document["cpu"] = trap_costs(stats)
+        if self.connection_guard:
+            document["connections"] = self.connection_guard.get_metrics()
+        if self.profiler:
+            document["profiler"] = self.profiler.get_metrics()
+        document["ip_ranges"] = self.config_manager.ip_ranges.get_metrics()
+        document["config"] = {"version": self.snapshot.version, "loaded_at": self.snapshot.loaded_at}
+        
+        metrics = PrometheusText()
+        metrics.request_counters(stats)
+        metrics.cost_counters(stats)
+        if view["sketches"]:
+            metrics.metric("unique_ips", "gauge", "Estimated unique client IPs by bot type (HyperLogLog)",
+                           metrics.labelled("bot_type", document["sketches"]["unique_ips"]))
+        if view["clients"]:
+            metrics.metric("tracked_clients", "gauge", "Clients in the per-client table",
+                           [("", view["clients"]["tracked"])])
+        if view["workers"]:
+            metrics.metric("workers_alive", "gauge", "Worker processes currently running",
+                           [("", sum(1 for w in view["workers"] if w["alive"]))])
+        if self.connection_guard:
+            connections = document["connections"]
+            metrics.metric("open_connections", "gauge", "Open public connections (this process)",
+                           [("", connections["active"])])
+            metrics.metric("connections_rejected_total", "counter", "Connections refused at a connection cap",
+                           [(metrics.labels(reason=reason), connections.get(f"rejected_{reason}", 0))
+                            for reason in ("global", "per_ip")])
+            metrics.metric("request_timeouts_total", "counter", "Connections closed by a read or write deadline",
+                           [(metrics.labels(phase=phase), connections.get(f"{phase}_timeouts", 0))
+                            for phase in ("idle", "header", "body", "send")])
+            metrics.metric("headers_too_large_total", "counter", "Requests refused with 431",
+                           [("", connections.get("headers_too_large", 0))])
+        
+        return StatusSnapshot(
+            tick=tick,
+            taken_at=time.time(),
+            document=document,
+            status_body=self.compression.encode_static(json.dumps(document, indent=2).encode('utf-8'),
+                                                       'application/json'),
+            # Weak: the timestamp and byte counters move every tick, the counters that matter may not
+            status_etag='W/"' + hashlib.sha1(json.dumps(document["stats"], sort_keys=True).encode()).hexdigest()[:20] + '"',
+            metrics_body=self.compression.encode_static(metrics.render(), PrometheusText.CONTENT_TYPE)
+        )
+    
+    def send_status_response(self):
+        """Send status response (from the current tick's snapshot)"""
+        snapshot = self.status_cache.get(self.build_status_snapshot)
+        self.send_body(200, snapshot.status_body, 'application/json', etag=snapshot.status_etag)
+    
+    def send_metrics_response(self):
+        """Prometheus text exposition of the (worker-merged) counters, from the current tick's snapshot"""
+        snapshot = self.status_cache.get(self.build_status_snapshot)
+        self.send_body(200, snapshot.metrics_body, PrometheusText.CONTENT_TYPE)
+    
+    def send_ngrok_response(self):
+        """Send ngrok tunnel information"""
+        if self.ngrok_manager and self.ngrok_manager.public_url:
+            response = {
+                "active": True,
+                "public_url": self.ngrok_manager.public_url,
+                "local_url": f"http://localhost:{self.server.server_port}",
+                "protocol": "http",
+                "started": datetime.fromtimestamp(self.ngrok_manager.tunnel_start_time).isoformat() if self.ngrok_manager.tunnel_start_time else None
+            }
+        else:
+            response = {
+                "active": False,
+                "message": "ngrok tunnel is not active"
+            }
         
-        html = self.wrap_content_with_traps(content, bot_type, True)
+        self.send_json_response(response)
+    
+    def send_api_response(self, bot_type: str):
+        """Send fake API response"""
+        response = {
+            "status": "success",
+            "bot_type": bot_type,
+            "data": {
+                "items": [{
+                    "id": i,
+                    "title": f"Generated Item {i}",
+                    "content": f"This is fake content for {bot_type} bots",
+                    "keywords": random.sample(self.snapshot.keywords, 3),
+                    "created_at": (datetime.now() - timedelta(days=random.randint(0, 30))).isoformat()
+                } for i in range(random.randint(10, 50))],
+                "pagination": {
+                    "page": 1,
+                    "total_pages": random.randint(10, 100),
+                    "next_page": f"/api/data?page=2&bot_type={bot_type}"
+                }
+            },
+            "generated_at": datetime.now().isoformat(),
+            "download_url": f"/download/{bot_type}/full_dataset.zip"
+        }
         
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        self.send_json_response(response)
     
-    def handle_data_page(self, bot_type: str, is_bot: bool):
-        """Handle data pages with fake datasets"""
-        if not is_bot:
-            self.send_response(302)
-            self.send_header('Location', '/')
-            self.end_headers()
-            return
+    def send_analytics_response(self, bot_type: str):
+        """Send fake analytics data"""
+        response = {
+            "bot_type": bot_type,
+            "analytics": {
+                "total_requests": random.randint(1000, 10000),
+                "unique_visitors": random.randint(100, 1000),
+                "popular_keywords": random.sample(self.snapshot.keywords, 5),
+                "downloads": random.randint(50, 500),
+                "avg_session_duration": f"{random.randint(1, 10)}m {random.randint(0, 59)}s"
+            },
+            "recommendations": [
+                f"Increase {random.choice(self.snapshot.keywords)} content",
+                "Add more interactive elements",
+                "Generate additional dataset variations"
+            ]
+        }
         
-        # Create a data listing page
-        keywords = self.config_manager.active_config.keywords
-        page_html = """
+        self.send_json_response(response)
+    
+    def send_json_response(self, data: Dict, etag: str = None):
+        """Send JSON response"""
+        response = json.dumps(data, indent=2)
+        self.send_body(200, response.encode('utf-8'), 'application/json', etag=etag)
+    
+    def handle_upload_page(self):
+        """Show file upload page"""
+        html = """
         <!DOCTYPE html>
         <html>
         <head>
-            <title>Research Data Repository</title>
+            <title>Upload Bait Files</title>
             <style>
-                body { font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; }
-                .dataset { padding: 20px; margin: 15px 0; background: #f8f9fa; border-radius: 10px; border-left: 4px solid #007bff; }
-                .download-btn { padding: 8px 16px; background: #28a745; color: white; text-decoration: none; border-radius: 5px; display: inline-block; }
+                body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
+                .upload-area { 
+                    border: 3px dashed #ccc; 
+                    padding: 40px; 
+                    text-align: center; 
+                    margin: 20px 0;
+                    border-radius: 10px;
+                    transition: all 0.3s;
+                }
+                .upload-area:hover { 
+                    border-color: #007bff; 
+                    background: #f0f8ff; 
+                }
+                .file-list { margin-top: 30px; }
+                .file-item { 
+                    padding: 10px; 
+                    margin: 5px 0; 
+                    background: #f8f9fa; 
+                    border-radius: 5px;
+                }
+                .remove-btn {
+                    background: #dc3545;
+                    color: white;
+                    border: none;
+                    border-radius: 50%;
+                    width: 24px;
+                    height: 24px;
+                    cursor: pointer;
+                    font-weight: bold;
+                }
             </style>
         </head>
         <body>
-            <h1>Research Data Repository</h1>
-            <p>This repository contains datasets for machine learning training and research purposes.</p>
-            
-            <div style="background: #e8f4fd; padding: 20px; border-radius: 10px; margin: 20px 0;">
-                <h3>⚠️ Important Notice</h3>
-                <p>All datasets in this repository are algorithmically generated for research purposes only.</p>
-                <p>They do not contain real user data or sensitive information.</p>
-            </div>
+            <h1>Upload Bait Files</h1>
+            <p>Upload files that will be served to bots as bait.</p>
             
-            <h2>Available Datasets</h2>
-        """
-        
-        # Add dataset listings
-        for i in range(15):
-            keyword = random.choice(keywords)
-            file_type = random.choice(['CSV', 'JSON', 'XML', 'TXT', 'ZIP'])
-            size = random.choice(['1.2 MB', '4.7 MB', '15.3 MB', '28.9 MB', '102.4 MB'])
-            records = random.choice(['10,000', '50,000', '100,000', '500,000', '1,000,000'])
+            <form id="uploadForm" enctype="multipart/form-data">
+                <div class="upload-area" id="dropArea">
+                    <input type="file" id="fileInput" name="file" multiple style="display: none;">
+                    <button type="button" onclick="document.getElementById('fileInput').click()" 
+                            style="padding: 15px 30px; font-size: 16px; cursor: pointer; background: #007bff; color: white; border: none; border-radius: 5px;">
+                        Select Files
+                    </button>
+                    <p style="margin-top: 10px; color: #666;">or drag and drop files here</p>
+                    <div id="selectedFiles"></div>
+                </div>
+                <button type="submit" style="padding: 12px 24px; background: #28a745; color: white; border: none; border-radius: 5px; cursor: pointer;">
+                    Upload Selected Files
+                </button>
+            </form>
             
-            page_html += f"""
-            <div class="dataset">
-                <h3>{keyword.title()} Dataset v{random.randint(1, 5)}.{random.randint(0, 9)}</h3>
-                <p>Contains {records} records of {keyword} related data for training and analysis.</p>
-                <p><strong>Format:</strong> {file_type} | <strong>Size:</strong> {size} | <strong>Updated:</strong> {random.randint(1, 30)} days ago</p>
-                <p><strong>Description:</strong> This dataset contains synthetic {keyword} data generated for machine learning research and bot behavior analysis.</p>
-                <a href="/download/{bot_type}/{keyword}_dataset_{i}.{file_type.lower()}" class="download-btn">Download Dataset</a>
-                <a href="/trap/{bot_type}/metadata_{i}" style="margin-left: 10px; color: #0066cc;">View Metadata</a>
-            </div>
-            """
-        
-        # Add hidden traps
-        page_html += """
-            <div style="display:none;">
-                <h3>Additional Resources</h3>
-        """
-        
-        for i in range(10):
-            page_html += f'<a href="/data/{bot_type}/resource_{i}">Hidden Resource {i}</a><br>'
-        
-        page_html += """
+            <div class="file-list">
+                <h3>Available Bait Files:</h3>
+                <div id="baitFilesList"></div>
             </div>
             
             <script>
-            // Auto-load more content for bots
-            setTimeout(function() {
-                var moreContent = document.createElement('div');
-                moreContent.innerHTML = '<h3>Additional Datasets Loaded</h3><p>Loading more research data...</p>';
-                document.body.appendChild(moreContent);
+            document.getElementById('fileInput').addEventListener('change', updateFileList);
+            document.getElementById('uploadForm').addEventListener('submit', handleFormSubmit);
+            
+            // Drag and drop functionality
+            const dropArea = document.getElementById('dropArea');
+            dropArea.addEventListener('dragover', (e) => {
+                e.preventDefault();
+                dropArea.style.borderColor = '#007bff';
+                dropArea.style.background = '#f0f8ff';
+            });
+            
+            dropArea.addEventListener('dragleave', (e) => {
+                dropArea.style.borderColor = '#ccc';
+                dropArea.style.background = '';
+            });
+            
+            dropArea.addEventListener('drop', (e) => {
+                e.preventDefault();
+                dropArea.style.borderColor = '#ccc';
+                dropArea.style.background = '';
                 
-                // Simulate loading more datasets
-                setTimeout(function() {
-                    moreContent.innerHTML = '<h3>Additional Datasets</h3><p>25 more datasets loaded from archive. <a href="/data/' + bot_type + '/page2">View Next Page</a></p>';
-                }, 2000);
-            }, 3000);
+                const files = e.dataTransfer.files;
+                if (files.length > 0) {
+                    document.getElementById('fileInput').files = files;
+                    updateFileList();
+                }
+            });
+            
+            // Click to upload
+            dropArea.addEventListener('click', () => {
+                document.getElementById('fileInput').click();
+            });
+            
+            function updateFileList() {
+                const files = document.getElementById('fileInput').files;
+                const selectedFiles = document.getElementById('selectedFiles');
+                selectedFiles.innerHTML = '';
+                
+                if (files.length === 0) {
+                    selectedFiles.innerHTML = '<p style="color:#666; font-style:italic;">No files selected</p>';
+                    return;
+                }
+                
+                const list = document.createElement('ul');
+                list.style.listStyle = 'none';
+                list.style.padding = '0';
+                
+                for(let i = 0; i < files.length; i++) {
+                    const file = files[i];
+                    const li = document.createElement('li');
+                    li.className = 'file-item';
+                    li.innerHTML = `
+                        <div style="display: flex; justify-content: space-between; align-items: center; margin: 5px 0;">
+                            <div>
+                                <strong>${file.name}</strong>
+                                <br>
+                                <small>${(file.size / 1024).toFixed(2)} KB • ${file.type || 'Unknown type'}</small>
+                            </div>
+                            <button type="button" onclick="removeFile(${i})" class="remove-btn">×</button>
+                        </div>
+                    `;
+                    list.appendChild(li);
+                }
+                
+                selectedFiles.appendChild(list);
+            }
+            
+            function removeFile(index) {
+                const fileInput = document.getElementById('fileInput');
+                const files = Array.from(fileInput.files);
+                files.splice(index, 1);
+                
+                // Create new FileList
+                const dataTransfer = new DataTransfer();
+                files.forEach(file => dataTransfer.items.add(file));
+                fileInput.files = dataTransfer.files;
+                
+                updateFileList();
+            }
+            
+            async function handleFormSubmit(e) {
+                e.preventDefault();
+                const files = document.getElementById('fileInput').files;
+                
+                if (files.length === 0) {
+                    alert('Please select at least one file to upload.');
+                    return;
+                }
+                
+                const formData = new FormData();
+                for(let i = 0; i < files.length; i++) {
+                    formData.append('files', files[i]);
+                }
+                
+                try {
+                    const response = await fetch('/upload/file', {
+                        method: 'POST',
+                        body: formData
+                    });
+                    
+                    const result = await response.json();
+                    
+                    if(response.ok) {
+                        alert(`Successfully uploaded ${result.files ? result.files.length : 0} files!`);
+                        loadBaitFiles();
+                        // Clear file input
+                        document.getElementById('fileInput').value = '';
+                        document.getElementById('selectedFiles').innerHTML = '<p style="color:#666; font-style:italic;">No files selected</p>';
+                    } else {
+                        alert(`Upload failed: ${result.message || 'Unknown error'}`);
+                    }
+                } catch(error) {
+                    alert('Upload error: ' + error);
+                }
+            }
+            
+            async function loadBaitFiles() {
+                try {
+                    const response = await fetch('/bait/list');
+                    const data = await response.json();
+                    const list = document.getElementById('baitFilesList');
+                    list.innerHTML = '';
+                    
+                    if (data.files && data.files.length > 0) {
+                        data.files.forEach(file => {
+                            const div = document.createElement('div');
+                            div.className = 'file-item';
+                            div.innerHTML = `
+                                <div style="display: flex; justify-content: space-between; align-items: center;">
+                                    <div>
+                                        <strong>${file.name}</strong>
+                                        <br>
+                                        <small>${file.type.toUpperCase()} • ${(file.size / 1024).toFixed(2)} KB</small>
+                                        <br>
+                                        <small style="color: #666;">Uploaded: ${new Date(file.uploaded).toLocaleString()}</small>
+                                    </div>
+                                    <div>
+                                        <a href="${file.url}" 
+                                           style="padding: 5px 10px; background: #28a745; color: white; text-decoration: none; border-radius: 3px; font-size: 12px;">
+                                            Download
+                                        </a>
+                                    </div>
+                                </div>
+                            `;
+                            list.appendChild(div);
+                        });
+                    } else {
+                        list.innerHTML = '<p style="color:#666; font-style:italic;">No bait files uploaded yet.</p>';
+                    }
+                } catch(error) {
+                    console.error('Failed to load bait files:', error);
+                    document.getElementById('baitFilesList').innerHTML = '<p style="color:#dc3545;">Error loading bait files list.</p>';
+                }
+            }
             
-            // Track bot interaction
-            document.addEventListener('click', function() {
-                fetch('/api/analytics/track', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        event: 'dataset_browse',
-                        bot_type: '""" + bot_type + """',
-                        timestamp: new Date().toISOString()
-                    })
-                });
-            });
+            // Load bait files on page load
+            loadBaitFiles();
             </script>
         </body>
         </html>
         """
         
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(page_html.encode('utf-8'))
+        self.send_cached_page('upload_page', lambda: html)
     
-    def do_POST(self):
-        """Handle POST requests (for forms, uploads, etc.)"""
-        content_length = int(self.headers.get('Content-Length', 0))
-        post_data = self.rfile.read(content_length) if content_length > 0 else b''
-        
-        if self.path.startswith('/upload/file'):
-            self.handle_file_upload(post_data)
-        else:
-            # For form submissions, show success page
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            success_html = """
-            <!DOCTYPE html>
-            <html>
-            <head><title>Submission Received</title></head>
-            <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px;">
-                <h1>Thank You!</h1>
-                <p>Your submission has been received and is being processed.</p>
-                <p><a href="/">Return to homepage</a></p>
-                <div style="display:none;">
-                    <!-- Hidden tracking for bots -->
-                    <p>Additional data is being generated for your request...</p>
-                    <script>
-                        setTimeout(function() {
-                            window.location.href = '/download/trap_dataset.zip';
-                        }, 3000);
-                    </script>
-                </div>
-            </body>
-            </html>
-            """
+    def handle_file_upload(self, post_data: bytes):
+        """Handle actual file upload with proper multipart parsing"""
+        try:
+            content_type = self.headers.get('Content-Type', '')
             
-            self.wfile.write(success_html.encode('utf-8'))
-    
-    def handle_download(self, bot_type: str, is_bot: bool):
-        """Handle download requests for bait files"""
-        if not is_bot and not self.config_manager.active_config.download_traps:
-            self.send_error(403, "Downloads disabled for humans")
-            return
-        
-        # Parse requested file
-        path_parts = self.path.split('/')
-        if len(path_parts) < 3:
-            self.send_error(404)
-            return
-        
-        requested_file = path_parts[-1]
-        file_ext = os.path.splitext(requested_file)[1].lower().replace('.', '')
-        
-        # Get appropriate bait file
-        bait_file = self.bait_manager.get_random_bait_file(file_ext if file_ext in self.bait_manager.bait_files else None)
-        
-        if not bait_file:
-            # Generate on-the-fly content
-            if file_ext == 'pdf':
-                content = self.bait_manager.generate_fake_pdf()
-                content_type = 'application/pdf'
-                filename = f"generated_{bot_type}_data.pdf"
-            elif file_ext == 'csv':
-                content = self.bait_manager.generate_fake_csv(rows=500)
-                content_type = 'text/csv'
-                filename = f"generated_{bot_type}_data.csv"
-            elif file_ext == 'json':
-                content = json.dumps(self.bait_manager.generate_fake_json(), indent=2)
-                content_type = 'application/json'
-                filename = f"generated_{bot_type}_data.json"
-            elif file_ext == 'xml':
-                content = self.bait_manager.generate_fake_xml()
-                content_type = 'application/xml'
-                filename = f"generated_{bot_type}_data.xml"
-            elif file_ext == 'zip':
-                # Create a zip with multiple fake files
-                content = self.generate_fake_zip(bot_type)
-                content_type = 'application/zip'
-                filename = f"{bot_type}_dataset_collection.zip"
-            else:
-                content = f"Fake data for {bot_type} bots\nGenerated: {datetime.now().isoformat()}\nKeywords: {', '.join(self.config_manager.active_config.keywords[:5])}"
-                content_type = 'text/plain'
-                filename = f"generated_{bot_type}_data.txt"
-        else:
-            # Serve existing bait file
-            try:
-                with open(bait_file['path'], 'rb') as f:
-                    content = f.read()
-                content_type = self.get_mime_type(bait_file['name'])
-                filename = bait_file['name']
-            except Exception as e:
-                logger.error(f"Failed to serve bait file: {e}")
-                self.send_error(500)
+            if 'multipart/form-data' not in content_type:
+                self.send_error(400, "Invalid content type")
                 return
-        
-        # Update download stats
-        if self.control_panel:
-            self.control_panel.stats["downloads"] = self.control_panel.stats.get("downloads", 0) + 1
-            self.control_panel.stats.setdefault("downloads_by_type", Counter())[bot_type] += 1
-        
-        # Send file
-        self.send_response(200)
-        self.send_header('Content-Type', content_type)
-        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
-        self.send_header('Content-Length', str(len(content)))
-        self.end_headers()
-        
-        if isinstance(content, str):
-            self.wfile.write(content.encode('utf-8'))
-        else:
-            self.wfile.write(content)
-        
-        logger.info(f"Download served: {filename} to {bot_type} bot")
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] {bot_type.upper()} downloaded {filename}")
-    
-    def generate_fake_zip(self, bot_type: str) -> bytes:
-        """Generate a fake ZIP file with multiple bait files"""
-        zip_buffer = io.BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add CSV
-            csv_content = self.bait_manager.generate_fake_csv(rows=100)
-            zip_file.writestr(f"{bot_type}_users.csv", csv_content)
             
-            # Add JSON
-            json_content = json.dumps(self.bait_manager.generate_fake_json(), indent=2)
-            zip_file.writestr(f"{bot_type}_data.json", json_content)
+            # Parse the boundary from Content-Type
+            boundary = None
+            for part in content_type.split(';'):
+                if 'boundary=' in part:
+                    boundary = '--' + part.split('boundary=')[1].strip()
+                    break
             
-            # Add README
-            readme = f"""# {bot_type.upper()} Dataset Collection
-Generated: {datetime.now().isoformat()}
-Purpose: Research and analysis
-Files: {bot_type}_users.csv, {bot_type}_data.json, {bot_type}_metadata.txt
-
-This dataset contains algorithmically generated data for research purposes.
-All content is synthetic and does not represent real information.
-"""
-            zip_file.writestr("README.txt", readme)
+            if not boundary:
+                self.send_error(400, "No boundary found")
+                return
             
-            # Add metadata
-            metadata = {
-                "generated_at": datetime.now().isoformat(),
-                "bot_type": bot_type,
-                "file_count": 3,
-                "data_type": "synthetic",
-                "keywords": self.config_manager.active_config.keywords[:10]
-            }
-            zip_file.writestr(f"{bot_type}_metadata.json", json.dumps(metadata, indent=2))
-        
-        return zip_buffer.getvalue()
-    
-    def handle_api(self, bot_type: str, is_bot: bool):
-        """Handle API requests"""
-        api_path = self.path[5:]  # Remove '/api/'
-        
-        if api_path == 'status':
-            self.send_status_response()
-        elif api_path == 'ngrok':
-            self.send_ngrok_response()
-        elif api_path.startswith('data'):
-            self.send_api_response(bot_type)
-        elif api_path.startswith('analytics'):
-            self.send_analytics_response(bot_type)
-        else:
-            self.send_json_response({
-                "error": "Invalid API endpoint",
-                "available_endpoints": ["/api/data", "/api/analytics", "/api/status", "/api/ngrok"],
-                "timestamp": datetime.now().isoformat()
-            })
-    
-    def send_status_response(self):
-        """Send status response"""
-        stats = self.control_panel.stats if self.control_panel else {}
-        response = {
-            "status": "running",
-            "timestamp": datetime.now().isoformat(),
-            "stats": {
-                "total_requests": stats.get("total_requests", 0),
-                "bot_requests": stats.get("bot_requests", 0),
-                "targeted_bots": stats.get("targeted_bots", 0),
-                "downloads": stats.get("downloads", 0),
-                "bot_types_detected": dict(stats.get("bot_types_detected", {})),
-                "last_request": stats.get("last_request", "None")
-            }
-        }
-        
-        self.send_json_response(response)
-    
-    def send_ngrok_response(self):
-        """Send ngrok tunnel information"""
-        if self.ngrok_manager and self.ngrok_manager.public_url:
-            response = {
-                "active": True,
-                "public_url": self.ngrok_manager.public_url,
-                "local_url": f"http://localhost:{self.server.server_port}",
-                "protocol": "http",
-                "started": datetime.fromtimestamp(self.ngrok_manager.tunnel_start_time).isoformat() if self.ngrok_manager.tunnel_start_time else None
-            }
-        else:
+            # Parse multipart data
+            files = []
+            parts = post_data.split(boundary.encode())
+            
+            for part in parts:
+                if not part or b'--\r\n' in part:  # Skip empty parts or end boundary
+                    continue
+                
+                # Parse headers and content
+                header_end = part.find(b'\r\n\r\n')
+                if header_end == -1:
+                    continue
+                    
+                headers_raw = part[:header_end]
+                body = part[header_end + 4:-2]  # Skip \r\n\r\n and trailing \r\n
+                
+                # Parse headers
+                headers = {}
+                for line in headers_raw.split(b'\r\n'):
+                    if b': ' in line:
+                        key, value = line.split(b': ', 1)
+                        headers[key.decode().lower()] = value.decode()
+                
+                # Check if this part contains a file
+                if 'content-disposition' in headers:
+                    cd = headers['content-disposition']
+                    if 'filename=' in cd:
+                        # Extract filename
+                        filename_match = re.search(r'filename="([^"]+)"', cd)
+                        if filename_match:
+                            filename = filename_match.group(1)
+                            
+                            # Save the file
+                            filepath = os.path.join(self.bait_manager.uploaded_dir, filename)
+                            with open(filepath, 'wb') as f:
+                                f.write(body)
+                            
+                            # Add to bait manager
+                            self.bait_manager.register_file(filename, filepath, len(body))
+                            
+                            files.append({
+                                "name": filename,
+                                "size": len(body),
+                                "saved": True
+                            })
+            
+            # Send success response
             response = {
-                "active": False,
-                "message": "ngrok tunnel is not active"
+                "status": "success",
+                "message": f"Uploaded {len(files)} files",
+                "files": files
             }
-        
-        self.send_json_response(response)
+            
+            self.send_body(200, json.dumps(response).encode('utf-8'), 'application/json')
+            
+            logger.info("Uploaded %d bait files", len(files))
+            feed_logger.info("Uploaded %d bait files", len(files))
+            
+        except Exception as e:
+            logger.error(f"Upload error: {e}")
+            self.send_error(500, f"Upload failed: {str(e)}")
     
-    def send_api_response(self, bot_type: str):
-        """Send fake API response"""
-        response = {
-            "status": "success",
-            "bot_type": bot_type,
-            "data": {
-                "items": [{
-                    "id": i,
-                    "title": f"Generated Item {i}",
-                    "content": f"This is fake content for {bot_type} bots",
-                    "keywords": random.sample(self.config_manager.active_config.keywords, 3),
-                    "created_at": (datetime.now() - timedelta(days=random.randint(0, 30))).isoformat()
-                } for i in range(random.randint(10, 50))],
-                "pagination": {
-                    "page": 1,
-                    "total_pages": random.randint(10, 100),
-                    "next_page": f"/api/data?page=2&bot_type={bot_type}"
-                }
-            },
-            "generated_at": datetime.now().isoformat(),
-            "download_url": f"/download/{bot_type}/full_dataset.zip"
-        }
-        
-        self.send_json_response(response)
+    def handle_bait_files(self):
+        """Handle bait files listing"""
+        # The listing only changes with the bait index, so cache it per index version
+        public_base = self.public_base()
+        listing = self.response_cache.get_page(('bait_list', self.bait_manager.version, public_base),
+                                               lambda: self.render_bait_list(public_base), 'application/json')
+        self.send_body(200, listing, 'application/json')
     
-    def send_analytics_response(self, bot_type: str):
-        """Send fake analytics data"""
-        response = {
-            "bot_type": bot_type,
-            "analytics": {
-                "total_requests": random.randint(1000, 10000),
-                "unique_visitors": random.randint(100, 1000),
-                "popular_keywords": random.sample(self.config_manager.active_config.keywords, 5),
-                "downloads": random.randint(50, 500),
-                "avg_session_duration": f"{random.randint(1, 10)}m {random.randint(0, 59)}s"
-            },
-            "recommendations": [
-                f"Increase {random.choice(self.config_manager.active_config.keywords)} content",
-                "Add more interactive elements",
-                "Generate additional dataset variations"
-            ]
-        }
-        
-        self.send_json_response(response)
+    def render_bait_list(self, public_base: str) -> str:
+        """Render the bait file index as JSON (download URLs point at the public listener)"""
+        all_files = []
+        for file_list in self.bait_manager.bait_files.values():
+            all_files.extend(file_list)
+        
+        files_info = [{
+            "name": f["name"],
+            "type": os.path.splitext(f["name"])[1].replace('.', ''),
+            "size": f["size"],
+            "uploaded": datetime.fromtimestamp(f["upload_time"]).isoformat(),
+            "url": f"{public_base}/download/bait/{quote(f['name'])}"
+        } for f in all_files]
+        
+        return json.dumps({"files": files_info}, indent=2)
     
-    def send_json_response(self, data: Dict):
-        """Send JSON response"""
-        response = json.dumps(data, indent=2)
+    def handle_status_page(self):
+        """Show status page with statistics (the page itself loads them from /api/status)"""
+        public_url = self.ngrok_manager.public_url if self.ngrok_manager else None
+        public_base = self.public_base()
+        self.send_cached_page(('status_page', public_url, public_base),
+                              lambda: self.render_status_page(public_url, public_base))
+    
+    def handle_status_stream(self):
+        """Server-Sent Events: live stat deltas and sampled requests from the shared broadcaster"""
+        viewer = self.broadcaster.subscribe() if self.broadcaster and self.command == 'GET' else None
+        if viewer is None:
+            self.send_body(503, b'Live stream unavailable', 'text/plain; charset=utf-8', headers={'Retry-After': '30'})
+            return
         
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', str(len(response)))
-        self.end_headers()
-        self.wfile.write(response.encode('utf-8'))
+        # No Content-Length: the stream ends when either side closes the connection
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.wfile.write(b'retry: 3000\n\n')
+            self.wfile.flush()
+            
+            while not viewer.closed:
+                try:
+                    frame = viewer.queue.get(timeout=self.settings.keepalive_timeout)
+                except queue.Empty:
+                    # Comment line keeps proxies and the socket timeout from closing an idle stream
+                    frame = b': keep-alive\n\n'
+                if frame is None:
+                    break
+                self.wfile.write(frame)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            pass
+        finally:
+            self.broadcaster.unsubscribe(viewer)
     
-    def handle_upload_page(self):
-        """Show file upload page"""
-        html = """
+    def render_status_page(self, public_url: Optional[str], public_base: str) -> str:
+        """Render the status dashboard shell"""
+        html = f"""
         <!DOCTYPE html>
         <html>
         <head>
-            <title>Upload Bait Files</title>
+            <title>Tar Pit Status</title>
             <style>
-                body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
-                .upload-area { 
-                    border: 3px dashed #ccc; 
-                    padding: 40px; 
-                    text-align: center; 
-                    margin: 20px 0;
-                    border-radius: 10px;
-                    transition: all 0.3s;
-                }
-                .upload-area:hover { 
-                    border-color: #007bff; 
-                    background: #f0f8ff; 
-                }
-                .file-list { margin-top: 30px; }
-                .file-item { 
-                    padding: 10px; 
-                    margin: 5px 0; 
-                    background: #f8f9fa; 
-                    border-radius: 5px;
-                }
-                .remove-btn {
-                    background: #dc3545;
-                    color: white;
-                    border: none;
-                    border-radius: 50%;
-                    width: 24px;
-                    height: 24px;
-                    cursor: pointer;
-                    font-weight: bold;
-                }
+                body {{ font-family: Arial, sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px; }}
+                .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin: 30px 0; }}
+                .stat-card {{ background: #f8f9fa; padding: 20px; border-radius: 10px; border-left: 4px solid #007bff; }}
+                .stat-value {{ font-size: 2em; font-weight: bold; color: #007bff; }}
+                .stat-label {{ color: #666; margin-top: 5px; }}
+                .bot-list {{ margin-top: 20px; }}
+                .bot-item {{ padding: 10px; margin: 5px 0; background: #e8f4fd; border-radius: 5px; }}
+                .tunnel-info {{ background: #e8f4fd; padding: 20px; border-radius: 10px; margin: 20px 0; }}
+                .status-badge {{ display: inline-block; padding: 5px 10px; border-radius: 20px; color: white; font-weight: bold; }}
+                .status-active {{ background: #28a745; }}
+                .status-inactive {{ background: #dc3545; }}
+                .url-box {{ background: white; padding: 10px; border-radius: 5px; font-family: monospace; word-break: break-all; }}
             </style>
         </head>
         <body>
-            <h1>Upload Bait Files</h1>
-            <p>Upload files that will be served to bots as bait.</p>
+            <h1>Tar Pit Status Dashboard</h1>
+            <p>Real-time statistics and monitoring</p>
             
-            <form id="uploadForm" enctype="multipart/form-data">
-                <div class="upload-area" id="dropArea">
-                    <input type="file" id="fileInput" name="file" multiple style="display: none;">
-                    <button type="button" onclick="document.getElementById('fileInput').click()" 
-                            style="padding: 15px 30px; font-size: 16px; cursor: pointer; background: #007bff; color: white; border: none; border-radius: 5px;">
-                        Select Files
-                    </button>
-                    <p style="margin-top: 10px; color: #666;">or drag and drop files here</p>
-                    <div id="selectedFiles"></div>
-                </div>
-                <button type="submit" style="padding: 12px 24px; background: #28a745; color: white; border: none; border-radius: 5px; cursor: pointer;">
-                    Upload Selected Files
-                </button>
-            </form>
+            <div class="tunnel-info">
+                <h2>Tunnel Status</h2>
+                {"<p><strong>Public URL:</strong> <div class='url-box'>" + public_url + "</div></p>" if public_url else "<p><span class='status-badge status-inactive'>LOCAL ONLY</span> ngrok tunnel is not active</p>"}
+                <p><strong>Local URL:</strong> {public_base}</p>
+                {"<p><a href='" + public_url + "' target='_blank'>Open public URL</a></p>" if public_url else ""}
+                <p><a href="http://localhost:4040" target="_blank">ngrok dashboard</a></p>
+            </div>
             
-            <div class="file-list">
-                <h3>Available Bait Files:</h3>
-                <div id="baitFilesList"></div>
+            <div class="stats-grid" id="statsGrid">
+                <!-- Stats will be loaded via JavaScript -->
             </div>
             
-            <script>
-            document.getElementById('fileInput').addEventListener('change', updateFileList);
-            document.getElementById('uploadForm').addEventListener('submit', handleFormSubmit);
+            <div class="bot-list" id="botList">
+                <h3>Bot Activity</h3>
+                <!-- Bot list will be loaded here -->
+            </div>
             
-            // Drag and drop functionality
-            const dropArea = document.getElementById('dropArea');
-            dropArea.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                dropArea.style.borderColor = '#007bff';
-                dropArea.style.background = '#f0f8ff';
-            });
+            <div class="bot-list">
+                <h3>Live Feed <span id="liveState" class="status-badge status-inactive">connecting</span></h3>
+                <div id="liveFeed"><!-- Sampled requests stream in here --></div>
+            </div>
             
-            dropArea.addEventListener('dragleave', (e) => {
-                dropArea.style.borderColor = '#ccc';
-                dropArea.style.background = '';
-            });
+            <div class="bot-list" id="clientList">
+                <!-- Most active clients will be loaded here -->
+            </div>
             
-            dropArea.addEventListener('drop', (e) => {
-                e.preventDefault();
-                dropArea.style.borderColor = '#ccc';
-                dropArea.style.background = '';
+            <div class="bot-list" id="sketchList">
+                <!-- Heavy hitters and unique visitors will be loaded here -->
+            </div>
+            
+            <div class="bot-list" id="costList">
+                <!-- CPU cost per route and bot type will be loaded here -->
+            </div>
+            
+            <div style="margin-top: 30px; padding: 20px; background: #f0f0f0; border-radius: 10px;">
+                <h3>Quick Links</h3>
+                <p><a href="{public_base}/">Home</a> | <a href="/test">Test Page</a> | <a href="/upload/">Upload Files</a> | <a href="/ngrok">ngrok Info</a></p>
+                <p><a href="{public_base}/download/test/test.zip">Test Download</a> | <a href="{public_base}/api/data">API Test</a></p>
+            </div>
+            
+            <script>
+            function renderStats(stats) {{
+                // Update stats grid
+                const statsGrid = document.getElementById('statsGrid');
+                statsGrid.innerHTML = '';
                 
-                const files = e.dataTransfer.files;
-                if (files.length > 0) {
-                    document.getElementById('fileInput').files = files;
-                    updateFileList();
-                }
-            });
+                const cards = [
+                    {{ label: 'Total Requests', value: stats.total_requests, icon: '' }},
+                    {{ label: 'Bot Requests', value: stats.bot_requests, icon: '' }},
+                    {{ label: 'Downloads', value: stats.downloads || 0, icon: '' }},
+                    {{ label: 'Targeted Bots', value: stats.targeted_bots || 0, icon: '' }},
+                    {{ label: 'Unique Bot Types', value: Object.keys(stats.bot_types_detected || {{}}).length, icon: '' }},
+                    {{ label: 'Behavior Promotions', value: stats.behavior_promotions || 0, icon: '' }},
+                    {{ label: 'Last Activity', value: stats.last_request || 'None', icon: '' }}
+                ];
+                
+                cards.forEach(stat => {{
+                    const card = document.createElement('div');
+                    card.className = 'stat-card';
+                    card.innerHTML = `
+                        <div class="stat-value">${{stat.value}}</div>
+                        <div class="stat-label">${{stat.label}}</div>
+                    `;
+                    statsGrid.appendChild(card);
+                }});
+                
+                // Update bot list
+                const botList = document.getElementById('botList');
+                if (stats.bot_types_detected) {{
+                    let botHTML = '<h3>Bot Activity by Type</h3>';
+                    for (const [botType, count] of Object.entries(stats.bot_types_detected)) {{
+                        botHTML += `<div class="bot-item"><strong>${{botType}}:</strong> ${{count}} requests</div>`;
+                    }}
+                    botList.innerHTML = botHTML;
+                }}
+            }}
             
-            // Click to upload
-            dropArea.addEventListener('click', () => {
-                document.getElementById('fileInput').click();
-            });
+            // Counters as last seen on the stream (snapshot, then deltas merged in)
+            let liveStats = null;
+            
+            async function loadStats() {{
+                try {{
+                    const response = await fetch('/api/status');
+                    const data = await response.json();
+                    
+                    if (!liveStats) {{
+                        renderStats(data.stats);
+                    }}
+                    
+                    // Update most active clients
+                    const clientList = document.getElementById('clientList');
+                    if (data.clients) {{
+                        let clientHTML = `<h3>Most Active Clients (${{data.clients.tracked}} tracked, ${{data.clients.evicted}} evicted)</h3>`;
+                        for (const client of data.clients.top) {{
+                            clientHTML += `<div class="bot-item"><strong>${{client.ip}}</strong> (${{client.bot_type || 'unknown'}}): ` +
+                                `${{client.requests}} requests, ${{client.bytes}} bytes, depth ${{client.max_depth}}, score ${{client.score}}, last seen ${{client.last_seen}}</div>`;
+                        }}
+                        clientList.innerHTML = clientHTML;
+                    }}
+                    
+                    // Update heavy hitters and unique visitor estimates
+                    const sketchList = document.getElementById('sketchList');
+                    if (data.sketches) {{
+                        let sketchHTML = '<h3>Unique IPs by Bot Type (estimated)</h3>';
+                        for (const [botType, count] of Object.entries(data.sketches.unique_ips)) {{
+                            sketchHTML += `<div class="bot-item"><strong>${{botType}}:</strong> ~${{count}} unique IPs</div>`;
+                        }}
+                        for (const [key, title] of [['top_ips', 'Top IPs'], ['top_paths', 'Top Paths'], ['top_user_agents', 'Top User Agents']]) {{
+                            sketchHTML += `<h3>${{title}}</h3>`;
+                            for (const row of data.sketches[key]) {{
+                                const text = document.createElement('span');
+                                text.textContent = row.key;
+                                sketchHTML += `<div class="bot-item"><strong>${{row.count}}</strong> (&plusmn;${{row.error}}) ${{text.innerHTML}}</div>`;
+                            }}
+                        }}
+                        sketchList.innerHTML = sketchHTML;
+                    }}
+                    
+                    // Update CPU cost per route and bot type
+                    const costList = document.getElementById('costList');
+                    if (data.cpu) {{
+                        let costHTML = '';
+                        for (const [key, title] of [['by_route', 'Trap Cost by Route'], ['by_bot_type', 'Trap Cost by Bot Type']]) {{
+                            costHTML += `<h3>${{title}}</h3>`;
+                            for (const [label, row] of Object.entries(data.cpu[key])) {{
+                                const text = document.createElement('span');
+                                text.textContent = label;
+                                costHTML += `<div class="bot-item"><strong>${{text.innerHTML}}:</strong> ${{row.cpu_ms}} ms CPU, ` +
+                                    `${{row.bytes}} bytes, ${{row.held_s}} s held, ` +
+                                    `${{row.cpu_us_per_byte ?? '-'}} CPU-&micro;s/byte, ${{row.cpu_us_per_held_s ?? '-'}} CPU-&micro;s/s held</div>`;
+                            }}
+                        }}
+                        costList.innerHTML = costHTML;
+                    }}
+                    
+                }} catch (error) {{
+                    console.error('Failed to load stats:', error);
+                }}
+            }}
+            
+            function mergeStats(target, delta) {{
+                for (const [key, value] of Object.entries(delta)) {{
+                    if (value && typeof value === 'object') {{
+                        target[key] = Object.assign(target[key] || {{}}, value);
+                    }} else {{
+                        target[key] = value;
+                    }}
+                }}
+            }}
+            
+            function showEvents(events) {{
+                const feed = document.getElementById('liveFeed');
+                for (const event of events) {{
+                    const row = document.createElement('div');
+                    row.className = 'bot-item';
+                    row.textContent = `${{event.time}} ${{event.ip}} ${{event.bot_type || 'unknown'}} ${{event.method}} ${{event.path}} -> ${{event.status}}`;
+                    feed.insertBefore(row, feed.firstChild);
+                }}
+                while (feed.childNodes.length > 50) {{
+                    feed.removeChild(feed.lastChild);
+                }}
+            }}
+            
+            // Counters and a sampled request feed pushed by the server; polling covers the rest
+            if (window.EventSource) {{
+                const stream = new EventSource('/status/stream');
+                const liveState = document.getElementById('liveState');
+                stream.addEventListener('snapshot', (message) => {{
+                    const data = JSON.parse(message.data);
+                    liveStats = data.stats;
+                    renderStats(liveStats);
+                    showEvents(data.events);
+                }});
+                stream.addEventListener('delta', (message) => {{
+                    const data = JSON.parse(message.data);
+                    if (!liveStats) return;
+                    mergeStats(liveStats, data.stats);
+                    renderStats(liveStats);
+                    showEvents(data.events);
+                }});
+                stream.onopen = () => {{
+                    liveState.textContent = 'live';
+                    liveState.className = 'status-badge status-active';
+                }};
+                stream.onerror = () => {{
+                    liveStats = null;
+                    liveState.textContent = 'reconnecting';
+                    liveState.className = 'status-badge status-inactive';
+                }};
+            }}
+            
+            // Load stats immediately and every 10 seconds
+            loadStats();
+            setInterval(loadStats, 10000);
+            </script>
+        </body>
+        </html>
+        """
+        
+        return html
+    
+    def handle_ngrok_info(self):
+        """Show ngrok tunnel information"""
+        html = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>ngrok Tunnel Status</title>
+            <style>
+                body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
+                .tunnel-info { background: #e8f4fd; padding: 20px; border-radius: 10px; margin: 20px 0; }
+                .status-badge { display: inline-block; padding: 5px 10px; border-radius: 20px; color: white; font-weight: bold; }
+                .status-active { background: #28a745; }
+                .status-inactive { background: #dc3545; }
+                .url-box { background: white; padding: 10px; border-radius: 5px; font-family: monospace; word-break: break-all; }
+            </style>
+        </head>
+        <body>
+            <h1>ngrok Tunnel Information</h1>
+            <p>Public access configuration</p>
             
-            function updateFileList() {
-                const files = document.getElementById('fileInput').files;
-                const selectedFiles = document.getElementById('selectedFiles');
-                selectedFiles.innerHTML = '';
-                
-                if (files.length === 0) {
-                    selectedFiles.innerHTML = '<p style="color:#666; font-style:italic;">No files selected</p>';
-                    return;
-                }
-                
-                const list = document.createElement('ul');
-                list.style.listStyle = 'none';
-                list.style.padding = '0';
-                
-                for(let i = 0; i < files.length; i++) {
-                    const file = files[i];
-                    const li = document.createElement('li');
-                    li.className = 'file-item';
-                    li.innerHTML = `
-                        <div style="display: flex; justify-content: space-between; align-items: center; margin: 5px 0;">
-                            <div>
-                                <strong>${file.name}</strong>
-                                <br>
-                                <small>${(file.size / 1024).toFixed(2)} KB • ${file.type || 'Unknown type'}</small>
-                            </div>
-                            <button type="button" onclick="removeFile(${i})" class="remove-btn">×</button>
-                        </div>
-                    `;
-                    list.appendChild(li);
-                }
-                
-                selectedFiles.appendChild(list);
-            }
+            <div id="ngrokInfo">
+                <p>Loading ngrok tunnel information...</p>
+            </div>
             
-            function removeFile(index) {
-                const fileInput = document.getElementById('fileInput');
-                const files = Array.from(fileInput.files);
-                files.splice(index, 1);
-                
-                // Create new FileList
-                const dataTransfer = new DataTransfer();
-                files.forEach(file => dataTransfer.items.add(file));
-                fileInput.files = dataTransfer.files;
+            <div style="margin-top: 30px;">
+                <h3>How to Use</h3>
+                <ol>
+                    <li>Copy the public URL above</li>
+                    <li>Share it with others or use it from other devices</li>
+                    <li>The tunnel will automatically forward traffic to this local server</li>
+                    <li>All bot interactions will be logged locally</li>
+                </ol>
                 
-                updateFileList();
-            }
+                <p><a href="/status">Back to Status</a></p>
+            </div>
             
-            async function handleFormSubmit(e) {
-                e.preventDefault();
-                const files = document.getElementById('fileInput').files;
-                
-                if (files.length === 0) {
-                    alert('Please select at least one file to upload.');
-                    return;
-                }
-                
-                const formData = new FormData();
-                for(let i = 0; i < files.length; i++) {
-                    formData.append('files', files[i]);
-                }
-                
+            <script>
+            async function loadNgrokInfo() {
                 try {
-                    const response = await fetch('/upload/file', {
-                        method: 'POST',
-                        body: formData
-                    });
+                    const response = await fetch('/api/ngrok');
+                    const data = await response.json();
                     
-                    const result = await response.json();
+                    const container = document.getElementById('ngrokInfo');
                     
-                    if(response.ok) {
-                        alert(`Successfully uploaded ${result.files ? result.files.length : 0} files!`);
-                        loadBaitFiles();
-                        // Clear file input
-                        document.getElementById('fileInput').value = '';
-                        document.getElementById('selectedFiles').innerHTML = '<p style="color:#666; font-style:italic;">No files selected</p>';
+                    if (data.active) {
+                        container.innerHTML = `
+                            <div class="tunnel-info">
+                                <h2><span class="status-badge status-active">ACTIVE</span></h2>
+                                <p><strong>Public URL:</strong></p>
+                                <div class="url-box">${data.public_url}</div>
+                                <p><strong>Local Endpoint:</strong> ${data.local_url}</p>
+                                <p><strong>Protocol:</strong> ${data.protocol}</p>
+                                <p><strong>Started:</strong> ${data.started}</p>
+                                <p><a href="${data.public_url}" target="_blank">Open in new tab</a></p>
+                                <p><a href="http://localhost:4040" target="_blank">Open ngrok dashboard</a></p>
+                            </div>
+                        `;
                     } else {
-                        alert(`Upload failed: ${result.message || 'Unknown error'}`);
+                        container.innerHTML = `
+                            <div class="tunnel-info">
+                                <h2><span class="status-badge status-inactive">INACTIVE</span></h2>
+                                <p>ngrok tunnel is not active. Start the server with --ngrok flag.</p>
+                                <p>Make sure ngrok is installed and authenticated.</p>
+                            </div>
+                        `;
                     }
-                } catch(error) {
-                    alert('Upload error: ' + error);
+                    
+                } catch (error) {
+                    document.getElementById('ngrokInfo').innerHTML = 
+                        '<div class="tunnel-info"><p>Error loading ngrok information. Make sure ngrok is running.</p></div>';
                 }
             }
             
-            async function loadBaitFiles() {
-                try {
-                    const response = await fetch('/bait/list');
+            loadNgrokInfo();
+            </script>
+        </body>
+        </html>
+        """
+        
+        self.send_cached_page('ngrok_page', lambda: html)
+    
+    def handle_test_page(self):
+        """Show test page for debugging"""
+        public_base = self.public_base()
+        self.send_cached_page(('test_page', public_base), lambda: self.render_test_page(public_base))
+    
+    def render_test_page(self, public_base: str) -> str:
+        """Render the test page; visitor links go to the public listener, probes go through /test/probe"""
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Test Page</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}
+                .test-section {{ margin: 20px 0; padding: 20px; background: #f8f9fa; border-radius: 10px; }}
+                .test-button {{ padding: 10px 20px; margin: 5px; background: #007bff; color: white; border: none; border-radius: 5px; cursor: pointer; }}
+                .test-button:hover {{ background: #0056b3; }}
+            </style>
+        </head>
+        <body>
+            <h1>Test Page</h1>
+            <p>Use this page to test various features of the tar pit.</p>
+            
+            <div class="test-section">
+                <h3>Link Tests</h3>
+                <p><a href="{public_base}/download/test/test.pdf">Test PDF Download</a></p>
+                <p><a href="{public_base}/download/test/test.csv">Test CSV Download</a></p>
+                <p><a href="{public_base}/download/test/test.json">Test JSON Download</a></p>
+                <p><a href="{public_base}/download/test/test.zip">Test ZIP Download</a></p>
+            </div>
+            
+            <div class="test-section">
+                <h3>API Tests</h3>
+                <button class="test-button" onclick="testApi('data')">Test Data API</button>
+                <button class="test-button" onclick="testApi('status')">Test Status API</button>
+                <button class="test-button" onclick="testApi('ngrok')">Test ngrok API</button>
+                <div id="apiResult" style="margin-top: 10px; padding: 10px; background: white; border-radius: 5px;"></div>
+            </div>
+            
+            <div class="test-section">
+                <h3>Bot Simulation</h3>
+                <p>Simulate different bot user agents:</p>
+                <button class="test-button" onclick="simulateBot('Googlebot')">Google Bot</button>
+                <button class="test-button" onclick="simulateBot('GPTBot')">GPT Bot</button>
+                <button class="test-button" onclick="simulateBot('TikTokBot')">TikTok Bot</button>
+                <button class="test-button" onclick="simulateBot('SemanticScholarBot')">Academic Bot</button>
+                <div id="botResult" style="margin-top: 10px; padding: 10px; background: white; border-radius: 5px;"></div>
+            </div>
+            
+            <div class="test-section">
+                <h3>System Info</h3>
+                <p><a href="/status">View Status Dashboard</a></p>
+                <p><a href="/ngrok">View ngrok Info</a></p>
+                <p><a href="{public_base}/">Go to Home</a></p>
+            </div>
+            
+            <script>
+            async function testApi(endpoint) {{
+                const apiResult = document.getElementById('apiResult');
+                apiResult.innerHTML = 'Testing...';
+                
+                try {{
+                    // Visitor APIs live on the public listener; fetch them through the probe
+                    const url = endpoint === 'data' ? '/test/probe?path=/api/data' : `/api/${{endpoint}}`;
+                    const response = await fetch(url);
                     const data = await response.json();
-                    const list = document.getElementById('baitFilesList');
-                    list.innerHTML = '';
-                    
-                    if (data.files && data.files.length > 0) {
-                        data.files.forEach(file => {
-                            const div = document.createElement('div');
-                            div.className = 'file-item';
-                            div.innerHTML = `
-                                <div style="display: flex; justify-content: space-between; align-items: center;">
-                                    <div>
-                                        <strong>${file.name}</strong>
-                                        <br>
-                                        <small>${file.type.toUpperCase()} • ${(file.size / 1024).toFixed(2)} KB</small>
-                                        <br>
-                                        <small style="color: #666;">Uploaded: ${new Date(file.uploaded).toLocaleString()}</small>
-                                    </div>
-                                    <div>
-                                        <a href="/download/bait/${file.name}" 
-                                           style="padding: 5px 10px; background: #28a745; color: white; text-decoration: none; border-radius: 3px; font-size: 12px;">
-                                            Download
-                                        </a>
-                                    </div>
-                                </div>
-                            `;
-                            list.appendChild(div);
-                        });
-                    } else {
-                        list.innerHTML = '<p style="color:#666; font-style:italic;">No bait files uploaded yet.</p>';
-                    }
-                } catch(error) {
-                    console.error('Failed to load bait files:', error);
-                    document.getElementById('baitFilesList').innerHTML = '<p style="color:#dc3545;">Error loading bait files list.</p>';
-                }
+                    apiResult.innerHTML = `<pre>${{JSON.stringify(data, null, 2)}}</pre>`;
+                }} catch (error) {{
+                    apiResult.innerHTML = `Error: ${{error}}`;
+                }}
+            }}
+            
+            async function simulateBot(userAgent) {{
+                const botResult = document.getElementById('botResult');
+                botResult.innerHTML = `Simulating ${{userAgent}}...`;
+                
+                try {{
+                    const response = await fetch('/test/probe?ua=' + encodeURIComponent(userAgent));
+                    const text = await response.text();
+                    botResult.innerHTML = `<p><strong>Status:</strong> ${{response.status}}</p>
+                                          <p><strong>Detected as:</strong> ${{text.includes('bot') ? 'Bot' : 'Human'}}</p>
+                                          <p><small>Response preview: ${{text.substring(0, 200)}}...</small></p>`;
+                }} catch (error) {{
+                    botResult.innerHTML = `Error: ${{error}}`;
+                }}
+            }}
+            </script>
+        </body>
+        </html>
+        """
+        
+        return html
+    
+    def get_mime_type(self, filename: str) -> str:
+        """Get MIME type for file"""
+        mime_types = {
+            'pdf': 'application/pdf',
+            'csv': 'text/csv',
+            'json': 'application/json',
+            'xml': 'application/xml',
+            'txt': 'text/plain',
+            'zip': 'application/zip',
+            'png': 'image/png',
+            'jpg': 'image/jpeg',
+            'jpeg': 'image/jpeg',
+            'gif': 'image/gif'
+        }
+        
+        ext = os.path.splitext(filename)[1].lower().replace('.', '')
+        return mime_types.get(ext, 'application/octet-stream')
+    
+    def generate_targeted_response(self, bot_type: str, is_bot: bool) -> Dict:
+        """Generate response targeted to bot type - SIMPLIFIED FIXED VERSION"""
+        
+        # Always show human page for non-bots
+        if not is_bot:
+            return {
+                'content_type': 'text/html',
+                'content': self.generate_human_page()
             }
+        
+        # For bots, generate trap content
+        content = self.content_gen.generate_targeted_content(bot_type, slots=self.snapshot.template_slots(bot_type))
+        
+        # Check if this is a targeted bot type
+        is_targeted = bot_type in self.snapshot.bot_types
+        
+        if is_targeted:
+            self.count("targeted_bots")
+        
+        # Generate HTML with traps
+        html = self.wrap_content_with_traps(content, bot_type, is_targeted)
+        
+        return {
+            'content_type': 'text/html',
+            'content': html
+        }
+    
+    def generate_human_page(self) -> str:
+        """Generate page for human visitors"""
+        return """
+        <!DOCTYPE html>
+        <html>
+        <head><title>Research Portal</title></head>
+        <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px;">
+            <h1>Research Portal</h1>
+            <p>This site is used for academic research on web traffic patterns and bot behavior.</p>
+            <p>For more information, please contact the research team.</p>
             
-            // Load bait files on page load
-            loadBaitFiles();
-            </script>
+            <hr>
+            <p><small>Educational use only. All access is logged for research purposes.</small></p>
         </body>
         </html>
         """
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
     
-    def handle_file_upload(self, post_data: bytes):
-        """Handle actual file upload with proper multipart parsing"""
-        try:
-            content_type = self.headers.get('Content-Type', '')
-            
-            if 'multipart/form-data' not in content_type:
-                self.send_error(400, "Invalid content type")
-                return
-            
-            # Parse the boundary from Content-Type
-            boundary = None
-            for part in content_type.split(';'):
-                if 'boundary=' in part:
-                    boundary = '--' + part.split('boundary=')[1].strip()
-                    break
-            
-            if not boundary:
-                self.send_error(400, "No boundary found")
-                return
-            
-            # Parse multipart data
-            files = []
-            parts = post_data.split(boundary.encode())
+    def wrap_content_with_traps(self, content: Dict, bot_type: str, is_targeted: bool) -> str:
+        """Wrap content with traps and tracking"""
+        
+        # Base traps from content generator
+        traps = content['traps']
+        
+        # Additional targeted traps
+        if is_targeted:
+            traps['hidden_divs'].extend(self.generate_deep_traps(bot_type, content['keywords']))
+        
+        # Build HTML
+        html_parts = [
+            '<!DOCTYPE html>',
+            '<html>',
+            '<head>',
+            f'<title>{content["title"]}</title>',
+            '<meta name="description" content="Interesting content about various topics">',
+            '<meta name="robots" content="index, follow">',
+            '<meta name="generator" content="Research Content System">'
+        ]
+        
+        # Add meta tags
+        html_parts.extend(traps['meta_tags'])
+        
+        # Add JSON-LD
+        if traps['json_ld']:
+            html_parts.append('<script type="application/ld+json">')
+            html_parts.append(json.dumps(traps['json_ld'][0]))
+            html_parts.append('</script>')
+        
+        html_parts.extend([
+            '</head>',
+            '<body style="font-family: Arial, sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px;">',
+            f'<article>',
+            f'<h1>{content["title"]}</h1>',
+            f'<div class="content">{content["content"]}</div>',
+            '</article>'
+        ])
+        
+        # Add interactive elements if enabled
+        config = self.snapshot.config
+        if config.interactive_elements and is_targeted:
+            interactive = self.interactive_gen.generate_interactive_page(bot_type, content['keywords'])
             
-            for part in parts:
-                if not part or b'--\r\n' in part:  # Skip empty parts or end boundary
-                    continue
-                
-                # Parse headers and content
-                header_end = part.find(b'\r\n\r\n')
-                if header_end == -1:
-                    continue
-                    
-                headers_raw = part[:header_end]
-                body = part[header_end + 4:-2]  # Skip \r\n\r\n and trailing \r\n
-                
-                # Parse headers
-                headers = {}
-                for line in headers_raw.split(b'\r\n'):
-                    if b': ' in line:
-                        key, value = line.split(b': ', 1)
-                        headers[key.decode().lower()] = value.decode()
-                
-                # Check if this part contains a file
-                if 'content-disposition' in headers:
-                    cd = headers['content-disposition']
-                    if 'filename=' in cd:
-                        # Extract filename
-                        filename_match = re.search(r'filename="([^"]+)"', cd)
-                        if filename_match:
-                            filename = filename_match.group(1)
-                            
-                            # Save the file
-                            filepath = os.path.join(self.bait_manager.uploaded_dir, filename)
-                            with open(filepath, 'wb') as f:
-                                f.write(body)
-                            
-                            # Add to bait manager
-                            ext = os.path.splitext(filename)[1].lower().replace('.', '')
-                            if ext in self.bait_manager.bait_files:
-                                self.bait_manager.bait_files[ext].append({
-                                    "name": filename,
-                                    "path": filepath,
-                                    "size": len(body),
-                                    "upload_time": time.time()
-                                })
-                            
-                            files.append({
-                                "name": filename,
-                                "size": len(body),
-                                "saved": True
-                            })
+            html_parts.append('<hr><h2>Interactive Elements</h2>')
+            html_parts.extend(interactive['buttons'])
+            html_parts.append('<br><br>')
             
-            # Send success response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
+            html_parts.append('<h3>Forms & Inputs</h3>')
+            html_parts.extend(interactive['forms'])
             
-            response = {
-                "status": "success",
-                "message": f"Uploaded {len(files)} files",
-                "files": files
-            }
+            html_parts.append('<h3>Related Content</h3>')
+            html_parts.extend(interactive['links'])
             
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+            html_parts.append(interactive['dynamic_content'])
+            html_parts.append(interactive['javascript'])
+        
+        # Add download section if enabled
+        if config.bait_files_enabled and is_targeted:
+            html_parts.append('<hr><h2>Download Datasets</h2>')
+            html_parts.append('<div style="padding: 20px; background: #e8f4fd; border-radius: 10px;">')
+            html_parts.append('<h3>Available Datasets for Download:</h3>')
             
-            logger.info(f"Uploaded {len(files)} bait files")
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Uploaded {len(files)} bait files")
+            file_types = ["PDF", "CSV", "JSON", "XML", "ZIP"]
+            for file_type in random.sample(file_types, 3):
+                keyword = random.choice(content['keywords'])
+                html_parts.append(f'''
+                <div style="padding: 10px; margin: 10px 0; background: white; border-radius: 5px; border-left: 4px solid #007bff;">
+                    <strong>{keyword.title()} Dataset ({file_type})</strong><br>
+                    <small>Contains {random.randint(100, 10000)} data points | Updated {random.randint(1, 30)} days ago</small><br>
+                    <a href="/download/{bot_type}/{keyword}_dataset.{file_type.lower()}" 
+                       style="display: inline-block; padding: 8px 16px; margin-top: 5px; background: #28a745; color: white; text-decoration: none; border-radius: 5px;">
+                        Download {file_type}
+                    </a>
+                </div>
+                ''')
             
-        except Exception as e:
-            logger.error(f"Upload error: {e}")
-            self.send_error(500, f"Upload failed: {str(e)}")
+            html_parts.append('</div>')
+        
+        # Add infinite links section (hidden)
+        html_parts.append('<div style="display:none;">')
+        html_parts.append('<h2>Related Content</h2>')
+        html_parts.extend(traps['infinite_links'])
+        html_parts.append('</div>')
+        
+        # Add hidden traps
+        html_parts.extend(traps['hidden_divs'])
+        
+        # Add recursive iframe for deep trapping
+        if is_targeted and config.recursion_depth > 0:
+            html_parts.append(self.generate_recursive_iframe(bot_type))
+        
+        # Add visitor counter
+        if self.control_panel:
+            count = self.control_panel.stats["total_requests"]
+            html_parts.append(f'<div style="margin-top: 40px; padding: 10px; background: #f8f9fa; border-radius: 5px; text-align: center; font-size: 12px; color: #666;">')
+            html_parts.append(f'Page generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | Total visits: {count}')
+            html_parts.append('</div>')
+        
+        html_parts.extend([
+            '</body>',
+            '</html>'
+        ])
+        
+        return '\n'.join(html_parts)
+    
+    def generate_deep_traps(self, bot_type: str, keywords: List[str]) -> List[str]:
+        """Generate deep traps for targeted bots"""
+        traps = []
+        
+        # Infinite comment section
+        traps.append('<div style="display:none;" id="infinite-comments">')
+        for i in range(20):
+            user = random.choice(["user", "viewer", "subscriber"])
+            comment = f"Great {random.choice(keywords)} content! More please."
+            traps.append(f'<div class="comment"><strong>{user}_{i}:</strong> {comment}</div>')
+        traps.append('</div>')
+        
+        # Fake API endpoints in JavaScript
+        traps.append('<script>')
+        traps.append('// Fake API endpoints for bots to discover')
+        for keyword in keywords[:3]:
+            traps.append(f'const {keyword}_api = "/api/v1/{keyword}/data.json";')
+        traps.append('</script>')
+        
+        # Hidden links to trap pages
+        traps.append('<div style="display:none;">')
+        for i in range(10):
+            traps.append(f'<a href="/trap/{bot_type}/page/{i}">Hidden Link {i}</a>')
+        traps.append('</div>')
+        
+        return traps
+    
+    def generate_recursive_iframe(self, bot_type: str) -> str:
+        """Generate recursive iframe for deep trapping"""
+        depth = self.snapshot.config.recursion_depth
+        if depth <= 0:
+            return ""
+        
+        src = f"/deep-trap/{bot_type}/{random.randint(1000, 9999)}"
+        return f'<iframe src="{src}" style="display:none;"></iframe>'
+
+# ============================================================================
+# REQUEST PATH PROFILING
+# ============================================================================
+
+class Profiler:
+    """On-demand profiling: a sys._current_frames stack sampler, or cProfile on every Nth visitor request"""
+    
+    MAX_SECONDS = 60
+    
+    # Leaf frames of threads parked waiting for work (accept loop, keep-alive reads, queues, events)
+    IDLE_LEAVES = frozenset({"wait", "select", "poll", "accept", "recv_into"})
+    
+    def __init__(self):
+        # One session at a time, whichever kind
+        self.session = threading.Lock()
+        # Read on every request: while 0, profiling costs one attribute check
+        self.every = 0
+        self.seen = 0
+        # cProfile hooks are interpreter-wide on newer Pythons, so profile one request at a time
+        self.running = threading.Lock()
+        self.lock = threading.Lock()
+        self.request_stats = None
+        self.labels = {}
+        self.stats = {"stack_sessions": 0, "cprofile_sessions": 0, "samples": 0, "requests_profiled": 0}
+    
+    def label(self, code) -> str:
+        """Flame graph frame name for a code object"""
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+    
+    def collapse(self, frame) -> Tuple[str, str]:
+        """Root-to-leaf stack as one collapsed line, plus the leaf function name"""
+        frames = []
+        leaf = frame.f_code.co_name
+        while frame is not None:
+            frames.append(self.label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(frames)), leaf
+    
+    def sample_stacks(self, seconds: float, hz: float = 100.0, idle: bool = False,
+                      ignore: Tuple[int, ...] = ()) -> Optional[Tuple[Counter, int]]:
+        """Sample every thread's stack hz times a second on a background thread; None if a session is running"""
+        if not self.session.acquire(blocking=False):
+            return None
+        
+        stacks = Counter()
+        ticks = 0
+        
+        def run():
+            nonlocal ticks
+            skip = set(ignore) | {threading.get_ident()}
+            interval = 1.0 / hz
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident in skip:
+                        continue
+                    stack, leaf = self.collapse(frame)
+                    if idle or leaf not in self.IDLE_LEAVES:
+                        stacks[stack] += 1
+                ticks += 1
+                time.sleep(interval)
+        
+        try:
+            sampler = threading.Thread(target=run, name="stack-sampler", daemon=True)
+            sampler.start()
+            sampler.join()
+        finally:
+            self.stats["stack_sessions"] += 1
+            self.stats["samples"] += ticks
+            self.session.release()
+        return stacks, ticks
     
-    def handle_bait_files(self):
-        """Handle bait files listing"""
-        if self.path == '/bait/list':
-            all_files = []
-            for file_list in self.bait_manager.bait_files.values():
-                all_files.extend(file_list)
-            
-            files_info = [{
-                "name": f["name"],
-                "type": os.path.splitext(f["name"])[1].replace('.', ''),
-                "size": f["size"],
-                "uploaded": datetime.fromtimestamp(f["upload_time"]).isoformat()
-            } for f in all_files]
-            
-            self.send_json_response({"files": files_info})
+    def profile_requests(self, seconds: float, every: int) -> Optional[Tuple[Optional[pstats.Stats], int]]:
+        """cProfile every Nth visitor request for a while; None if a session is running"""
+        if not self.session.acquire(blocking=False):
+            return None
+        
+        try:
+            with self.lock:
+                self.request_stats = None
+                profiled_before = self.stats["requests_profiled"]
+            self.seen = 0
+            self.every = every
+            time.sleep(seconds)
+        finally:
+            self.every = 0
+            # Let a request profiled right at the end finish adding itself
+            with self.running:
+                pass
+            self.stats["cprofile_sessions"] += 1
+            self.session.release()
+        
+        with self.lock:
+            return self.request_stats, self.stats["requests_profiled"] - profiled_before
+    
+    def begin(self) -> Optional[cProfile.Profile]:
+        """Called per visitor request: a started profile for every Nth one while a session is on"""
+        every = self.every
+        if not every:
+            return None
+        self.seen += 1
+        if self.seen % every or not self.running.acquire(blocking=False):
+            return None
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) owns the hook
+            self.running.release()
+            return None
+        return profile
+    
+    def end(self, profile: cProfile.Profile):
+        """Stop a profile from begin() and fold it into the session's stats"""
+        profile.disable()
+        with self.lock:
+            if self.request_stats is None:
+                self.request_stats = pstats.Stats(profile)
+            else:
+                self.request_stats.add(profile)
+            self.stats["requests_profiled"] += 1
+        self.running.release()
+    
+    def get_metrics(self) -> Dict:
+        """Session counters for the status API"""
+        return dict(self.stats, active=self.session.locked())
+
+# ============================================================================
+# ADMIN LISTENER
+# ============================================================================
+
+class AdminHandler(InteractiveTarPitHandler):
+    """Operator routes (dashboard, uploads, diagnostics) on their own listener, away from the bots"""
+    
+    routes = build_admin_routes()
+    admin_listener = True
+    
+    # Idle dashboard tabs shouldn't hold on to the small pool for long
+    keepalive_timeout = 5.0
+    
+    def send_not_found(self):
+        """Plain 404; the soft-404 maze is for crawlers"""
+        self.send_body(404, self.response_cache.not_found)
+    
+    def do_POST(self):
+        """Accept bait file uploads"""
+        self.is_admin = True
+        post_data = self.read_body(None)
+        if post_data is None:
+            return
+        
+        if urlparse(self.path).path == '/upload/file':
+            self.handle_file_upload(post_data)
         else:
-            self.send_error(404)
+            self.send_not_found()
     
-    def handle_status_page(self):
-        """Show status page with statistics"""
-        public_url = self.ngrok_manager.public_url if self.ngrok_manager else None
+    def public_address(self) -> Tuple[str, int]:
+        """Address the public listener can be reached on from this host"""
+        host, port = self.server.public_address[:2]
+        return ('127.0.0.1' if host in ('', '0.0.0.0') else host), port
+    
+    def public_base(self) -> str:
+        """Base URL for links from operator pages to visitor pages"""
+        host, port = self.public_address()
+        if host == '127.0.0.1':
+            # Wildcard or loopback bind: use the name the operator reached this listener by
+            host = urlparse(f"//{self.headers.get('Host', '')}").hostname or host
+        return f"http://{host}:{port}"
+    
+    def handle_test_probe(self):
+        """Fetch a visitor page from the public listener with a chosen User-Agent (test page)"""
+        path = self.query.get('path', ['/'])[0]
+        if not path.startswith('/'):
+            path = '/' + path
+        user_agent = self.query.get('ua', [self.headers.get('User-Agent', '')])[0]
+        
+        conn = http.client.HTTPConnection(*self.public_address(), timeout=15)
+        try:
+            conn.request('GET', path, headers={'User-Agent': user_agent})
+            response = conn.getresponse()
+            status, body = response.status, response.read()
+            content_type = response.getheader('Content-Type', 'application/octet-stream')
+        except (OSError, http.client.HTTPException) as e:
+            self.send_body(502, f"Probe failed: {e}".encode('utf-8'), 'text/plain; charset=utf-8')
+            return
+        finally:
+            conn.close()
         
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Tar Pit Status</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px; }}
-                .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin: 30px 0; }}
-                .stat-card {{ background: #f8f9fa; padding: 20px; border-radius: 10px; border-left: 4px solid #007bff; }}
-                .stat-value {{ font-size: 2em; font-weight: bold; color: #007bff; }}
-                .stat-label {{ color: #666; margin-top: 5px; }}
-                .bot-list {{ margin-top: 20px; }}
-                .bot-item {{ padding: 10px; margin: 5px 0; background: #e8f4fd; border-radius: 5px; }}
-                .tunnel-info {{ background: #e8f4fd; padding: 20px; border-radius: 10px; margin: 20px 0; }}
-                .status-badge {{ display: inline-block; padding: 5px 10px; border-radius: 20px; color: white; font-weight: bold; }}
-                .status-active {{ background: #28a745; }}
-                .status-inactive {{ background: #dc3545; }}
-                .url-box {{ background: white; padding: 10px; border-radius: 5px; font-family: monospace; word-break: break-all; }}
-            </style>
-        </head>
-        <body>
-            <h1>Tar Pit Status Dashboard</h1>
-            <p>Real-time statistics and monitoring</p>
-            
-            <div class="tunnel-info">
-                <h2>Tunnel Status</h2>
-                {"<p><strong>Public URL:</strong> <div class='url-box'>" + public_url + "</div></p>" if public_url else "<p><span class='status-badge status-inactive'>LOCAL ONLY</span> ngrok tunnel is not active</p>"}
-                <p><strong>Local URL:</strong> http://localhost:{self.server.server_port}</p>
-                {"<p><a href='" + public_url + "' target='_blank'>Open public URL</a></p>" if public_url else ""}
-                <p><a href="http://localhost:4040" target="_blank">ngrok dashboard</a></p>
-            </div>
-            
-            <div class="stats-grid" id="statsGrid">
-                <!-- Stats will be loaded via JavaScript -->
-            </div>
-            
-            <div class="bot-list" id="botList">
-                <h3>Bot Activity</h3>
-                <!-- Bot list will be loaded here -->
-            </div>
-            
-            <div style="margin-top: 30px; padding: 20px; background: #f0f0f0; border-radius: 10px;">
-                <h3>Quick Links</h3>
-                <p><a href="/">Home</a> | <a href="/test">Test Page</a> | <a href="/upload/">Upload Files</a> | <a href="/ngrok">ngrok Info</a></p>
-                <p><a href="/download/test/test.zip">Test Download</a> | <a href="/api/data">API Test</a></p>
-            </div>
-            
-            <script>
-            async function loadStats() {{
-                try {{
-                    const response = await fetch('/api/status');
-                    const data = await response.json();
-                    
-                    // Update stats grid
-                    const statsGrid = document.getElementById('statsGrid');
-                    statsGrid.innerHTML = '';
-                    
-                    const stats = [
-                        {{ label: 'Total Requests', value: data.stats.total_requests, icon: '' }},
-                        {{ label: 'Bot Requests', value: data.stats.bot_requests, icon: '' }},
-                        {{ label: 'Downloads', value: data.stats.downloads || 0, icon: '' }},
-                        {{ label: 'Targeted Bots', value: data.stats.targeted_bots || 0, icon: '' }},
-                        {{ label: 'Unique Bot Types', value: Object.keys(data.stats.bot_types_detected || {{}}).length, icon: '' }},
-                        {{ label: 'Last Activity', value: data.stats.last_request || 'None', icon: '' }}
-                    ];
-                    
-                    stats.forEach(stat => {{
-                        const card = document.createElement('div');
-                        card.className = 'stat-card';
-                        card.innerHTML = `
-                            <div class="stat-value">${{stat.value}}</div>
-                            <div class="stat-label">${{stat.label}}</div>
-                        `;
-                        statsGrid.appendChild(card);
-                    }});
-                    
-                    // Update bot list
-                    const botList = document.getElementById('botList');
-                    if (data.stats.bot_types_detected) {{
-                        let botHTML = '<h3>Bot Activity by Type</h3>';
-                        for (const [botType, count] of Object.entries(data.stats.bot_types_detected)) {{
-                            botHTML += `<div class="bot-item"><strong>${{botType}}:</strong> ${{count}} requests</div>`;
-                        }}
-                        botList.innerHTML = botHTML;
-                    }}
-                    
-                }} catch (error) {{
-                    console.error('Failed to load stats:', error);
-                }}
-            }}
-            
-            // Load stats immediately and every 10 seconds
-            loadStats();
-            setInterval(loadStats, 10000);
-            </script>
-        </body>
-        </html>
-        """
+        self.send_body(status, body, content_type)
+    
+    def query_number(self, name: str, default: float, low: float, high: float) -> float:
+        """Numeric query parameter clamped to [low, high]; ValueError if it isn't a number"""
+        return min(high, max(low, float(self.query.get(name, [default])[0])))
+    
+    def handle_debug_profile(self):
+        """Profile this process's request path: collapsed stacks (default) or ?mode=cprofile every Nth request"""
+        if not self.profiler:
+            self.send_body(503, b'Profiler unavailable', 'text/plain; charset=utf-8')
+            return
         
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        mode = self.query.get('mode', ['stacks'])[0]
+        try:
+            seconds = self.query_number('seconds', 10, 0.1, Profiler.MAX_SECONDS)
+            hz = self.query_number('hz', 100, 1, 1000)
+            every = int(self.query_number('every', 10, 1, 1000000))
+            limit = int(self.query_number('limit', 60, 1, 10000))
+        except ValueError:
+            self.send_body(400, b'seconds, hz, every and limit must be numbers', 'text/plain; charset=utf-8')
+            return
+        if mode not in ('stacks', 'cprofile'):
+            self.send_body(400, b'mode must be stacks or cprofile', 'text/plain; charset=utf-8')
+            return
+        
+        if mode == 'stacks':
+            # This thread only waits on the sampler; leave it out of the picture
+            result = self.profiler.sample_stacks(seconds, hz=hz, idle=self.query.get('idle', ['0'])[0] == '1',
+                                                 ignore=(threading.get_ident(),))
+        else:
+            result = self.profiler.profile_requests(seconds, every)
+        if result is None:
+            self.send_body(409, b'A profiling session is already running', 'text/plain; charset=utf-8',
+                           headers={'Retry-After': str(int(Profiler.MAX_SECONDS))})
+            return
+        
+        if mode == 'stacks':
+            stacks, ticks = result
+            # Collapsed-stack format: feed straight to flamegraph.pl or speedscope
+            body = ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+            headers = {'X-Profile-Samples': str(ticks)}
+        else:
+            stats, profiled = result
+            out = io.StringIO()
+            if stats:
+                stats.stream = out
+                stats.sort_stats('cumulative').print_stats(limit)
+            else:
+                out.write(f"No requests profiled in {seconds:g}s (every {every}th request)\n")
+            body = out.getvalue()
+            headers = {'X-Profile-Requests': str(profiled)}
+        
+        headers['X-Profile-Pid'] = str(os.getpid())
+        self.send_body(200, body.encode('utf-8'), 'text/plain; charset=utf-8', headers=headers)
+
+class AdminHTTPServer(ThreadingHTTPServer):
+    """Admin listener served by a small fixed pool of threads instead of a thread per connection"""
     
-    def handle_ngrok_info(self):
-        """Show ngrok tunnel information"""
-        html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>ngrok Tunnel Status</title>
-            <style>
-                body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
-                .tunnel-info { background: #e8f4fd; padding: 20px; border-radius: 10px; margin: 20px 0; }
-                .status-badge { display: inline-block; padding: 5px 10px; border-radius: 20px; color: white; font-weight: bold; }
-                .status-active { background: #28a745; }
-                .status-inactive { background: #dc3545; }
-                .url-box { background: white; padding: 10px; border-radius: 5px; font-family: monospace; word-break: break-all; }
-            </style>
-        </head>
-        <body>
-            <h1>ngrok Tunnel Information</h1>
-            <p>Public access configuration</p>
-            
-            <div id="ngrokInfo">
-                <p>Loading ngrok tunnel information...</p>
-            </div>
-            
-            <div style="margin-top: 30px;">
-                <h3>How to Use</h3>
-                <ol>
-                    <li>Copy the public URL above</li>
-                    <li>Share it with others or use it from other devices</li>
-                    <li>The tunnel will automatically forward traffic to this local server</li>
-                    <li>All bot interactions will be logged locally</li>
-                </ol>
-                
-                <p><a href="/status">Back to Status</a> | <a href="/">Home</a></p>
-            </div>
-            
-            <script>
-            async function loadNgrokInfo() {
-                try {
-                    const response = await fetch('/api/ngrok');
-                    const data = await response.json();
-                    
-                    const container = document.getElementById('ngrokInfo');
-                    
-                    if (data.active) {
-                        container.innerHTML = `
-                            <div class="tunnel-info">
-                                <h2><span class="status-badge status-active">ACTIVE</span></h2>
-                                <p><strong>Public URL:</strong></p>
-                                <div class="url-box">${data.public_url}</div>
-                                <p><strong>Local Endpoint:</strong> ${data.local_url}</p>
-                                <p><strong>Protocol:</strong> ${data.protocol}</p>
-                                <p><strong>Started:</strong> ${data.started}</p>
-                                <p><a href="${data.public_url}" target="_blank">Open in new tab</a></p>
-                                <p><a href="http://localhost:4040" target="_blank">Open ngrok dashboard</a></p>
-                            </div>
-                        `;
-                    } else {
-                        container.innerHTML = `
-                            <div class="tunnel-info">
-                                <h2><span class="status-badge status-inactive">INACTIVE</span></h2>
-                                <p>ngrok tunnel is not active. Start the server with --ngrok flag.</p>
-                                <p>Make sure ngrok is installed and authenticated.</p>
-                            </div>
-                        `;
-                    }
+    def __init__(self, server_address, handler_class, threads: int = 16, reuse_port: bool = False,
+                 public_address: Tuple[str, int] = None):
+        self.threads = max(2, threads)
+        self.reuse_port = reuse_port
+        self.public_address = public_address
+        self.backlog = queue.Queue()
+        self.pool = []
+        super().__init__(server_address, handler_class)
+    
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+    
+    def serve_forever(self, poll_interval: float = 0.5):
+        # Started here rather than in __init__: a socket bound before fork is served by the children
+        self.pool = [threading.Thread(target=self.serve_pool, name=f"admin-{i}", daemon=True)
+                     for i in range(self.threads)]
+        for thread in self.pool:
+            thread.start()
+        super().serve_forever(poll_interval)
+    
+    def process_request(self, request, client_address):
+        """Queue the connection for the pool; the accept loop never waits on a handler"""
+        self.backlog.put((request, client_address))
+    
+    def serve_pool(self):
+        """Pool thread: handle queued connections until server_close"""
+        while True:
+            item = self.backlog.get()
+            if item is None:
+                return
+            self.process_request_thread(*item)
+    
+    def server_close(self):
+        super().server_close()
+        for _ in self.pool:
+            self.backlog.put(None)
+
+def lower_thread_priority(increment: int):
+    """Raise the calling thread's nice value; threads it starts inherit it (Linux only, else a no-op)"""
+    if increment <= 0 or not hasattr(os, 'setpriority') or not hasattr(threading, 'get_native_id'):
+        return
+    try:
+        # On Linux PRIO_PROCESS with a thread id renices just that thread
+        tid = threading.get_native_id()
+        os.setpriority(os.PRIO_PROCESS, tid, os.getpriority(os.PRIO_PROCESS, tid) + increment)
+    except OSError as e:
+        logger.warning(f"Could not lower public listener priority: {e}")
+
+# ============================================================================
+# ENHANCED MAIN APPLICATION WITH NGrok
+# ============================================================================
+
+class InteractiveTarPit:
+    """Main interactive tar pit application with ngrok support"""
+    
+    def __init__(self, host: str = '0.0.0.0', port: int = 8080, ngrok_auth_token: str = None,
+                 settings: ServerSettings = None):
+        self.host = host
+        self.port = port
+        self.settings = settings or ServerSettings()
+        self.config_manager = ConfigManager(ranges_file=self.settings.ip_ranges_file)
+        self.content_gen = TargetedContentGenerator(self.config_manager.active_config)
+        self.bait_manager = BaitContentManager()
+        self.interactive_gen = InteractiveElementsGenerator()
+        self.compression = CompressionManager(enabled=self.settings.compression,
+                                              dynamic_level=self.settings.dynamic_compression_level)
+        self.response_cache = StaticResponseCache(self.compression)
+        self.log_pipeline = AsyncLogPipeline(queue_size=self.settings.log_queue_size,
+                                             console_feed=self.settings.console_feed,
+                                             feed_rate=self.settings.feed_rate)
+        self.request_log = None
+        if self.settings.request_log_path:
+            self.request_log = RequestLogWriter(path=self.settings.request_log_path,
+                                                max_bytes=self.settings.request_log_max_mb * 1024 * 1024,
+                                                max_age=self.settings.request_log_rotate_seconds,
+                                                compress_closed=self.settings.request_log_gzip)
+        self.client_tracker = ClientTracker(max_entries=self.settings.max_tracked_clients,
+                                            key_by_ua=self.settings.track_clients_by_ua)
+        self.sketches = TrafficSketches(capacity=self.settings.sketch_capacity)
+        self.classifier = BehaviorClassifier()
+        self.stats_snapshots = None
+        if self.settings.stats_snapshot_path:
+            self.stats_snapshots = StatsSnapshotStore(path=self.settings.stats_snapshot_path,
+                                                      interval=self.settings.stats_snapshot_interval)
+        self.restored = None
+        self.cluster_reporter = None
+        # Each live viewer holds an admin pool thread; keep half the pool for everything else
+        self.broadcaster = StatusBroadcaster(self.live_stats, rate=self.settings.status_stream_rate,
+                                             max_viewers=min(self.settings.status_stream_viewers,
+                                                             max(1, self.settings.admin_threads // 2)))
+        self.status_cache = StatusSnapshotCache(tick=self.settings.status_tick)
+        self.connection_guard = ConnectionGuard(max_connections=self.settings.max_connections,
+                                                max_per_ip=self.settings.max_connections_per_ip)
+        self.profiler = Profiler()
+        
+        # Initialize ngrok manager
+        self.ngrok_manager = NgrokManager(auth_token=ngrok_auth_token)
+        self.public_url = None
+        
+        # Enhanced control panel
+        from collections import Counter
+        self.control_panel = type('ControlPanel', (), {
+            'stats': {
+                "total_requests": 0,
+                "bot_requests": 0,
+                "targeted_bots": 0,
+                "keywords_triggered": Counter(),
+                "bot_types_detected": Counter(),
+                "last_request": None,
+                "downloads": 0,
+                "downloads_by_type": Counter(),
+                "interactions": 0,
+                "behavior_promotions": 0,
+                "requests_by_route": Counter(),
+                "cpu_ns_by_route": Counter(),
+                "cpu_ns_by_bot_type": Counter(),
+                "bytes_by_route": Counter(),
+                "bytes_by_bot_type": Counter(),
+                "held_ns_by_route": Counter(),
+                "held_ns_by_bot_type": Counter()
+            }
+        })()
+        
+        self.server = None
+        self.server_thread = None
+        self.admin_port = self.settings.admin_port
+        self.admin_server = None
+        self.admin_thread = None
+        self.worker_stats = None
+        self.shared_counters = None
+        self.workers = {}
+        
+        # Create directories
+        os.makedirs("logs", exist_ok=True)
+        os.makedirs("bait_files", exist_ok=True)
+        
+        # Register cleanup
+        atexit.register(self.cleanup)
+    
+    def start(self, use_ngrok: bool = False, public_url: str = None):
+        """Start the enhanced tar pit with optional ngrok"""
+        
+        if self.settings.workers > 1:
+            self.start_workers(use_ngrok)
+            return
+        
+        if not self.create_server():
+            return
+        
+        # Warm restart: carry counters, sketches and recent clients over from the last run
+        if self.stats_snapshots:
+            state = self.stats_snapshots.load()
+            if state:
+                self.restore_snapshot(state)
+        
+        use_ngrok = self.start_tunnel(use_ngrok)
+        self.print_banner()
+        
+        # Request-path logging goes through the queue from here on
+        self.log_pipeline.start()
+        if self.request_log:
+            self.request_log.start()
+        self.config_manager.ip_ranges.start_watcher(self.settings.ip_ranges_reload)
+        self.config_manager.start_watcher(self.settings.config_reload)
+        if self.stats_snapshots:
+            self.stats_snapshots.start(self.collect_snapshot)
+        self.create_cluster_reporter()
+        if self.cluster_reporter:
+            self.cluster_reporter.start(lambda: self.collect_snapshot(clients=False))
+        self.broadcaster.start()
+        
+        # Start server in background thread
+        self.serve_in_background()
+        
+        # Deploys stop us with SIGTERM; shut down the same way as Ctrl+C so the final snapshot is written
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        
+        # Keep main thread alive
+        try:
+            while True:
+                time.sleep(1)
+                # Check for ngrok updates if active
+                if use_ngrok and not self.ngrok_manager.is_tunnel_alive():
+                    print("WARNING: ngrok tunnel appears to be down. Attempting to restart...")
+                    self.public_url = self.ngrok_manager.start_tunnel(self.port)
                     
-                } catch (error) {
-                    document.getElementById('ngrokInfo').innerHTML = 
-                        '<div class="tunnel-info"><p>Error loading ngrok information. Make sure ngrok is running.</p></div>';
-                }
+        except KeyboardInterrupt:
+            self.stop()
+    
+    def live_stats(self) -> Dict:
+        """Counters for the live status stream: shared-memory totals under --workers, else this process"""
+        if self.shared_counters:
+            stats = self.shared_counters.merged()
+            stats["last_request"] = self.control_panel.stats["last_request"]
+            return stats
+        return plain_stats(self.control_panel.stats)
+    
+    def collect_snapshot(self, clients: bool = True) -> Dict:
+        """Counters, sketches and recent clients as one JSON-friendly state"""
+        limit = self.settings.stats_snapshot_clients if clients else 0
+        if self.shared_counters:
+            # Supervisor: merge the workers' shared counters, published sketches and client exports
+            view = self.worker_stats.merged()
+            stats = self.shared_counters.merged()
+            stats["last_request"] = view["stats"].get("last_request")
+            return {
+                "stats": stats,
+                "sketches": view["sketches"].to_dict() if view["sketches"] else None,
+                "clients": self.worker_stats.read_client_exports(limit) if limit else []
             }
-            
-            loadNgrokInfo();
-            </script>
-        </body>
-        </html>
-        """
         
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        return {
+            "stats": plain_stats(self.control_panel.stats),
+            "sketches": self.sketches.to_dict(),
+            "clients": self.client_tracker.export(limit) if limit else []
+        }
     
-    def handle_test_page(self):
-        """Show test page for debugging"""
-        html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Test Page</title>
-            <style>
-                body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
-                .test-section { margin: 20px 0; padding: 20px; background: #f8f9fa; border-radius: 10px; }
-                .test-button { padding: 10px 20px; margin: 5px; background: #007bff; color: white; border: none; border-radius: 5px; cursor: pointer; }
-                .test-button:hover { background: #0056b3; }
-            </style>
-        </head>
-        <body>
-            <h1>Test Page</h1>
-            <p>Use this page to test various features of the tar pit.</p>
-            
-            <div class="test-section">
-                <h3>Link Tests</h3>
-                <p><a href="/download/test/test.pdf">Test PDF Download</a></p>
-                <p><a href="/download/test/test.csv">Test CSV Download</a></p>
-                <p><a href="/download/test/test.json">Test JSON Download</a></p>
-                <p><a href="/download/test/test.zip">Test ZIP Download</a></p>
-            </div>
-            
-            <div class="test-section">
-                <h3>API Tests</h3>
-                <button class="test-button" onclick="testApi('data')">Test Data API</button>
-                <button class="test-button" onclick="testApi('status')">Test Status API</button>
-                <button class="test-button" onclick="testApi('ngrok')">Test ngrok API</button>
-                <div id="apiResult" style="margin-top: 10px; padding: 10px; background: white; border-radius: 5px;"></div>
-            </div>
-            
-            <div class="test-section">
-                <h3>Bot Simulation</h3>
-                <p>Simulate different bot user agents:</p>
-                <button class="test-button" onclick="simulateBot('Googlebot')">Google Bot</button>
-                <button class="test-button" onclick="simulateBot('GPTBot')">GPT Bot</button>
-                <button class="test-button" onclick="simulateBot('TikTokBot')">TikTok Bot</button>
-                <button class="test-button" onclick="simulateBot('SemanticScholarBot')">Academic Bot</button>
-                <div id="botResult" style="margin-top: 10px; padding: 10px; background: white; border-radius: 5px;"></div>
-            </div>
-            
-            <div class="test-section">
-                <h3>System Info</h3>
-                <p><a href="/status">View Status Dashboard</a></p>
-                <p><a href="/ngrok">View ngrok Info</a></p>
-                <p><a href="/">Go to Home</a></p>
-            </div>
-            
-            <script>
-            async function testApi(endpoint) {
-                const apiResult = document.getElementById('apiResult');
-                apiResult.innerHTML = 'Testing...';
-                
-                try {
-                    const response = await fetch(`/api/${endpoint}`);
-                    const data = await response.json();
-                    apiResult.innerHTML = `<pre>${JSON.stringify(data, null, 2)}</pre>`;
-                } catch (error) {
-                    apiResult.innerHTML = `Error: ${error}`;
-                }
-            }
+    def restore_snapshot(self, state: Dict, counters: bool = True):
+        """Load a saved snapshot into this process (counters=False when the shared block holds them)"""
+        if counters:
+            merge_stats(self.control_panel.stats, state["stats"])
+        else:
+            self.control_panel.stats["last_request"] = state["stats"].get("last_request")
+        if state["sketches"]:
+            # Loaded in place: the handlers were built around this object
+            self.sketches.load(state["sketches"])
+        self.client_tracker.restore(state["clients"])
+        
+        print(f"Restored stats snapshot from {self.stats_snapshots.stats['restored_from']}: "
+              f"{state['stats'].get('total_requests', 0)} requests, {len(state['clients'])} clients")
+    
+    def create_cluster_reporter(self):
+        """Set up --cluster-push once the port is known (it is part of the default node id)"""
+        if self.settings.cluster_push:
+            self.cluster_reporter = ClusterReporter(parse_host_port(self.settings.cluster_push),
+                                                    node_id=self.settings.node_id or f"{socket.gethostname()}:{self.port}",
+                                                    interval=self.settings.cluster_interval,
+                                                    secret=self.settings.cluster_key)
+    
+    def start_tunnel(self, use_ngrok: bool) -> bool:
+        """Start the ngrok tunnel if requested; returns whether it is in use"""
+        if use_ngrok:
+            print(f"\n" + "="*60)
+            print(f"INITIALIZING NGrok TUNNEL")
+            print(f"="*60)
             
-            async function simulateBot(userAgent) {
-                const botResult = document.getElementById('botResult');
-                botResult.innerHTML = `Simulating ${userAgent}...`;
+            # Check if ngrok is installed
+            if not self.ngrok_manager.is_ngrok_installed():
+                print(f"\nERROR: ngrok is not installed or not in PATH!")
+                print(f"Please install ngrok from: https://ngrok.com/download")
+                print(f"Then authenticate with: ngrok config add-authtoken YOUR_TOKEN")
+                use_ngrok = False
+            else:
+                self.public_url = self.ngrok_manager.start_tunnel(self.port)
                 
-                try {
-                    const response = await fetch('/', {
-                        headers: {
-                            'User-Agent': userAgent
-                        }
-                    });
-                    const text = await response.text();
-                    botResult.innerHTML = `<p><strong>Status:</strong> ${response.status}</p>
-                                          <p><strong>Detected as:</strong> ${text.includes('bot') ? 'Bot' : 'Human'}</p>
-                                          <p><small>Response preview: ${text.substring(0, 200)}...</small></p>`;
-                } catch (error) {
-                    botResult.innerHTML = `Error: ${error}`;
-                }
-            }
-            </script>
-        </body>
-        </html>
-        """
+                if self.public_url:
+                    print(f"\n" + "="*60)
+                    print(f"NGrok TUNNEL ESTABLISHED")
+                    print(f"="*60)
+                    print(f"Public URL: {self.public_url}")
+                    print(f"ngrok dashboard: http://localhost:4040")
+                    print(f"Access from any device/network!")
+                else:
+                    print(f"\nWARNING: Failed to start ngrok tunnel. Running locally only.")
+                    print(f"Try running ngrok manually: ngrok http {self.port}")
+                    self.public_url = None
         
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        return use_ngrok
     
-    def get_mime_type(self, filename: str) -> str:
-        """Get MIME type for file"""
-        mime_types = {
-            'pdf': 'application/pdf',
-            'csv': 'text/csv',
-            'json': 'application/json',
-            'xml': 'application/xml',
-            'txt': 'text/plain',
-            'zip': 'application/zip',
-            'png': 'image/png',
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'gif': 'image/gif'
-        }
-        
-        ext = os.path.splitext(filename)[1].lower().replace('.', '')
-        return mime_types.get(ext, 'application/octet-stream')
+    def print_banner(self):
+        """Print the startup summary"""
+        print(f"\n" + "="*60)
+        print(f"INTERACTIVE AI SCRAPER TAR PIT")
+        print(f"="*60)
+        print(f"Local URL: http://{self.host}:{self.port}")
+        if self.public_url:
+            print(f"Public URL: {self.public_url}")
+        print(f"Targeting: {', '.join(self.config_manager.active_config.bot_types)}")
+        print(f"Keywords: {', '.join(self.config_manager.active_config.keywords[:5])}...")
+        print(f"Bait files: {sum(len(files) for files in self.bait_manager.bait_files.values())} available")
+        print(f"Interactive: {'Enabled' if self.config_manager.active_config.interactive_elements else 'Disabled'}")
+        print(f"Status: http://{self.settings.admin_host}:{self.admin_port}/status")
+        print(f"Test: http://{self.settings.admin_host}:{self.admin_port}/test")
+        print(f"\nMonitoring active. Bot interactions will appear below:")
+        print(f"="*60)
     
-    def generate_targeted_response(self, bot_type: str, is_bot: bool) -> Dict:
-        """Generate response targeted to bot type - SIMPLIFIED FIXED VERSION"""
+    def create_server(self, server_class: type = LimitedHTTPServer, find_port: bool = True) -> bool:
+        """Pick a free port and bind the threaded HTTP server"""
         
-        # Always show human page for non-bots
-        if not is_bot:
-            return {
-                'content_type': 'text/html',
-                'content': self.generate_human_page()
-            }
+        # Find available port
+        if find_port:
+            self.port = self.find_available_port(self.port)
+        if not self.port:
+            print(f"ERROR: Could not find an available port starting from {self.port}")
+            return False
         
-        # For bots, generate trap content
-        content = self.content_gen.generate_targeted_content(bot_type)
+        # Setup HTTP handlers; both listeners share every collaborator
+        collaborators = self.handler_collaborators()
+        handler = lambda *args: InteractiveTarPitHandler(*args, **collaborators)
+        admin_handler = lambda *args: AdminHandler(*args, **collaborators)
         
-        # Check if this is a targeted bot type
-        is_targeted = bot_type in self.config_manager.active_config.bot_types
+        try:
+            # Threaded so one idle keep-alive connection can't block the others
+            self.server = server_class((self.host, self.port), handler)
+        except Exception as e:
+            print(f"ERROR: Failed to start server on port {self.port}: {e}")
+            return False
+        self.server.guard = self.connection_guard
+        
+        if find_port:
+            self.admin_port = self.find_admin_port()
+        try:
+            self.admin_server = AdminHTTPServer((self.settings.admin_host, self.admin_port), admin_handler,
+                                                threads=self.settings.admin_threads,
+                                                reuse_port=issubclass(server_class, ReusePortHTTPServer),
+                                                public_address=(self.host, self.port))
+        except Exception as e:
+            print(f"ERROR: Failed to start admin listener on {self.settings.admin_host}:{self.admin_port}: {e}")
+            self.server.server_close()
+            self.server = None
+            return False
         
-        if is_targeted and self.control_panel:
-            self.control_panel.stats["targeted_bots"] += 1
+        return True
+    
+    def find_admin_port(self) -> Optional[int]:
+        """--admin-port, or the first free port after the public one"""
+        if self.settings.admin_port is not None:
+            return self.settings.admin_port
+        return self.find_available_port(self.port + 1)
+    
+    def handler_collaborators(self) -> Dict[str, Any]:
+        """Keyword arguments every handler instance is built with"""
+        return dict(
+            content_gen=self.content_gen,
+            config_manager=self.config_manager,
+            control_panel=self.control_panel,
+            bait_manager=self.bait_manager,
+            interactive_gen=self.interactive_gen,
+            ngrok_manager=self.ngrok_manager,
+            response_cache=self.response_cache,
+            compression=self.compression,
+            log_pipeline=self.log_pipeline,
+            request_log=self.request_log,
+            client_tracker=self.client_tracker,
+            sketches=self.sketches,
+            classifier=self.classifier,
+            worker_stats=self.worker_stats,
+            shared_counters=self.shared_counters,
+            broadcaster=self.broadcaster,
+            status_cache=self.status_cache,
+            connection_guard=self.connection_guard,
+            profiler=self.profiler,
+            settings=self.settings
+        )
+    
+    def serve_in_background(self, lower_priority: bool = True):
+        """Run both listeners on daemon threads; the public one at lower CPU priority than the admin pool"""
+        self.admin_thread = threading.Thread(target=self.admin_server.serve_forever, daemon=True)
+        self.admin_thread.start()
+        
+        def serve_public():
+            # Per-connection handler threads inherit the accept loop's priority
+            if lower_priority:
+                lower_thread_priority(self.settings.public_nice)
+            self.server.serve_forever()
+        
+        self.server_thread = threading.Thread(target=serve_public, daemon=True)
+        self.server_thread.start()
+    
+    def start_workers(self, use_ngrok: bool):
+        """Prefork --workers processes sharing one port, and supervise them"""
+        if not hasattr(os, 'fork'):
+            print("WARNING: --workers needs os.fork; running a single process instead")
+            self.settings.workers = 1
+            self.start(use_ngrok)
+            return
         
-        # Generate HTML with traps
-        html = self.wrap_content_with_traps(content, bot_type, is_targeted)
+        self.port = self.find_available_port(self.port)
+        if not self.port:
+            print(f"ERROR: Could not find an available port")
+            return
+        self.admin_port = self.find_admin_port()
+        
+        # Stale state from an earlier run would be merged into this one
+        state_dir = self.settings.worker_state_dir
+        os.makedirs(state_dir, exist_ok=True)
+        for name in os.listdir(state_dir):
+            if name.startswith(("worker-", "clients-")):
+                os.remove(os.path.join(state_dir, name))
+        self.worker_stats = WorkerStatsAggregator(state_dir)
+        self.shared_counters = SharedCounterBlock(
+            slots=self.settings.workers,
+            bot_types=list(self.config_manager.bot_signatures) + [self.classifier.trap_type],
+            routes=InteractiveTarPitHandler.routes.names()
+        )
         
-        return {
-            'content_type': 'text/html',
-            'content': html
-        }
+        # Warm restart: saved totals go into slot 0 here; worker 0 takes the sketches and clients
+        if self.stats_snapshots:
+            self.restored = self.stats_snapshots.load()
+            if self.restored:
+                self.shared_counters.restore(self.restored["stats"])
+        
+        # Without SO_REUSEPORT every worker accepts on one socket bound here and inherited over fork
+        if not hasattr(socket, 'SO_REUSEPORT') and not self.create_server(find_port=False):
+            return
+        
+        # Tunnel and banner before forking so there is one ngrok process and one banner
+        use_ngrok = self.start_tunnel(use_ngrok)
+        self.print_banner()
+        print(f"Workers: {self.settings.workers} processes "
+              f"({'SO_REUSEPORT' if hasattr(socket, 'SO_REUSEPORT') else 'shared socket'}), "
+              f"supervisor pid {os.getpid()}")
+        
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+        
+        # Pushed from the supervise loop (no thread before forking), from the merged worker view
+        self.create_cluster_reporter()
+        if self.cluster_reporter:
+            self.cluster_reporter.collect = lambda: self.collect_snapshot(clients=False)
+        
+        for index in range(self.settings.workers):
+            self.spawn_worker(index)
+        # Later forks (restarts) must not restore again
+        self.restored = None
+        
+        self.supervise(stopping, use_ngrok)
+        self.stop_workers()
     
-    def generate_human_page(self) -> str:
-        """Generate page for human visitors"""
-        return """
-        <!DOCTYPE html>
-        <html>
-        <head><title>Research Portal</title></head>
-        <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px;">
-            <h1>Research Portal</h1>
-            <p>This site is used for academic research on web traffic patterns and bot behavior.</p>
-            <p>For more information, please contact the research team.</p>
+    def spawn_worker(self, index: int):
+        """Fork worker number index; the child never returns"""
+        # Unflushed banner output would otherwise be printed again by every child
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.run_worker(index)
+            except BaseException as e:
+                logger.error(f"Worker {index} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        
+        self.workers[pid] = {"index": index, "started": time.monotonic()}
+    
+    def supervise(self, stopping: threading.Event, use_ngrok: bool):
+        """Reap and restart workers until asked to stop"""
+        # Consecutive quick deaths per worker slot, for crash-loop backoff
+        failures = defaultdict(int)
+        restart_at = {}
+        snapshot_interval = self.settings.stats_snapshot_interval
+        next_snapshot = time.monotonic() + snapshot_interval
+        next_push = time.monotonic()
+        
+        while not stopping.wait(0.5):
+            while True:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                
+                worker = self.workers.pop(pid, None)
+                if not worker:
+                    continue
+                
+                index = worker["index"]
+                if time.monotonic() - worker["started"] < 10:
+                    failures[index] += 1
+                else:
+                    failures[index] = 0
+                delay = min(30, 2 ** failures[index] - 1) if failures[index] else 0
+                restart_at[index] = time.monotonic() + delay
+                print(f"WARNING: worker {index} (pid {pid}) exited with status {status}; "
+                      f"restarting in {delay}s")
             
-            <hr>
-            <p><small>Educational use only. All access is logged for research purposes.</small></p>
-            <p><a href="/status">View Research Dashboard</a></p>
-        </body>
-        </html>
-        """
+            for index, when in list(restart_at.items()):
+                if time.monotonic() >= when:
+                    del restart_at[index]
+                    self.spawn_worker(index)
+            
+            # Snapshots are taken here rather than on a thread: the supervisor still forks on restarts
+            if self.stats_snapshots and snapshot_interval > 0 and time.monotonic() >= next_snapshot:
+                self.stats_snapshots.collect = self.collect_snapshot
+                self.stats_snapshots.save_now()
+                next_snapshot = time.monotonic() + snapshot_interval
+            
+            if self.cluster_reporter and time.monotonic() >= next_push:
+                self.cluster_reporter.push()
+                next_push = time.monotonic() + self.cluster_reporter.interval
+            
+            if use_ngrok and not self.ngrok_manager.is_tunnel_alive():
+                print("WARNING: ngrok tunnel appears to be down. Attempting to restart...")
+                self.public_url = self.ngrok_manager.start_tunnel(self.port)
     
-    def wrap_content_with_traps(self, content: Dict, bot_type: str, is_targeted: bool) -> str:
-        """Wrap content with traps and tracking"""
+    def run_worker(self, index: int):
+        """Serve in a forked worker until SIGTERM/SIGINT, publishing stats for the merged view"""
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+        atexit.unregister(self.cleanup)
+        
+        # The supervisor owns the tunnel and the cluster push
+        self.ngrok_manager.process = None
+        self.cluster_reporter = None
+        self.shared_counters.bind(index)
+        if index == 0 and self.restored:
+            self.restore_snapshot(self.restored, counters=False)
+        
+        # One request-log file per worker; a shared file would interleave rotation
+        if self.request_log:
+            base, ext = os.path.splitext(self.request_log.path)
+            self.request_log.path = f"{base}.w{index}{ext}"
+        
+        if not self.server and not self.create_server(ReusePortHTTPServer, find_port=False):
+            raise RuntimeError(f"could not bind port {self.port}")
+        
+        publisher = WorkerStatsPublisher(self, self.settings.worker_state_dir, index)
+        publisher.start()
+        self.log_pipeline.start()
+        if self.request_log:
+            self.request_log.start()
+        self.config_manager.ip_ranges.start_watcher(self.settings.ip_ranges_reload)
+        self.config_manager.start_watcher(self.settings.config_reload)
+        self.broadcaster.start()
+        
+        self.serve_in_background()
+        stopping.wait()
+        
+        self.broadcaster.stop()
+        self.admin_server.shutdown()
+        self.admin_server.server_close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.config_manager.ip_ranges.stop_watcher()
+        self.config_manager.stop_watcher()
+        if self.request_log:
+            self.request_log.stop()
+        self.log_pipeline.stop()
+        publisher.stop()
+    
+    def stop_workers(self):
+        """Stop every worker, then print statistics merged across them"""
+        print("\nShutting down workers...")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
         
-        # Base traps from content generator
-        traps = content['traps']
+        deadline = time.monotonic() + 15
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in self.workers:
+            os.kill(pid, signal.SIGKILL)
         
-        # Additional targeted traps
-        if is_targeted:
-            traps['hidden_divs'].extend(self.generate_deep_traps(bot_type, content['keywords']))
+        if self.server:
+            self.server.server_close()
+            self.admin_server.server_close()
+        if self.ngrok_manager:
+            self.ngrok_manager.stop()
+        atexit.unregister(self.cleanup)
+        
+        self.worker_stats.cache_seconds = 0
+        if self.stats_snapshots:
+            self.stats_snapshots.collect = self.collect_snapshot
+            self.stats_snapshots.stop()
+        if self.cluster_reporter:
+            self.cluster_reporter.stop()
+        view = self.worker_stats.merged()
+        stats = self.shared_counters.merged()
+        self.shared_counters.close(unlink=True)
+        print(f"\nFinal Statistics ({len(view['workers'])} worker processes):")
+        print(f"   Total Requests: {stats.get('total_requests', 0)}")
+        print(f"   Bot Requests: {stats.get('bot_requests', 0)}")
+        print(f"   Targeted Bots: {stats.get('targeted_bots', 0)}")
+        print(f"   Downloads: {stats.get('downloads', 0)}")
+        
+        if stats.get('bot_types_detected'):
+            print("\nBot Types Detected:")
+            for bot_type, count in stats['bot_types_detected'].items():
+                print(f"   {bot_type}: {count}")
         
-        # Build HTML
-        html_parts = [
-            '<!DOCTYPE html>',
-            '<html>',
-            '<head>',
-            f'<title>{content["title"]}</title>',
-            '<meta name="description" content="Interesting content about various topics">',
-            '<meta name="robots" content="index, follow">',
-            '<meta name="generator" content="Research Content System">'
-        ]
+        print("\nGoodbye!")
+    
+    def start_background(self) -> bool:
+        """Serve from a background thread without the console loop (benchmarks)"""
+        if not self.create_server():
+            return False
+        
+        self.log_pipeline.start()
+        if self.request_log:
+            self.request_log.start()
+        self.config_manager.ip_ranges.start_watcher(self.settings.ip_ranges_reload)
+        self.config_manager.start_watcher(self.settings.config_reload)
+        self.broadcaster.start()
+        
+        self.serve_in_background(lower_priority=False)
+        return True
+    
+    def offline_handler(self) -> 'InteractiveTarPitHandler':
+        """Handler wired to this instance's collaborators without a connection (benchmarks)"""
+        handler = InteractiveTarPitHandler.__new__(InteractiveTarPitHandler)
+        handler.__dict__.update(
+            self.handler_collaborators(),
+            snapshot=self.config_manager.snapshot,
+            route_params={},
+            query={},
+            bot_type=None
+        )
+        return handler
+    
+    def stop_background(self):
+        """Stop a server started with start_background"""
+        self.broadcaster.stop()
+        if self.admin_server:
+            self.admin_server.shutdown()
+            self.admin_server.server_close()
+            self.admin_server = None
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        
+        self.config_manager.ip_ranges.stop_watcher()
+        self.config_manager.stop_watcher()
+        if self.request_log:
+            self.request_log.stop()
+        self.log_pipeline.stop()
+        atexit.unregister(self.cleanup)
+    
+    def find_available_port(self, start_port: int) -> int:
+        """Find an available port starting from start_port"""
+        port = start_port
+        max_attempts = 100
         
-        # Add meta tags
-        html_parts.extend(traps['meta_tags'])
+        for attempt in range(max_attempts):
+            if not is_port_in_use(port):
+                if port != start_port:
+                    print(f"Port {start_port} is in use, using port {port} instead")
+                return port
+            port += 1
         
-        # Add JSON-LD
-        if traps['json_ld']:
-            html_parts.append('<script type="application/ld+json">')
-            html_parts.append(json.dumps(traps['json_ld'][0]))
-            html_parts.append('</script>')
+        # If we can't find an available port, try a different range
+        port = 8080
+        for attempt in range(max_attempts):
+            if not is_port_in_use(port):
+                print(f"Using alternative port: {port}")
+                return port
+            port += 1
         
-        html_parts.extend([
-            '</head>',
-            '<body style="font-family: Arial, sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px;">',
-            f'<article>',
-            f'<h1>{content["title"]}</h1>',
-            f'<div class="content">{content["content"]}</div>',
-            '</article>'
-        ])
+        return None
+    
+    def cleanup(self):
+        """Cleanup resources on exit"""
+        self.stop()
+    
+    def stop(self):
+        """Stop the tar pit and cleanup"""
+        print("\nShutting down...")
         
-        # Add interactive elements if enabled
-        config = self.config_manager.active_config
-        if config.interactive_elements and is_targeted:
-            interactive = self.interactive_gen.generate_interactive_page(bot_type, content['keywords'])
-            
-            html_parts.append('<hr><h2>Interactive Elements</h2>')
-            html_parts.extend(interactive['buttons'])
-            html_parts.append('<br><br>')
-            
-            html_parts.append('<h3>Forms & Inputs</h3>')
-            html_parts.extend(interactive['forms'])
-            
-            html_parts.append('<h3>Related Content</h3>')
-            html_parts.extend(interactive['links'])
-            
-            html_parts.append(interactive['dynamic_content'])
-            html_parts.append(interactive['javascript'])
+        # Stop ngrok tunnel
+        if self.ngrok_manager:
+            self.ngrok_manager.stop()
         
-        # Add download section if enabled
-        if config.bait_files_enabled and is_targeted:
-            html_parts.append('<hr><h2>Download Datasets</h2>')
-            html_parts.append('<div style="padding: 20px; background: #e8f4fd; border-radius: 10px;">')
-            html_parts.append('<h3>Available Datasets for Download:</h3>')
-            
-            file_types = ["PDF", "CSV", "JSON", "XML", "ZIP"]
-            for file_type in random.sample(file_types, 3):
-                keyword = random.choice(content['keywords'])
-                html_parts.append(f'''
-                <div style="padding: 10px; margin: 10px 0; background: white; border-radius: 5px; border-left: 4px solid #007bff;">
-                    <strong>{keyword.title()} Dataset ({file_type})</strong><br>
-                    <small>Contains {random.randint(100, 10000)} data points | Updated {random.randint(1, 30)} days ago</small><br>
-                    <a href="/download/{bot_type}/{keyword}_dataset.{file_type.lower()}" 
-                       style="display: inline-block; padding: 8px 16px; margin-top: 5px; background: #28a745; color: white; text-decoration: none; border-radius: 5px;">
-                        Download {file_type}
-                    </a>
-                </div>
-                ''')
-            
-            html_parts.append('</div>')
+        # Stop server (open live streams first, so their threads finish)
+        self.broadcaster.stop()
+        if self.admin_server:
+            self.admin_server.shutdown()
+            self.admin_server.server_close()
+        if self.server:
+            self.server.shutdown()
         
-        # Add infinite links section (hidden)
-        html_parts.append('<div style="display:none;">')
-        html_parts.append('<h2>Related Content</h2>')
-        html_parts.extend(traps['infinite_links'])
-        html_parts.append('</div>')
+        self.config_manager.ip_ranges.stop_watcher()
+        self.config_manager.stop_watcher()
         
-        # Add hidden traps
-        html_parts.extend(traps['hidden_divs'])
+        # Flush queued log records
+        if self.request_log:
+            self.request_log.stop()
+        self.log_pipeline.stop()
         
-        # Add recursive iframe for deep trapping
-        if is_targeted and config.recursion_depth > 0:
-            html_parts.append(self.generate_recursive_iframe(bot_type))
+        # Final snapshot so a restart continues from these totals
+        if self.stats_snapshots:
+            self.stats_snapshots.stop()
+        if self.cluster_reporter:
+            self.cluster_reporter.stop()
+            self.cluster_reporter = None
         
-        # Add visitor counter
-        if self.control_panel:
-            count = self.control_panel.stats["total_requests"]
-            html_parts.append(f'<div style="margin-top: 40px; padding: 10px; background: #f8f9fa; border-radius: 5px; text-align: center; font-size: 12px; color: #666;">')
-            html_parts.append(f'Page generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | Total visits: {count}')
-            html_parts.append('</div>')
+        print("\nFinal Statistics:")
+        print(f"   Total Requests: {self.control_panel.stats['total_requests']}")
+        print(f"   Bot Requests: {self.control_panel.stats['bot_requests']}")
+        print(f"   Targeted Bots: {self.control_panel.stats['targeted_bots']}")
+        print(f"   Downloads: {self.control_panel.stats.get('downloads', 0)}")
         
-        html_parts.extend([
-            '</body>',
-            '</html>'
-        ])
+        if self.control_panel.stats['bot_types_detected']:
+            print("\nBot Types Detected:")
+            for bot_type, count in self.control_panel.stats['bot_types_detected'].items():
+                print(f"   {bot_type}: {count}")
         
-        return '\n'.join(html_parts)
+        print("\nGoodbye!")
+
+# ============================================================================
+# MULTI-PROCESS WORKERS
+# ============================================================================
+
+class ReusePortHTTPServer(LimitedHTTPServer):
+    """Threaded server bound with SO_REUSEPORT so every worker owns a listen socket on the same port"""
     
-    def generate_deep_traps(self, bot_type: str, keywords: List[str]) -> List[str]:
-        """Generate deep traps for targeted bots"""
-        traps = []
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+def plain_stats(stats: Dict, attempts: int = 5) -> Dict:
+    """control_panel.stats with Counters turned into plain dicts"""
+    # Handlers add new labels without a lock (keeping count() lock-free); a copy that races one is taken again
+    for attempt in range(attempts):
+        try:
+            return {key: dict(value) if isinstance(value, dict) else value for key, value in stats.items()}
+        except RuntimeError:
+            if attempt == attempts - 1:
+                raise
+
+def merge_stats(total: Dict, stats: Dict) -> Dict:
+    """Add one process's stats into a running total (numbers and per-key counts are summed)"""
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            counts = total.setdefault(key, {})
+            for name, count in value.items():
+                counts[name] = counts.get(name, 0) + count
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+        elif value is not None:
+            # last_request and friends: the caller feeds workers oldest first
+            total[key] = value
+    return total
+
+class SharedCounterBlock:
+    """Fixed-layout request counters in shared memory, one cache-line-padded slot per worker"""
+    
+    SCALARS = ("total_requests", "bot_requests", "targeted_bots", "downloads", "behavior_promotions")
+    
+    # Labels outside the layout (e.g. bot types added by a reload) count under "other"
+    OTHER = "other"
+    
+    def __init__(self, slots: int, bot_types: List[str], routes: List[str]):
+        self.slots = slots
+        self.families = {
+            "bot_types_detected": sorted(set(bot_types)) + [self.OTHER],
+            "downloads_by_type": sorted(set(bot_types)) + [self.OTHER],
+            "requests_by_route": sorted(set(routes)) + ["not_found", self.OTHER]
+        }
+        # Request cost also covers generic visitors and POSTs
+        cost_labels = {
+            "route": sorted(set(routes)) + ["not_found", "post", self.OTHER],
+            "bot_type": sorted(set(bot_types) | {"generic"}) + [self.OTHER]
+        }
+        for dimension in COST_DIMENSIONS:
+            for family in (f"cpu_ns_by_{dimension}", f"bytes_by_{dimension}", f"held_ns_by_{dimension}"):
+                self.families[family] = cost_labels[dimension]
+        
+        self.index = {}
+        for name in self.SCALARS:
+            self.index[(name, None)] = len(self.index)
+        for family, labels in self.families.items():
+            for label in labels:
+                self.index[(family, label)] = len(self.index)
+        
+        # Round each slot up to whole 64-byte lines so workers never write the same line
+        self.stride = -(-len(self.index) // 8) * 8
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * self.stride * 8)
+        # New segments are zero-filled
+        self.counters = self.memory.buf.cast('Q')
+        self.base = 0
+        self.lock = threading.Lock()
+    
+    def bind(self, slot: int):
+        """Make this process write to its worker's slot (forked children inherit the mapping)"""
+        self.base = slot * self.stride
+    
+    def add(self, name: str, label: str = None, amount: int = 1):
+        """Add to a counter in this process's slot"""
+        offset = self.index.get((name, label))
+        if offset is None:
+            offset = self.index[(name, self.OTHER)]
+        offset += self.base
+        
+        # Single writer process per slot; the lock covers this worker's own threads
+        with self.lock:
+            self.counters[offset] += amount
+    
+    def restore(self, stats: Dict):
+        """Add saved totals (shaped like control_panel.stats) to this process's slot"""
+        for name in self.SCALARS:
+            if stats.get(name):
+                self.add(name, amount=stats[name])
+        for family in self.families:
+            for label, count in stats.get(family, {}).items():
+                self.add(family, label, count)
+    
+    def merged(self) -> Dict:
+        """Totals summed over every slot, shaped like control_panel.stats"""
+        values = self.counters.tolist()
+        stride = self.stride
+        stats = {}
+        for (name, label), offset in self.index.items():
+            total = sum(values[offset::stride])
+            if label is None:
+                stats[name] = total
+            elif total:
+                stats.setdefault(name, {})[label] = total
+        for family in self.families:
+            stats.setdefault(family, {})
+        return stats
+    
+    def close(self, unlink: bool = False):
+        """Release the mapping; the creating process also unlinks the segment"""
+        self.counters.release()
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+class WorkerStatsPublisher:
+    """Periodically writes one worker's counters, sketches and client summary to its state file"""
+    
+    def __init__(self, tar_pit: 'InteractiveTarPit', state_dir: str, worker: int, interval: float = 1.0):
+        self.tar_pit = tar_pit
+        self.worker = worker
+        self.interval = interval
+        self.path = os.path.join(state_dir, f"worker-{os.getpid()}.json")
+        self.started = time.time()
+        self.stop_event = threading.Event()
+        self.thread = None
+        
+        # Full client records are only needed by the supervisor's stats snapshots, so export them at that pace
+        self.clients_path = os.path.join(state_dir, f"clients-{os.getpid()}.json")
+        self.export_clients = tar_pit.stats_snapshots is not None
+        self.clients_interval = tar_pit.settings.stats_snapshot_interval
+        self.clients_due = time.monotonic() + self.clients_interval
+    
+    @staticmethod
+    def write(path: str, data: Any):
+        """Temp file + rename, so readers never see a partial file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    
+    def publish(self, final: bool = False):
+        """Write the current state, plus the client export when due"""
+        tar_pit = self.tar_pit
+        state = {
+            "pid": os.getpid(),
+            "worker": self.worker,
+            "started": self.started,
+            "updated": time.time(),
+            "stats": plain_stats(tar_pit.control_panel.stats),
+            "sketches": tar_pit.sketches.to_dict(),
+            "clients": tar_pit.client_tracker.get_metrics()
+        }
+        self.write(self.path, state)
         
-        # Infinite comment section
-        traps.append('<div style="display:none;" id="infinite-comments">')
-        for i in range(20):
-            user = random.choice(["user", "viewer", "subscriber"])
-            comment = f"Great {random.choice(keywords)} content! More please."
-            traps.append(f'<div class="comment"><strong>{user}_{i}:</strong> {comment}</div>')
-        traps.append('</div>')
+        if self.export_clients and (final or 0 < self.clients_interval and time.monotonic() >= self.clients_due):
+            self.write(self.clients_path, tar_pit.client_tracker.export(tar_pit.settings.stats_snapshot_clients))
+            self.clients_due = time.monotonic() + self.clients_interval
+    
+    def run(self):
+        """Publish until stopped, then once more"""
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.publish()
+            except (OSError, RuntimeError) as e:
+                logger.error(f"Worker stats publish failed: {e}")
+        self.publish(final=True)
+    
+    def start(self):
+        """Start the publishing thread"""
+        self.thread = threading.Thread(target=self.run, name="worker-stats", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop publishing after a final write"""
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join(timeout=5)
+            self.thread = None
+
+class WorkerStatsAggregator:
+    """Merged view over every worker's state file (dead workers' last state still counts)"""
+    
+    def __init__(self, state_dir: str, cache_seconds: float = 1.0):
+        self.state_dir = state_dir
+        self.cache_seconds = cache_seconds
+        self.cached = None
+        self.cached_at = 0.0
+        self.lock = threading.Lock()
+    
+    def read_states(self) -> List[Dict]:
+        """Every readable worker state, oldest update first"""
+        states = []
+        try:
+            names = os.listdir(self.state_dir)
+        except OSError:
+            return states
         
-        # Fake API endpoints in JavaScript
-        traps.append('<script>')
-        traps.append('// Fake API endpoints for bots to discover')
-        for keyword in keywords[:3]:
-            traps.append(f'const {keyword}_api = "/api/v1/{keyword}/data.json";')
-        traps.append('</script>')
+        for name in names:
+            if not (name.startswith("worker-") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.state_dir, name), 'r') as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(states, key=lambda state: state["updated"])
+    
+    def merged(self) -> Dict:
+        """Summed counters, merged sketches and combined client summary, cached briefly"""
+        with self.lock:
+            if self.cached and time.monotonic() - self.cached_at < self.cache_seconds:
+                return self.cached
+            
+            stats, sketches, workers = {}, None, []
+            clients = {"tracked": 0, "capacity": 0, "evicted": 0, "top": []}
+            top = {}
+            
+            for state in self.read_states():
+                merge_stats(stats, state["stats"])
+                worker_sketches = TrafficSketches.from_dict(state["sketches"])
+                sketches = sketches.merge(worker_sketches) if sketches else worker_sketches
+                
+                for key in ("tracked", "capacity", "evicted"):
+                    clients[key] += state["clients"][key]
+                for client in state["clients"]["top"]:
+                    # One client's connections can land on several workers
+                    key = (client["ip"], client["ua_hash"])
+                    if key in top:
+                        top[key]["requests"] += client["requests"]
+                        top[key]["bytes"] += client["bytes"]
+                        top[key]["max_depth"] = max(top[key]["max_depth"], client["max_depth"])
+                    else:
+                        top[key] = dict(client)
+                
+                alive = self.is_alive(state["pid"])
+                workers.append({"pid": state["pid"], "worker": state["worker"], "alive": alive,
+                                "requests": state["stats"].get("total_requests", 0),
+                                "updated": datetime.fromtimestamp(state["updated"]).isoformat(timespec='seconds')})
+            
+            clients["top"] = heapq.nlargest(10, top.values(), key=lambda c: c["requests"])
+            self.cached = {"stats": stats, "sketches": sketches, "clients": clients, "workers": workers}
+            self.cached_at = time.monotonic()
+            return self.cached
+    
+    def read_client_exports(self, limit: int) -> List[List]:
+        """Client records exported by every worker, the limit most recently seen, oldest first"""
+        states = []
+        for name in os.listdir(self.state_dir):
+            if not (name.startswith("clients-") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.state_dir, name), 'r') as f:
+                    states.extend(json.load(f))
+            except (OSError, ValueError):
+                continue
         
-        # Hidden links to trap pages
-        traps.append('<div style="display:none;">')
-        for i in range(10):
-            traps.append(f'<a href="/trap/{bot_type}/page/{i}">Hidden Link {i}</a>')
-        traps.append('</div>')
+        last_seen = ClientRecord.__slots__.index('last_seen')
+        return sorted(heapq.nlargest(limit, states, key=lambda state: state[last_seen]), key=lambda state: state[last_seen])
+    
+    @staticmethod
+    def is_alive(pid: int) -> bool:
+        """Whether a worker process still exists"""
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+# ============================================================================
+# CLUSTER AGGREGATION
+# ============================================================================
+
+def flatten_stats(stats: Dict) -> Dict[str, int]:
+    """Numeric counters keyed 'name' or 'family/label' (strings such as last_request are left out)"""
+    flat = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            for label, count in value.items():
+                flat[f"{key}/{label}"] = count
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[key] = value
+    return flat
+
+def unflatten_stats(flat: Dict[str, int]) -> Dict:
+    """Inverse of flatten_stats"""
+    stats = {}
+    for key, value in flat.items():
+        family, _, label = key.partition('/')
+        if label:
+            stats.setdefault(family, {})[label] = value
+        else:
+            stats[key] = value
+    return stats
+
+def sign_packet(secret: Optional[bytes], payload: bytes) -> bytes:
+    """Prefix a truncated HMAC-SHA256 when a cluster key is set"""
+    if not secret:
+        return payload
+    return hmac.new(secret, payload, hashlib.sha256).digest()[:16] + payload
+
+class ClusterReporter:
+    """Pushes compact stats deltas (counters plus sketch changes) to a cluster aggregator over UDP"""
+    
+    # Stay under the UDP payload limit; sketch changes are deferred when a packet would not fit
+    MAX_DATAGRAM = 60000
+    
+    def __init__(self, address: Tuple[str, int], node_id: str, interval: float = 5.0,
+                 keyframe_every: int = 12, top_n: int = 25, secret: str = None):
+        self.address = address
+        self.node_id = node_id
+        self.interval = interval
+        self.keyframe_every = keyframe_every
+        self.top_n = top_n
+        self.secret = secret.encode('utf-8') if secret else None
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.seq = 0
+        self.force_keyframe = False
+        
+        # What the aggregator has been sent, to diff the next push against
+        self.sent_counters = {}
+        self.sent_registers = {}
+        self.sent_top = {}
+        self.sent_last_request = None
+        
+        self.collect = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {"packets": 0, "keyframes": 0, "bytes": 0, "last_bytes": 0, "deferred": 0, "errors": 0}
+    
+    def encode(self, state: Dict) -> bytes:
+        """Build the next datagram from a collect_snapshot()-shaped state and advance the baselines"""
+        # Keyframes carry absolute values, so a lost delta or an aggregator restart heals within keyframe_every pushes
+        keyframe = self.force_keyframe or self.seq % self.keyframe_every == 0
+        packet = {"v": 1, "node": self.node_id, "seq": self.seq, "key": keyframe, "interval": self.interval}
+        
+        counters = flatten_stats(state["stats"])
+        if keyframe:
+            packet["c"] = counters
+        else:
+            packet["c"] = {key: value - self.sent_counters.get(key, 0) for key, value in counters.items()
+                           if value != self.sent_counters.get(key, 0)}
+        last_request = state["stats"].get("last_request")
+        if keyframe or last_request != self.sent_last_request:
+            packet["last"] = last_request
+        
+        # HyperLogLogs: changed registers only; top-k: items whose count changed
+        hll, registers, top, tops = {}, {}, {}, {}
+        sketches = state["sketches"]
+        if sketches:
+            for bot_type, data in sketches["unique_ips"].items():
+                current = bytes.fromhex(data["registers"])
+                previous = self.sent_registers.get(bot_type)
+                registers[bot_type] = current
+                if keyframe or previous is None or len(previous) != len(current):
+                    hll[bot_type] = data
+                elif current != previous:
+                    hll[bot_type] = [[index, value] for index, (value, old) in enumerate(zip(current, previous))
+                                     if value != old]
+            
+            for name in ("top_ips", "top_paths", "top_user_agents"):
+                summary = sketches[name]
+                items = heapq.nlargest(self.top_n, summary["counts"].items(), key=lambda kv: kv[1])
+                current = {item: [count, summary["errors"].get(item, 0)] for item, count in items}
+                previous = self.sent_top.get(name, {})
+                changed = current if keyframe else {item: value for item, value in current.items()
+                                                    if previous.get(item) != value}
+                tops[name] = current
+                if changed:
+                    top[name] = changed
+        
+        # Drop the bulkiest parts if needed; their baselines stay put so they go out with a later push
+        for parts in (("top", "hll"), ("hll",), ()):
+            body = dict(packet, **{part: value for part, value in (("top", top), ("hll", hll)) if part in parts and value})
+            data = sign_packet(self.secret, zlib.compress(json.dumps(body, separators=(',', ':')).encode('utf-8')))
+            if len(data) <= self.MAX_DATAGRAM:
+                break
+            self.stats["deferred"] += 1
+        else:
+            raise ValueError("counter delta alone exceeds the datagram limit")
+        
+        self.sent_counters = counters
+        self.sent_last_request = last_request
+        if "hll" in parts:
+            self.sent_registers.update(registers)
+        if "top" in parts:
+            self.sent_top.update(tops)
+        
+        self.seq += 1
+        self.force_keyframe = False
+        if keyframe:
+            self.stats["keyframes"] += 1
+        return data
+    
+    def push(self):
+        """Collect, encode and send one datagram; errors are logged, never raised"""
+        try:
+            data = self.encode(self.collect())
+            self.sock.sendto(data, self.address)
+        except (OSError, ValueError, RuntimeError) as e:
+            # Baselines may have moved past what the aggregator has; resync with a keyframe
+            self.force_keyframe = True
+            self.stats["errors"] += 1
+            logger.error(f"Cluster push to {self.address[0]}:{self.address[1]} failed: {e}")
+            return
         
-        return traps
+        self.stats["packets"] += 1
+        self.stats["bytes"] += len(data)
+        self.stats["last_bytes"] = len(data)
+    
+    def run(self):
+        """Push every interval until stopped"""
+        while not self.stop_event.wait(self.interval):
+            self.push()
+    
+    def start(self, collect):
+        """Push collect() from a background thread"""
+        self.collect = collect
+        self.push()
+        self.thread = threading.Thread(target=self.run, name="cluster-push", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop the thread after a final push"""
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join(timeout=5)
+            self.thread = None
+        if self.collect:
+            self.push()
+            self.collect = None
+        self.sock.close()
+
+class ClusterNode:
+    """What the aggregator knows about one pushing node"""
+    
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self.counters = {}
+        self.last_request = None
+        self.unique_ips = {}
+        self.top = {}
+        self.seq = -1
+        self.synced = False
+        self.interval = 5.0
+        self.address = None
+        self.last_seen = 0.0
+        self.packets = 0
+        self.lost = 0
+        self.bytes = 0
+
+class ClusterAggregator:
+    """Receives node pushes over UDP and keeps the fleet-wide merged view"""
+    
+    def __init__(self, listen: Tuple[str, int], secret: str = None, top_capacity: int = 100,
+                 cache_seconds: float = 1.0):
+        self.listen = listen
+        self.secret = secret.encode('utf-8') if secret else None
+        self.top_capacity = top_capacity
+        self.cache_seconds = cache_seconds
+        self.nodes = {}
+        self.lock = threading.Lock()
+        self.sock = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.cached = None
+        self.cached_at = 0.0
+        self.stats = {"packets": 0, "bytes": 0, "rejected": 0, "waiting_for_keyframe": 0}
+    
+    def decode(self, data: bytes) -> Optional[Dict]:
+        """Verify and unpack one datagram, or None"""
+        if self.secret:
+            mac, data = data[:16], data[16:]
+            if not hmac.compare_digest(mac, hmac.new(self.secret, data, hashlib.sha256).digest()[:16]):
+                return None
+        try:
+            packet = json.loads(zlib.decompress(data))
+        except (zlib.error, ValueError):
+            return None
+        if not isinstance(packet, dict) or packet.get("v") != 1 or "node" not in packet:
+            return None
+        return packet
+    
+    @staticmethod
+    def check_packet(packet: Dict, node: Optional[ClusterNode]):
+        """Raise ValueError unless every field has the shape ClusterReporter sends"""
+        def number(value) -> bool:
+            return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+        
+        def count(value) -> bool:
+            return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+        
+        if not isinstance(packet["node"], str) or not count(packet["seq"]) or not isinstance(packet["key"], bool):
+            raise ValueError("bad node, seq or key")
+        if not isinstance(packet["c"], dict) or not all(isinstance(key, str) and number(value)
+                                                        for key, value in packet["c"].items()):
+            raise ValueError("counters must map names to numbers")
+        if not (packet.get("last") is None or isinstance(packet["last"], str)):
+            raise ValueError("bad last request")
+        if "interval" in packet and not (number(packet["interval"]) and packet["interval"] > 0):
+            raise ValueError("bad interval")
+        
+        hll = packet.get("hll", {})
+        if not isinstance(hll, dict):
+            raise ValueError("hll must be an object")
+        for bot_type, change in hll.items():
+            if isinstance(change, dict):
+                precision = change.get("precision")
+                registers = change.get("registers")
+                if (not count(precision) or not 4 <= precision <= 16 or not isinstance(registers, str)
+                        or len(registers) != 2 << precision):
+                    raise ValueError(f"bad HyperLogLog for {bot_type}")
+                bytes.fromhex(registers)
+            else:
+                size = len(node.unique_ips[bot_type].registers) if node and bot_type in node.unique_ips else 0
+                if not isinstance(change, list) or not all(
+                        isinstance(pair, list) and len(pair) == 2 and count(pair[0]) and count(pair[1])
+                        and pair[1] <= 64 and (not size or pair[0] < size) for pair in change):
+                    raise ValueError(f"bad register changes for {bot_type}")
+        
+        top = packet.get("top", {})
+        if not isinstance(top, dict):
+            raise ValueError("top must be an object")
+        for name, items in top.items():
+            if name not in ("top_ips", "top_paths", "top_user_agents") or not isinstance(items, dict):
+                raise ValueError(f"bad top-k summary {name}")
+            for value in items.values():
+                if not (isinstance(value, list) and len(value) == 2 and count(value[0]) and count(value[1])):
+                    raise ValueError(f"bad top-k entry in {name}")
+    
+    def apply(self, packet: Dict, address: Tuple, size: int):
+        """Fold one node packet into that node's state; a malformed packet is rejected whole"""
+        with self.lock:
+            node = self.nodes.get(packet["node"]) if isinstance(packet["node"], str) else None
+            self.check_packet(packet, node)
+            if node is None:
+                node = self.nodes[packet["node"]] = ClusterNode(packet["node"])
+            
+            seq = packet["seq"]
+            if packet["key"] and node.synced and 0 < seq <= node.seq:
+                # A keyframe overtaken by newer packets; only seq 0 (a restarted node) may go backwards
+                return
+            if packet["key"]:
+                # Absolute state; also how a restarted node (seq back to 0) resyncs
+                node.counters = dict(packet["c"])
+                node.unique_ips = {}
+                node.top = {}
+                node.synced = True
+            elif not node.synced:
+                # Deltas mean nothing without the keyframe they build on
+                self.stats["waiting_for_keyframe"] += 1
+                return
+            elif seq <= node.seq:
+                return
+            else:
+                node.lost += seq - node.seq - 1
+                for key, delta in packet["c"].items():
+                    node.counters[key] = node.counters.get(key, 0) + delta
+            
+            if "last" in packet:
+                node.last_request = packet["last"]
+            
+            for bot_type, change in packet.get("hll", {}).items():
+                if isinstance(change, dict):
+                    node.unique_ips[bot_type] = HyperLogLog.from_dict(change)
+                elif bot_type in node.unique_ips:
+                    registers = node.unique_ips[bot_type].registers
+                    for index, value in change:
+                        if value > registers[index]:
+                            registers[index] = value
+            
+            for name, items in packet.get("top", {}).items():
+                summary = node.top.setdefault(name, {})
+                summary.update(items)
+                if len(summary) > self.top_capacity:
+                    node.top[name] = dict(heapq.nlargest(self.top_capacity, summary.items(), key=lambda kv: kv[1][0]))
+            
+            node.seq = seq
+            node.interval = packet.get("interval", node.interval)
+            node.address = f"{address[0]}:{address[1]}"
+            node.last_seen = time.time()
+            node.packets += 1
+            node.bytes += size
+    
+    def run(self):
+        """Receive datagrams until stopped"""
+        while not self.stop_event.is_set():
+            try:
+                data, address = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            
+            self.stats["packets"] += 1
+            self.stats["bytes"] += len(data)
+            packet = self.decode(data)
+            if packet is None:
+                self.stats["rejected"] += 1
+                continue
+            try:
+                self.apply(packet, address, len(data))
+            except (KeyError, TypeError, ValueError, IndexError) as e:
+                self.stats["rejected"] += 1
+                logger.warning(f"Malformed cluster packet from {address[0]}: {e}")
+    
+    def start(self):
+        """Bind the UDP socket and start receiving"""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.listen)
+        self.sock.settimeout(0.5)
+        self.thread = threading.Thread(target=self.run, name="cluster-aggregator", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop receiving"""
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join(timeout=5)
+            self.thread = None
+        if self.sock:
+            self.sock.close()
+    
+    def fleet_view(self, top_n: int = 10) -> Dict:
+        """Counters summed over nodes, merged sketches and per-node health, cached briefly"""
+        with self.lock:
+            if self.cached and time.monotonic() - self.cached_at < self.cache_seconds:
+                return self.cached
+            
+            now = time.time()
+            totals, unique_ips, tops, nodes = Counter(), {}, defaultdict(Counter), []
+            last_request, last_seen = None, 0.0
+            
+            for node in self.nodes.values():
+                totals.update(node.counters)
+                for bot_type, hll in node.unique_ips.items():
+                    unique_ips[bot_type] = unique_ips[bot_type].merge(hll) if bot_type in unique_ips else hll
+                for name, summary in node.top.items():
+                    for item, (count, _) in summary.items():
+                        tops[name][item] += count
+                if node.last_request and node.last_seen > last_seen:
+                    last_request, last_seen = f"{node.last_request} ({node.node_id})", node.last_seen
+                
+                age = now - node.last_seen
+                nodes.append({
+                    "node": node.node_id,
+                    "address": node.address,
+                    "up": age <= 3 * node.interval,
+                    "last_seen": datetime.fromtimestamp(node.last_seen).isoformat(timespec='seconds'),
+                    "age_seconds": round(age, 1),
+                    "total_requests": node.counters.get("total_requests", 0),
+                    "bot_requests": node.counters.get("bot_requests", 0),
+                    "packets": node.packets,
+                    "packets_lost": node.lost,
+                    "bytes": node.bytes
+                })
+            
+            stats = unflatten_stats(totals)
+            stats["last_request"] = last_request
+            sketches = {name: [{"key": item, "count": count} for item, count in tops[name].most_common(top_n)]
+                        for name in ("top_ips", "top_paths", "top_user_agents")}
+            sketches["unique_ips"] = {bot_type: hll.count() for bot_type, hll in unique_ips.items()}
+            
+            self.cached = {
+                "status": "running",
+                "role": "aggregator",
+                "timestamp": datetime.now().isoformat(),
+                "stats": stats,
+                "sketches": sketches,
+                "nodes": sorted(nodes, key=lambda row: row["node"]),
+                "aggregator": dict(self.stats, nodes=len(nodes))
+            }
+            self.cached_at = time.monotonic()
+            return self.cached
+
+class ClusterStatusHandler(BaseHTTPRequestHandler):
+    """Fleet-wide /status, /api/status and /metrics for the aggregator role"""
+    
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    
+    def __init__(self, *args, aggregator: ClusterAggregator = None, **kwargs):
+        self.aggregator = aggregator
+        super().__init__(*args, **kwargs)
+    
+    def log_message(self, format, *args):
+        """Override to suppress default logging"""
+        pass
     
-    def generate_recursive_iframe(self, bot_type: str) -> str:
-        """Generate recursive iframe for deep trapping"""
-        depth = self.config_manager.active_config.recursion_depth
-        if depth <= 0:
-            return ""
-        
-        src = f"/deep-trap/{bot_type}/{random.randint(1000, 9999)}"
-        return f'<iframe src="{src}" style="display:none;"></iframe>'
+    def send_body(self, body: bytes, content_type: str):
+        """200 with Content-Length framing"""
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def do_HEAD(self):
+        """Handle HEAD requests"""
+        self.do_GET()
+    
+    def do_GET(self):
+        """Route the three fleet views"""
+        path = urlparse(self.path).path
+        if path == '/api/status':
+            body = json.dumps(self.aggregator.fleet_view(), indent=2, default=str).encode('utf-8')
+            self.send_body(body, 'application/json')
+        elif path == '/metrics':
+            self.send_body(self.render_metrics(), PrometheusText.CONTENT_TYPE)
+        elif path in ('/', '/status'):
+            self.send_body(self.render_status_page().encode('utf-8'), 'text/html; charset=utf-8')
+        else:
+            self.send_error(404)
+    
+    def render_metrics(self) -> bytes:
+        """Fleet totals plus per-node series"""
+        view = self.aggregator.fleet_view()
+        metrics = PrometheusText()
+        metrics.request_counters(view["stats"])
+        metrics.cost_counters(view["stats"])
+        metrics.metric("unique_ips", "gauge", "Estimated unique client IPs by bot type across the fleet (HyperLogLog)",
+                       metrics.labelled("bot_type", view["sketches"]["unique_ips"]))
+        metrics.metric("node_up", "gauge", "Node pushed within three push intervals",
+                       [(metrics.labels(node=row["node"]), int(row["up"])) for row in view["nodes"]])
+        metrics.metric("node_requests_total", "counter", "Visitor requests served per node",
+                       [(metrics.labels(node=row["node"]), row["total_requests"]) for row in view["nodes"]])
+        metrics.metric("node_packets_lost_total", "counter", "Push datagrams missing per node",
+                       [(metrics.labels(node=row["node"]), row["packets_lost"]) for row in view["nodes"]])
+        return metrics.render()
+    
+    def render_status_page(self) -> str:
+        """Server-rendered fleet dashboard (refreshes itself)"""
+        view = self.aggregator.fleet_view()
+        stats = view["stats"]
+        esc = lambda value: str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        
+        node_rows = ''.join(
+            f"<tr><td>{esc(row['node'])}</td><td>{'up' if row['up'] else 'STALE'}</td>"
+            f"<td>{row['total_requests']}</td><td>{row['bot_requests']}</td>"
+            f"<td>{row['age_seconds']}s</td><td>{row['packets_lost']}</td></tr>"
+            for row in view["nodes"]
+        ) or '<tr><td colspan="6">No nodes have reported yet</td></tr>'
+        bot_rows = ''.join(f"<tr><td>{esc(bot_type)}</td><td>{count}</td>"
+                           f"<td>{view['sketches']['unique_ips'].get(bot_type, '-')}</td></tr>"
+                           for bot_type, count in sorted(stats.get("bot_types_detected", {}).items(),
+                                                         key=lambda kv: -kv[1]))
+        ip_rows = ''.join(f"<tr><td>{esc(row['key'])}</td><td>{row['count']}</td></tr>"
+                          for row in view["sketches"]["top_ips"])
+        
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>Tar Pit Fleet Status</title>
+    <meta http-equiv="refresh" content="5">
+    <style>
+        body {{ font-family: Arial, sans-serif; background: #0a0a0a; color: #e0e0e0; margin: 20px; }}
+        .cards {{ display: flex; gap: 15px; flex-wrap: wrap; }}
+        .card {{ background: #1a1a1a; border: 1px solid #333; border-radius: 8px; padding: 15px; min-width: 150px; }}
+        .value {{ font-size: 24px; font-weight: bold; color: #4CAF50; }}
+        table {{ border-collapse: collapse; margin-top: 15px; width: 100%; }}
+        th, td {{ border-bottom: 1px solid #333; padding: 6px 10px; text-align: left; }}
+        h2 {{ margin-top: 30px; }}
+    </style>
+</head>
+<body>
+    <h1>Tar Pit Fleet Status</h1>
+    <div class="cards">
+        <div class="card">Nodes<div class="value">{sum(1 for row in view['nodes'] if row['up'])}/{len(view['nodes'])}</div></div>
+        <div class="card">Total Requests<div class="value">{stats.get('total_requests', 0)}</div></div>
+        <div class="card">Bot Requests<div class="value">{stats.get('bot_requests', 0)}</div></div>
+        <div class="card">Targeted Bots<div class="value">{stats.get('targeted_bots', 0)}</div></div>
+        <div class="card">Downloads<div class="value">{stats.get('downloads', 0)}</div></div>
+    </div>
+    <p>Last activity: {esc(stats.get('last_request') or 'None')}</p>
+    <h2>Nodes</h2>
+    <table><tr><th>Node</th><th>State</th><th>Requests</th><th>Bot Requests</th><th>Last Push</th><th>Lost Packets</th></tr>{node_rows}</table>
+    <h2>Bot Types</h2>
+    <table><tr><th>Bot Type</th><th>Requests</th><th>Unique IPs</th></tr>{bot_rows}</table>
+    <h2>Top Client IPs</h2>
+    <table><tr><th>IP</th><th>Requests</th></tr>{ip_rows}</table>
+</body>
+</html>"""
+
+def run_cluster_aggregator(args, settings: ServerSettings):
+    """Aggregator role: collect node pushes over UDP and serve the fleet view over HTTP"""
+    listen = parse_host_port(args.cluster_listen)
+    if not args.cluster_key and not is_loopback(listen[0]):
+        # Unsigned pushes would let any host that reaches the port rewrite the fleet counters
+        print(f"ERROR: --cluster-listen {listen[0]} is reachable from other hosts; set --cluster-key "
+              f"(or $TARPIT_CLUSTER_KEY) so only signed pushes are accepted")
+        return
+    aggregator = ClusterAggregator(listen, secret=args.cluster_key)
+    try:
+        aggregator.start()
+        handler = lambda *handler_args: ClusterStatusHandler(*handler_args, aggregator=aggregator)
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+    except OSError as e:
+        print(f"ERROR: Could not start the cluster aggregator: {e}")
+        aggregator.stop()
+        return
+    
+    print(f"\n" + "="*60)
+    print(f"TAR PIT CLUSTER AGGREGATOR")
+    print(f"="*60)
+    print(f"Receiving node pushes on udp://{listen[0]}:{listen[1]}"
+          f"{' (signed)' if args.cluster_key else ''}")
+    print(f"Fleet status: http://{args.host}:{args.port}/status")
+    print(f"Fleet metrics: http://{args.host}:{args.port}/metrics")
+    print(f"="*60)
+    
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        aggregator.stop()
+        print("\nGoodbye!")
 
 # ============================================================================
-# ENHANCED MAIN APPLICATION WITH NGrok
+# BENCHMARKING
 # ============================================================================
 
-class InteractiveTarPit:
-    """Main interactive tar pit application with ngrok support"""
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+class ReplayBenchmark:
+    """Replay logged or synthetic crawler traffic against a tar pit and report per-route latency"""
+    
+    BROWSER_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
     
-    def __init__(self, host: str = '0.0.0.0', port: int = 8080, ngrok_auth_token: str = None):
+    def __init__(self, host: str, port: int, requests_to_send: List[Tuple[str, str, str]],
+                 concurrency: int = 8, rate: float = 0.0, timeout: float = 30.0):
         self.host = host
         self.port = port
-        self.config_manager = ConfigManager()
-        self.content_gen = TargetedContentGenerator(self.config_manager.active_config)
-        self.bait_manager = BaitContentManager()
-        self.interactive_gen = InteractiveElementsGenerator()
-        
-        # Initialize ngrok manager
-        self.ngrok_manager = NgrokManager(auth_token=ngrok_auth_token)
-        self.public_url = None
-        
-        # Enhanced control panel
-        from collections import Counter
-        self.control_panel = type('ControlPanel', (), {
-            'stats': {
-                "total_requests": 0,
-                "bot_requests": 0,
-                "targeted_bots": 0,
-                "keywords_triggered": Counter(),
-                "bot_types_detected": Counter(),
-                "last_request": None,
-                "downloads": 0,
-                "downloads_by_type": Counter(),
-                "interactions": 0
-            }
-        })()
-        
-        self.server = None
-        self.server_thread = None
-        
-        # Create directories
-        os.makedirs("logs", exist_ok=True)
-        os.makedirs("bait_files", exist_ok=True)
-        
-        # Register cleanup
-        atexit.register(self.cleanup)
+        self.requests = requests_to_send
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.timeout = timeout
+        self.routes = build_default_routes()
     
-    def start(self, use_ngrok: bool = False, public_url: str = None):
-        """Start the enhanced tar pit with optional ngrok"""
-        
-        # Find available port
-        self.port = self.find_available_port(self.port)
-        if not self.port:
-            print(f"ERROR: Could not find an available port starting from {self.port}")
-            return
+    @staticmethod
+    def load_request_log(path: str, limit: int = 0) -> List[Tuple[str, str, str]]:
+        """Read (method, path, user agent) triples from a requests.jsonl file (plain or .gz)"""
+        opener = gzip.open if path.endswith('.gz') else open
+        entries = []
+        
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                
+                # Request bodies aren't logged, so only GET/HEAD can be replayed faithfully
+                method = record.get("method", "GET")
+                if method not in ("GET", "HEAD") or not record.get("path"):
+                    continue
+                entries.append((method, record["path"], record.get("ua") or ""))
+                if limit and len(entries) >= limit:
+                    break
         
-        # Setup HTTP handler
-        handler = lambda *args: InteractiveTarPitHandler(
-            *args,
-            content_gen=self.content_gen,
-            config_manager=self.config_manager,
-            control_panel=self.control_panel,
-            bait_manager=self.bait_manager,
-            interactive_gen=self.interactive_gen,
-            ngrok_manager=self.ngrok_manager
-        )
+        return entries
+    
+    @classmethod
+    def synthetic_mix(cls, config_manager: ConfigManager, count: int, seed: int = 1) -> List[Tuple[str, str, str]]:
+        """Crawler-like traffic built from the bot signature database plus some browser visits"""
+        rng = random.Random(seed)
+        profiles = []
         
-        try:
-            self.server = HTTPServer((self.host, self.port), handler)
-        except Exception as e:
-            print(f"ERROR: Failed to start server on port {self.port}: {e}")
-            return
+        for bot_type, signatures in config_manager.bot_signatures.items():
+            for pattern in signatures["ua_patterns"]:
+                ua = f"Mozilla/5.0 (compatible; {pattern}/1.0; +http://example.com/bot)"
+                profiles.append((bot_type, ua, signatures))
         
-        # Start ngrok tunnel if requested
-        if use_ngrok:
-            print(f"\n" + "="*60)
-            print(f"INITIALIZING NGrok TUNNEL")
-            print(f"="*60)
+        entries = []
+        for i in range(count):
+            if rng.random() < 0.1:
+                entries.append(("GET", rng.choice(['/', '/trap/page1', '/api/data']), cls.BROWSER_UA))
+                continue
             
-            # Check if ngrok is installed
-            if not self.ngrok_manager.is_ngrok_installed():
-                print(f"\nERROR: ngrok is not installed or not in PATH!")
-                print(f"Please install ngrok from: https://ngrok.com/download")
-                print(f"Then authenticate with: ngrok config add-authtoken YOUR_TOKEN")
-                use_ngrok = False
+            bot_type, ua, signatures = rng.choice(profiles)
+            kind = rng.random()
+            if kind < 0.25:
+                path = '/'
+            elif kind < 0.45:
+                path = f"/trap/{bot_type}/{rng.randint(1, 500)}"
+            elif kind < 0.6:
+                path = f"/data/{bot_type}/{rng.randint(1, 500)}"
+            elif kind < 0.8:
+                ext = rng.choice(signatures["file_preferences"])
+                path = f"/download/{bot_type}/dataset_{rng.randint(1, 50)}.{ext}"
+            elif kind < 0.9:
+                path = rng.choice(['/api/data', '/api/analytics'])
             else:
-                self.public_url = self.ngrok_manager.start_tunnel(self.port)
-                
-                if self.public_url:
-                    print(f"\n" + "="*60)
-                    print(f"NGrok TUNNEL ESTABLISHED")
-                    print(f"="*60)
-                    print(f"Public URL: {self.public_url}")
-                    print(f"ngrok dashboard: http://localhost:4040")
-                    print(f"Access from any device/network!")
-                else:
-                    print(f"\nWARNING: Failed to start ngrok tunnel. Running locally only.")
-                    print(f"Try running ngrok manually: ngrok http {self.port}")
-                    self.public_url = None
-        
-        print(f"\n" + "="*60)
-        print(f"INTERACTIVE AI SCRAPER TAR PIT")
-        print(f"="*60)
-        print(f"Local URL: http://{self.host}:{self.port}")
-        if self.public_url:
-            print(f"Public URL: {self.public_url}")
-        print(f"Targeting: {', '.join(self.config_manager.active_config.bot_types)}")
-        print(f"Keywords: {', '.join(self.config_manager.active_config.keywords[:5])}...")
-        print(f"Bait files: {sum(len(files) for files in self.bait_manager.bait_files.values())} available")
-        print(f"Interactive: {'Enabled' if self.config_manager.active_config.interactive_elements else 'Disabled'}")
-        print(f"Status: http://{self.host}:{self.port}/status")
-        print(f"Test: http://{self.host}:{self.port}/test")
-        print(f"\nMonitoring active. Bot interactions will appear below:")
-        print(f"="*60)
-        
-        # Start server in background thread
-        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
-        self.server_thread.start()
+                path = rng.choice(signatures["crawl_patterns"]) + str(rng.randint(1, 500))
+            entries.append(("GET", path, ua))
         
-        # Keep main thread alive
-        try:
-            while True:
-                time.sleep(1)
-                # Check for ngrok updates if active
-                if use_ngrok and not self.ngrok_manager.is_tunnel_alive():
-                    print("WARNING: ngrok tunnel appears to be down. Attempting to restart...")
-                    self.public_url = self.ngrok_manager.start_tunnel(self.port)
-                    
-        except KeyboardInterrupt:
-            self.stop()
+        return entries
     
-    def find_available_port(self, start_port: int) -> int:
-        """Find an available port starting from start_port"""
-        port = start_port
-        max_attempts = 100
-        
-        for attempt in range(max_attempts):
-            if not is_port_in_use(port):
-                if port != start_port:
-                    print(f"Port {start_port} is in use, using port {port} instead")
-                return port
-            port += 1
+    def route_label(self, path: str) -> str:
+        """Route name a path dispatches to, for grouping results"""
+        route, _ = self.routes.match(urlparse(path).path)
+        return route.name if route else "not_found"
+    
+    def worker(self, counter, start: float, results: List[Tuple[str, float, int, int]]):
+        """Send requests over one keep-alive connection until the shared counter runs out"""
+        conn = None
         
-        # If we can't find an available port, try a different range
-        port = 8080
-        for attempt in range(max_attempts):
-            if not is_port_in_use(port):
-                print(f"Using alternative port: {port}")
-                return port
-            port += 1
+        for index in counter:
+            if index >= len(self.requests):
+                break
+            method, path, ua = self.requests[index]
+            
+            # Fixed-rate pacing: request i is due at start + i / rate
+            if self.rate > 0:
+                delay = start + index / self.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            
+            label = self.route_label(path)
+            began = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                conn.request(method, path, headers={'User-Agent': ua, 'Accept-Encoding': 'gzip'})
+                response = conn.getresponse()
+                body = response.read()
+                results.append((label, time.perf_counter() - began, response.status, len(body)))
+                if response.will_close:
+                    conn.close()
+                    conn = None
+            except (OSError, http.client.HTTPException):
+                results.append((label, time.perf_counter() - began, 0, 0))
+                if conn is not None:
+                    conn.close()
+                conn = None
+        
+        if conn is not None:
+            conn.close()
+    
+    def run(self) -> Dict:
+        """Replay every request and return the report"""
+        counter = itertools.count()
+        per_worker = [[] for _ in range(self.concurrency)]
+        start = time.perf_counter()
+        
+        threads = [threading.Thread(target=self.worker, args=(counter, start, results), daemon=True)
+                   for results in per_worker]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        elapsed = time.perf_counter() - start
+        return self.build_report([r for results in per_worker for r in results], elapsed)
+    
+    def build_report(self, results: List[Tuple[str, float, int, int]], elapsed: float) -> Dict:
+        """Throughput, latency percentiles, bytes and error rates overall and per route"""
+        grouped = defaultdict(list)
+        for result in results:
+            grouped[result[0]].append(result)
+        
+        def summarize(rows) -> Dict:
+            latencies = sorted(row[1] * 1000 for row in rows)
+            errors = sum(1 for row in rows if row[2] == 0 or row[2] >= 500)
+            return {
+                "requests": len(rows),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+                "bytes": sum(row[3] for row in rows),
+                "errors": errors,
+                "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+                "status": dict(Counter(str(row[2]) for row in rows))
+            }
         
-        return None
+        report = summarize(results)
+        report.update({
+            "mode": "replay",
+            "duration_s": round(elapsed, 3),
+            "concurrency": self.concurrency,
+            "throughput_rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+            "mb_per_s": round(report["bytes"] / elapsed / 1e6, 3) if elapsed else 0.0,
+            "routes": {label: summarize(rows) for label, rows in sorted(grouped.items())}
+        })
+        return report
     
-    def cleanup(self):
-        """Cleanup resources on exit"""
-        self.stop()
+    @staticmethod
+    def print_report(report: Dict):
+        """Human-readable summary of a replay report"""
+        print(f"\nReplayed {report['requests']} requests in {report['duration_s']}s "
+              f"with {report['concurrency']} connections")
+        print(f"Throughput: {report['throughput_rps']} req/s, {report['mb_per_s']} MB/s received")
+        print(f"Latency: p50 {report['p50_ms']}ms  p95 {report['p95_ms']}ms  p99 {report['p99_ms']}ms")
+        print(f"Errors: {report['errors']} ({report['error_rate'] * 100:.2f}%)")
+        print(f"\n{'route':<16}{'reqs':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'bytes':>14}{'err %':>8}")
+        for label, row in report["routes"].items():
+            print(f"{label:<16}{row['requests']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+                  f"{row['p99_ms']:>10}{row['bytes']:>14}{row['error_rate'] * 100:>8.2f}")
+
+class MicroBenchmark:
+    """Time-boxed microbenchmarks of the content, bait and detection hot paths"""
     
-    def stop(self):
-        """Stop the tar pit and cleanup"""
-        print("\nShutting down...")
+    DETECTION_SAMPLES = [
+        ("Mozilla/5.0 (compatible; GPTBot/1.0; +https://openai.com/gptbot)", "/"),
+        ("Mozilla/5.0 (compatible; Googlebot-News)", "/news/2024/story"),
+        ("Mozilla/5.0 (Linux; Android 12) TikTok/26.2 tt_webview", "/video/123"),
+        ("Mozilla/5.0 (compatible; SemanticScholarBot/1.0)", "/paper/42"),
+        (ReplayBenchmark.BROWSER_UA, "/trap/page1"),
+        (ReplayBenchmark.BROWSER_UA, "/about/contact"),
+        ("curl/8.4.0", "/api/data"),
+        ("python-requests/2.31.0", "/product/9"),
+    ]
+    
+    def __init__(self, tar_pit: 'InteractiveTarPit', seconds: float = 1.0, bot_type: str = "ai_trainer"):
+        self.seconds = seconds
+        self.bot_type = bot_type
+        self.tar_pit = tar_pit
+        self.handler = tar_pit.offline_handler()
+    
+    def cases(self) -> List[Tuple[str, Any, Any]]:
+        """(name, setup, operation) triples; setup output is passed to the operation untimed"""
+        bot_type = self.bot_type
+        content_gen = self.tar_pit.content_gen
+        bait = self.tar_pit.bait_manager
+        interactive = self.tar_pit.interactive_gen
+        config_manager = self.tar_pit.config_manager
+        keywords = config_manager.active_config.keywords
+        samples = itertools.cycle(self.DETECTION_SAMPLES)
+        
+        # 100k synthetic published ranges (80% IPv4 /16-/28, 20% IPv6 /32-/64) and a probe mix
+        if not hasattr(self, 'cidr_index'):
+            rng = random.Random(7)
+            self.cidr_ranges = defaultdict(list)
+            for i in range(100000):
+                owner = rng.choice(list(config_manager.bot_signatures))
+                if i % 5:
+                    length = rng.randint(16, 28)
+                    network = ipaddress.IPv4Network((rng.getrandbits(32) >> (32 - length) << (32 - length), length))
+                else:
+                    length = rng.randint(32, 64)
+                    network = ipaddress.IPv6Network((rng.getrandbits(128) >> (128 - length) << (128 - length), length))
+                self.cidr_ranges[owner].append(str(network))
+            self.cidr_index = CidrIndex(self.cidr_ranges)
+            self.cidr_probes = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(900)]
+            self.cidr_probes += [str(ipaddress.IPv6Address(rng.getrandbits(128))) for _ in range(100)]
+            self.cidr_probes += [str(ipaddress.ip_network(c).network_address + 1)
+                                 for c in rng.sample(self.cidr_ranges["ai_trainer"], 200)]
+        addresses = itertools.cycle(self.cidr_probes)
+        
+        return [
+            ("generate_targeted_content", None, lambda: content_gen.generate_targeted_content(bot_type)),
+            # wrap_content_with_traps extends the content's trap lists, so each call gets fresh content
+            ("wrap_content_with_traps", lambda: content_gen.generate_targeted_content(bot_type),
+             lambda content: self.handler.wrap_content_with_traps(content, bot_type, True)),
+            ("generate_interactive_page", None, lambda: interactive.generate_interactive_page(bot_type, keywords)),
+            ("generate_fake_csv", None, bait.generate_fake_csv),
+            ("generate_fake_json", None, bait.generate_fake_json),
+            ("generate_fake_xml", None, bait.generate_fake_xml),
+            ("generate_fake_pdf", None, bait.generate_fake_pdf),
+            ("generate_fake_zip", None, lambda: self.handler.generate_fake_zip(bot_type)),
+            ("detect_bot_type", None, lambda: config_manager.detect_bot_type(*next(samples))),
+            ("cidr_index_build_100k", None, lambda: CidrIndex(self.cidr_ranges)),
+            ("cidr_index_lookup_100k", None, lambda: self.cidr_index.lookup(next(addresses))),
+        ]
+    
+    @staticmethod
+    def output_size(output) -> int:
+        """Bytes an operation's result would put on the wire"""
+        if isinstance(output, bytes):
+            return len(output)
+        if isinstance(output, str):
+            return len(output.encode('utf-8'))
+        if isinstance(output, (dict, list)):
+            return len(json.dumps(output, default=str).encode('utf-8'))
+        return 0
+    
+    def measure(self, setup, operation) -> Dict:
+        """Run one case for the time budget, then once more under tracemalloc"""
+        iterations = 0
+        busy = 0.0
+        output = None
+        deadline = time.perf_counter() + self.seconds
+        
+        while time.perf_counter() < deadline or iterations < 3:
+            args = (setup(),) if setup else ()
+            began = time.perf_counter()
+            output = operation(*args)
+            busy += time.perf_counter() - began
+            iterations += 1
+        
+        size = self.output_size(output)
+        ops_per_s = iterations / busy if busy else 0.0
+        
+        # Memory pass, kept separate because tracing distorts the timings
+        args = (setup(),) if setup else ()
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            output = operation(*args)
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
         
-        # Stop ngrok tunnel
-        if self.ngrok_manager:
-            self.ngrok_manager.stop()
+        return {
+            "iterations": iterations,
+            "ops_per_s": round(ops_per_s, 1),
+            "mean_us": round(busy / iterations * 1e6, 2),
+            "output_bytes": size,
+            "bytes_per_s": round(ops_per_s * size),
+            "peak_kb": round((peak - before) / 1024, 1),
+            "retained_kb": round((after - before) / 1024, 1)
+        }
+    
+    def run(self) -> Dict:
+        """Measure every case and return the report"""
+        results = {}
+        for name, setup, operation in self.cases():
+            random.seed(1234)
+            results[name] = self.measure(setup, operation)
+            row = results[name]
+            print(f"{name:<28}{row['ops_per_s']:>12}{row['mean_us']:>12}{row['bytes_per_s'] / 1e6:>10.2f}"
+                  f"{row['peak_kb']:>10}{row['retained_kb']:>10}")
         
-        # Stop server
-        if self.server:
-            self.server.shutdown()
+        return {
+            "mode": "micro",
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seconds_per_case": self.seconds,
+            "cases": results
+        }
+    
+    @staticmethod
+    def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+        """Cases that got slower or hungrier than the baseline by more than threshold (a fraction)"""
+        regressions = []
+        for name, row in report["cases"].items():
+            base = baseline.get("cases", {}).get(name)
+            if not base:
+                continue
+            
+            if base["ops_per_s"] and row["ops_per_s"] < base["ops_per_s"] * (1 - threshold):
+                regressions.append(f"{name}: {row['ops_per_s']} ops/s vs baseline {base['ops_per_s']}")
+            if base["peak_kb"] > 1 and row["peak_kb"] > base["peak_kb"] * (1 + threshold):
+                regressions.append(f"{name}: peak {row['peak_kb']} KB vs baseline {base['peak_kb']} KB")
         
-        print("\nFinal Statistics:")
-        print(f"   Total Requests: {self.control_panel.stats['total_requests']}")
-        print(f"   Bot Requests: {self.control_panel.stats['bot_requests']}")
-        print(f"   Targeted Bots: {self.control_panel.stats['targeted_bots']}")
-        print(f"   Downloads: {self.control_panel.stats.get('downloads', 0)}")
+        return regressions
+
+class SoakMonitor:
+    """Samples RSS, live objects per type and top tracemalloc allocators, and flags steady growth"""
+    
+    def __init__(self, top_types: int = 15, top_allocators: int = 10):
+        self.top_types = top_types
+        self.top_allocators = top_allocators
+        self.samples = []
+    
+    @staticmethod
+    def rss_kb() -> int:
+        """Current resident set size (peak RSS where /proc is unavailable)"""
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+        except (OSError, ValueError, IndexError):
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    def sample(self, elapsed: float, requests_sent: int) -> Dict:
+        """Take one sample; tracemalloc must already be tracing"""
+        gc.collect()
+        type_counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+        traced, _ = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ])
         
-        if self.control_panel.stats['bot_types_detected']:
-            print("\nBot Types Detected:")
-            for bot_type, count in self.control_panel.stats['bot_types_detected'].items():
-                print(f"   {bot_type}: {count}")
+        allocators = {}
+        for stat in snapshot.statistics('lineno')[:self.top_allocators]:
+            frame = stat.traceback[0]
+            allocators[f"{frame.filename}:{frame.lineno}"] = {"kb": round(stat.size / 1024, 1), "blocks": stat.count}
+        
+        sample = {
+            "elapsed_s": round(elapsed, 1),
+            "requests": requests_sent,
+            "rss_kb": self.rss_kb(),
+            "traced_kb": round(traced / 1024, 1),
+            "objects": sum(type_counts.values()),
+            "types": dict(type_counts.most_common(self.top_types)),
+            "allocators": allocators
+        }
+        self.samples.append(sample)
+        return sample
+    
+    @staticmethod
+    def is_growing(series: List[float], min_growth: float = 0.1) -> bool:
+        """True when a series (past its warm-up fifth) rises in 80% of steps and by min_growth overall"""
+        series = series[len(series) // 5:]
+        if len(series) < 4 or series[0] <= 0:
+            return False
         
-        print("\nGoodbye!")
+        rises = sum(1 for a, b in zip(series, series[1:]) if b > a)
+        return rises >= 0.8 * (len(series) - 1) and series[-1] >= series[0] * (1 + min_growth)
+    
+    def findings(self, min_growth: float = 0.1) -> List[str]:
+        """Series that grew monotonically across the run"""
+        found = []
+        
+        for key, label in (("rss_kb", "RSS KB"), ("traced_kb", "traced KB"), ("objects", "live objects")):
+            series = [s[key] for s in self.samples]
+            if self.is_growing(series, min_growth):
+                found.append(f"{label}: {series[0]} -> {series[-1]}")
+        
+        for group, unit in (("types", "objects"), ("allocators", "KB")):
+            names = set()
+            for s in self.samples:
+                names.update(s[group])
+            for name in sorted(names):
+                values = [s[group].get(name, 0) for s in self.samples]
+                values = [v["kb"] if isinstance(v, dict) else v for v in values]
+                if self.is_growing(values, min_growth):
+                    found.append(f"{name}: {values[0]} -> {values[-1]} {unit}")
+        
+        return found
+
+def run_replay_benchmark(args, settings: ServerSettings) -> Dict:
+    """--bench replay: replay a request log (or a synthetic mix) against a target or a local instance"""
+    config_manager = ConfigManager()
+    if args.bench_log:
+        entries = ReplayBenchmark.load_request_log(args.bench_log, args.bench_requests)
+        print(f"Loaded {len(entries)} requests from {args.bench_log}")
+    else:
+        entries = ReplayBenchmark.synthetic_mix(config_manager, args.bench_requests or 2000)
+        print(f"Generated {len(entries)} synthetic crawler requests")
+    
+    local = None
+    if args.bench_target:
+        host, _, port = args.bench_target.rpartition(':')
+        host, port = host or '127.0.0.1', int(port)
+    else:
+        # Local instance without console feed or request log so the numbers measure serving only
+        settings.console_feed = False
+        settings.request_log_path = None
+        logger.setLevel(logging.WARNING)
+        local = InteractiveTarPit('127.0.0.1', args.port, settings=settings)
+        if not local.start_background():
+            return {}
+        host, port = '127.0.0.1', local.port
+        print(f"Started local tar pit on port {port}")
+    
+    try:
+        bench = ReplayBenchmark(host, port, entries, concurrency=args.bench_concurrency, rate=args.bench_rate)
+        report = bench.run()
+    finally:
+        if local:
+            local.stop_background()
+    
+    ReplayBenchmark.print_report(report)
+    return report
+
+def run_micro_benchmark(args, settings: ServerSettings) -> Dict:
+    """--bench micro: generator and detection microbenchmarks, optionally checked against a baseline"""
+    settings.console_feed = False
+    settings.request_log_path = None
+    logger.setLevel(logging.WARNING)
+    
+    tar_pit = InteractiveTarPit(settings=settings)
+    atexit.unregister(tar_pit.cleanup)
+    
+    print(f"\n{'case':<28}{'ops/s':>12}{'mean us':>12}{'MB/s':>10}{'peak KB':>10}{'kept KB':>10}")
+    report = MicroBenchmark(tar_pit, seconds=args.bench_seconds).run()
+    
+    if args.bench_baseline:
+        with open(args.bench_baseline, 'r') as f:
+            baseline = json.load(f)
+        report["baseline"] = args.bench_baseline
+        report["regressions"] = MicroBenchmark.compare(report, baseline, args.bench_threshold)
+        
+        if report["regressions"]:
+            print(f"\nRegressions beyond {args.bench_threshold:.0%} of {args.bench_baseline}:")
+            for line in report["regressions"]:
+                print(f"   {line}")
+        else:
+            print(f"\nNo regressions beyond {args.bench_threshold:.0%} of {args.bench_baseline}")
+    
+    return report
+
+def run_soak_benchmark(args, settings: ServerSettings) -> Dict:
+    """--bench soak: drive a local instance with mixed traffic for hours and watch memory"""
+    settings.console_feed = False
+    settings.request_log_path = None
+    logger.setLevel(logging.WARNING)
+    
+    tracemalloc.start()
+    local = InteractiveTarPit('127.0.0.1', args.port, settings=settings)
+    if not local.start_background():
+        tracemalloc.stop()
+        return {}
+    host, port = '127.0.0.1', local.port
+    
+    config_manager = ConfigManager()
+    monitor = SoakMonitor()
+    stop = threading.Event()
+    sent = Counter()
+    
+    def upload(conn: http.client.HTTPConnection, round_no: int):
+        # A few names uploaded over and over, the way operators refresh bait files (admin listener)
+        boundary = "soakboundary"
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+                f"filename=\"soak_probe_{round_no % 4}.txt\"\r\nContent-Type: text/plain\r\n\r\n"
+                f"{'probe ' * 200}\r\n--{boundary}--\r\n").encode()
+        admin = http.client.HTTPConnection(local.settings.admin_host, local.admin_port, timeout=30)
+        try:
+            admin.request('POST', '/upload/file', body=body,
+                          headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+            admin.getresponse().read()
+        finally:
+            admin.close()
+        conn.request('POST', '/contact', body=b'name=bot&email=bot%40example.com',
+                     headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        conn.getresponse().read()
+    
+    def workload():
+        round_no = 0
+        while not stop.is_set():
+            entries = ReplayBenchmark.synthetic_mix(config_manager, 500, seed=round_no)
+            result = ReplayBenchmark(host, port, entries, concurrency=args.bench_concurrency,
+                                     rate=args.bench_rate).run()
+            sent["requests"] += result["requests"]
+            sent["errors"] += result["errors"]
+            try:
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                upload(conn, round_no)
+                conn.close()
+                sent["requests"] += 2
+            except (OSError, http.client.HTTPException):
+                sent["errors"] += 1
+            round_no += 1
+    
+    duration = args.bench_hours * 3600
+    print(f"Soaking local tar pit on port {port} for {args.bench_hours}h, sampling every {args.bench_interval}s")
+    print(f"\n{'elapsed s':>10}{'requests':>12}{'RSS MB':>10}{'traced MB':>12}{'objects':>12}")
+    
+    driver = threading.Thread(target=workload, daemon=True)
+    start = time.monotonic()
+    driver.start()
+    try:
+        while True:
+            elapsed = time.monotonic() - start
+            s = monitor.sample(elapsed, sent["requests"])
+            print(f"{s['elapsed_s']:>10}{s['requests']:>12}{s['rss_kb'] / 1024:>10.1f}"
+                  f"{s['traced_kb'] / 1024:>12.1f}{s['objects']:>12}")
+            if elapsed >= duration:
+                break
+            time.sleep(min(args.bench_interval, max(0.0, duration - elapsed)))
+    except KeyboardInterrupt:
+        print("\nSoak interrupted, reporting collected samples")
+    finally:
+        stop.set()
+        driver.join(timeout=60)
+        local.stop_background()
+        tracemalloc.stop()
+        for n in range(4):
+            path = os.path.join(local.bait_manager.uploaded_dir, f"soak_probe_{n}.txt")
+            if os.path.exists(path):
+                os.remove(path)
+    
+    findings = monitor.findings(args.bench_threshold)
+    if findings:
+        print(f"\nMonotonic growth detected ({args.bench_threshold:.0%}+ over the run):")
+        for line in findings:
+            print(f"   {line}")
+    else:
+        print("\nNo monotonic memory growth detected")
+    
+    return {
+        "mode": "soak",
+        "duration_s": round(time.monotonic() - start, 1),
+        "requests": sent["requests"],
+        "errors": sent["errors"],
+        "samples": monitor.samples,
+        "regressions": findings
+    }
+
+def run_benchmark(args, settings: ServerSettings) -> int:
+    """Dispatch --bench modes, save the JSON report and return the process exit code"""
+    if args.bench == 'replay':
+        report = run_replay_benchmark(args, settings)
+    elif args.bench == 'micro':
+        report = run_micro_benchmark(args, settings)
+    elif args.bench == 'soak':
+        report = run_soak_benchmark(args, settings)
+    else:
+        print(f"Unknown benchmark mode: {args.bench}")
+        return 2
+    
+    if not report:
+        return 1
+    
+    if args.bench_output:
+        with open(args.bench_output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.bench_output}")
+    return 1 if report.get("regressions") else 0
 
 # ============================================================================
 # ENHANCED CONFIGURATION WIZARD WITH NGrok SETUP
@@ -3063,6 +7714,9 @@ def enhanced_configuration_wizard():
     config['embed_tracking'] = True
     config['meta_tag_injection'] = True
     config['user_uploads_enabled'] = False
+    config['soft_404_trap'] = False
+    config['behavior_classifier'] = True
+    config['behavior_threshold'] = 0.6
     
     # Save configuration
     config_file = "bot_config.json"
@@ -3098,7 +7752,10 @@ def create_default_config():
         "interactive_elements": True,
         "bait_files_enabled": True,
         "download_traps": True,
-        "user_uploads_enabled": False
+        "user_uploads_enabled": False,
+        "soft_404_trap": False,
+        "behavior_classifier": True,
+        "behavior_threshold": 0.6
     }
     
     with open("bot_config.json", 'w') as f:
@@ -3126,8 +7783,155 @@ def main():
     parser.add_argument('--test', action='store_true', help='Test bait file generation')
     parser.add_argument('--no-interactive', action='store_true', help='Disable interactive elements')
     parser.add_argument('--default', action='store_true', help='Create default config and exit')
+    parser.add_argument('--keepalive-timeout', type=float, default=15.0,
+                        help='Seconds an idle keep-alive connection is held open (default: 15)')
+    parser.add_argument('--header-timeout', type=float, default=10.0,
+                        help='Seconds a client gets to send the request line and headers, in total (default: 10)')
+    parser.add_argument('--body-timeout', type=float, default=30.0,
+                        help='Seconds a client gets to send a request body, in total (default: 30)')
+    parser.add_argument('--send-timeout', type=float, default=60.0,
+                        help='Seconds one response write may wait on a client that is not reading (default: 60)')
+    parser.add_argument('--max-header-bytes', type=int, default=16384,
+                        help='Largest request line plus headers; bigger requests get 431 (default: 16384)')
+    parser.add_argument('--max-body-kb', type=int, default=1024,
+                        help='Largest POST body accepted on the public listener (default: 1024)')
+    parser.add_argument('--max-connections', type=int, default=1000,
+                        help='Open public connections per process; extra connections are closed at accept, 0 = no cap (default: 1000)')
+    parser.add_argument('--max-connections-per-ip', type=int, default=64,
+                        help='Open public connections per client IP per process, 0 = no cap (default: 64)')
+    parser.add_argument('--max-keepalive-requests', type=int, default=100,
+                        help='Requests served per connection before it is closed (default: 100)')
+    parser.add_argument('--no-compression', action='store_true',
+                        help='Disable gzip/deflate Content-Encoding negotiation')
+    parser.add_argument('--compression-level', type=int, default=1, choices=range(1, 10), metavar='1-9',
+                        help='zlib level for dynamically generated pages (default: 1)')
+    parser.add_argument('--log-queue-size', type=int, default=10000,
+                        help='Log records buffered before sampling/dropping starts (default: 10000)')
+    parser.add_argument('--quiet-feed', action='store_true',
+                        help='Do not print the live bot activity feed to the console')
+    parser.add_argument('--feed-rate', type=float, default=20.0,
+                        help='Max live feed lines per second on the console (default: 20)')
+    parser.add_argument('--request-log', default='logs/requests.jsonl',
+                        help='JSONL file receiving one record per request (default: logs/requests.jsonl)')
+    parser.add_argument('--no-request-log', action='store_true', help='Disable the JSONL request log')
+    parser.add_argument('--request-log-max-mb', type=int, default=64,
+                        help='Rotate the request log after this many MB (default: 64)')
+    parser.add_argument('--request-log-rotate', type=float, default=3600.0,
+                        help='Rotate the request log after this many seconds (default: 3600)')
+    parser.add_argument('--request-log-gzip', action='store_true', help='Gzip rotated request log segments')
+    parser.add_argument('--max-tracked-clients', type=int, default=50000,
+                        help='Per-client records kept before evicting the least recently seen (default: 50000)')
+    parser.add_argument('--track-by-ua', action='store_true',
+                        help='Track clients by IP and User-Agent instead of IP alone')
+    parser.add_argument('--sketch-capacity', type=int, default=100,
+                        help='Entries per heavy-hitter sketch (top IPs/paths/user agents, default: 100)')
+    parser.add_argument('--ip-ranges', default='bot_ranges.json',
+                        help='JSON file of crawler CIDR ranges per bot type (default: bot_ranges.json)')
+    parser.add_argument('--ip-ranges-reload', type=float, default=5.0,
+                        help='Seconds between checks of the IP ranges file for changes (0 = never, default: 5)')
+    parser.add_argument('--config-reload', type=float, default=2.0,
+                        help='Seconds between checks of bot_config.json for changes (0 = never, default: 2)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Serve from this many forked worker processes sharing the port (default: 1)')
+    parser.add_argument('--worker-state-dir', default='logs/workers',
+                        help='Where workers publish stats for the merged /api/status view (default: logs/workers)')
+    parser.add_argument('--stats-snapshot', default='logs/stats_snapshot.json',
+                        help='Save counters, sketches and recent clients here and reload them on startup '
+                             '(default: logs/stats_snapshot.json)')
+    parser.add_argument('--no-stats-snapshot', action='store_true', help='Start from zero and keep no stats snapshot')
+    parser.add_argument('--stats-snapshot-interval', type=float, default=30.0,
+                        help='Seconds between stats snapshots (0 = only at shutdown, default: 30)')
+    parser.add_argument('--cluster-push', metavar='HOST:PORT',
+                        help='Push stats deltas over UDP to a cluster aggregator at HOST:PORT')
+    parser.add_argument('--node-id', help='Name of this node in the fleet view (default: hostname:port)')
+    parser.add_argument('--cluster-interval', type=float, default=5.0,
+                        help='Seconds between cluster pushes (default: 5)')
+    parser.add_argument('--cluster-key', default=os.environ.get('TARPIT_CLUSTER_KEY'),
+                        help='Shared key signing cluster pushes (default: $TARPIT_CLUSTER_KEY)')
+    parser.add_argument('--cluster-aggregator', action='store_true',
+                        help='Run as the cluster aggregator: fleet-wide /status and /metrics on --port')
+    parser.add_argument('--status-stream-rate', type=float, default=2.0,
+                        help='Max live dashboard updates per second on /status/stream (default: 2)')
+    parser.add_argument('--status-stream-viewers', type=int, default=50,
+                        help='Max concurrent /status/stream viewers (default: 50)')
+    parser.add_argument('--status-tick', type=float, default=1.0,
+                        help='Seconds between dashboard snapshots behind /api/status and /metrics (default: 1)')
+    parser.add_argument('--admin-host', default='127.0.0.1',
+                        help='Interface for the admin listener: dashboard, uploads, /metrics (default: 127.0.0.1)')
+    parser.add_argument('--admin-port', type=int, default=None,
+                        help='Port for the admin listener (default: first free port after --port)')
+    parser.add_argument('--admin-threads', type=int, default=16,
+                        help='Handler threads serving the admin listener (default: 16)')
+    parser.add_argument('--public-nice', type=int, default=5,
+                        help='Nice increment for public listener threads so the admin listener stays responsive; 0 disables (default: 5)')
+    parser.add_argument('--cluster-listen', default='127.0.0.1:9477',
+                        help='UDP address the aggregator receives pushes on; other than loopback needs --cluster-key (default: 127.0.0.1:9477)')
+    parser.add_argument('--bench', choices=['replay', 'micro', 'soak'], help='Run a benchmark instead of serving')
+    parser.add_argument('--bench-log', help='Replay this requests.jsonl file (default: synthetic crawler mix)')
+    parser.add_argument('--bench-target', help='host:port to benchmark (default: start a local instance)')
+    parser.add_argument('--bench-requests', type=int, default=0,
+                        help='Number of requests to send (default: whole log, or 2000 synthetic)')
+    parser.add_argument('--bench-concurrency', type=int, default=8, help='Concurrent connections (default: 8)')
+    parser.add_argument('--bench-rate', type=float, default=0.0,
+                        help='Pace requests at this many per second (default: 0 = as fast as possible)')
+    parser.add_argument('--bench-output', help='Write the JSON report to this file')
+    parser.add_argument('--bench-seconds', type=float, default=1.0,
+                        help='Time budget per microbenchmark case (default: 1.0)')
+    parser.add_argument('--bench-baseline', help='Compare microbenchmarks against this saved report')
+    parser.add_argument('--bench-threshold', type=float, default=0.15,
+                        help='Allowed slowdown/memory growth vs baseline before failing (default: 0.15)')
+    parser.add_argument('--bench-hours', type=float, default=1.0, help='Soak test duration in hours (default: 1.0)')
+    parser.add_argument('--bench-interval', type=float, default=60.0,
+                        help='Seconds between soak memory samples (default: 60)')
     
     args = parser.parse_args()
+    # Both are divisors: the snapshot tick index and the broadcaster's wait between updates
+    if args.status_tick <= 0:
+        parser.error("--status-tick must be greater than 0")
+    if args.status_stream_rate <= 0:
+        parser.error("--status-stream-rate must be greater than 0")
+    
+    settings = ServerSettings(
+        keepalive_timeout=args.keepalive_timeout,
+        max_keepalive_requests=args.max_keepalive_requests,
+        header_timeout=args.header_timeout,
+        body_timeout=args.body_timeout,
+        send_timeout=args.send_timeout,
+        max_header_bytes=args.max_header_bytes,
+        max_body_kb=args.max_body_kb,
+        max_connections=args.max_connections,
+        max_connections_per_ip=args.max_connections_per_ip,
+        compression=not args.no_compression,
+        dynamic_compression_level=args.compression_level,
+        log_queue_size=args.log_queue_size,
+        console_feed=not args.quiet_feed,
+        feed_rate=args.feed_rate,
+        request_log_path=None if args.no_request_log else args.request_log,
+        request_log_max_mb=args.request_log_max_mb,
+        request_log_rotate_seconds=args.request_log_rotate,
+        request_log_gzip=args.request_log_gzip,
+        max_tracked_clients=args.max_tracked_clients,
+        track_clients_by_ua=args.track_by_ua,
+        sketch_capacity=args.sketch_capacity,
+        ip_ranges_file=args.ip_ranges,
+        ip_ranges_reload=args.ip_ranges_reload,
+        config_reload=args.config_reload,
+        workers=max(1, args.workers),
+        worker_state_dir=args.worker_state_dir,
+        stats_snapshot_path=None if args.no_stats_snapshot else args.stats_snapshot,
+        stats_snapshot_interval=args.stats_snapshot_interval,
+        cluster_push=args.cluster_push,
+        node_id=args.node_id,
+        cluster_interval=args.cluster_interval,
+        cluster_key=args.cluster_key,
+        status_stream_rate=args.status_stream_rate,
+        status_stream_viewers=args.status_stream_viewers,
+        status_tick=args.status_tick,
+        admin_host=args.admin_host,
+        admin_port=args.admin_port,
+        admin_threads=args.admin_threads,
+        public_nice=args.public_nice
+    )
     
     print("\n" + "="*70)
     print("INTERACTIVE AI SCRAPER TAR PIT WITH NGrok")
@@ -3140,6 +7944,13 @@ def main():
         create_default_config()
         return
     
+    if args.bench:
+        sys.exit(run_benchmark(args, settings))
+    
+    if args.cluster_aggregator:
+        run_cluster_aggregator(args, settings)
+        return
+    
     if args.test:
         print("\nTesting bait file generation...")
         bait_manager = BaitContentManager()
@@ -3160,7 +7971,7 @@ def main():
             
             use_ngrok = input("Enable ngrok tunneling? (y/n, default y): ").strip().lower() != 'n'
             
-            tar_pit = InteractiveTarPit(args.host, args.port, ngrok_token)
+            tar_pit = InteractiveTarPit(args.host, args.port, ngrok_token, settings)
             tar_pit.start(use_ngrok=use_ngrok)
         return
     
@@ -3185,7 +7996,7 @@ def main():
         # Use ngrok if token is available or explicitly requested
         use_ngrok = args.ngrok or (ngrok_token is not None)
         
-        tar_pit = InteractiveTarPit(args.host, args.port, ngrok_token)
+        tar_pit = InteractiveTarPit(args.host, args.port, ngrok_token, settings)
         tar_pit.start(use_ngrok=use_ngrok)
         return
     
@@ -3206,7 +8017,7 @@ def main():
             ngrok_token = ngrok_config.get('auth_token')
     
     # Start the tar pit
-    tar_pit = InteractiveTarPit(args.host, args.port, ngrok_token)
+    tar_pit = InteractiveTarPit(args.host, args.port, ngrok_token, settings)
     
     try:
         tar_pit.start(use_ngrok=(args.ngrok or ngrok_token is not None))